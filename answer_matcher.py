@@ -0,0 +1,103 @@
+import unicodedata
+
+CORRECT = 'correct'
+ALMOST_CORRECT = 'almost correct'
+WRONG = 'wrong'
+# Letters that aren't decomposed into a base letter and a diacritic mark by unicodedata
+LETTERS_WITHOUT_DIACRITICS = str.maketrans({'ł': 'l', 'Ł': 'L', 'ø': 'o', 'Ø': 'O', 'đ': 'd', 'Đ': 'D', 'ß': 'ss'})
+
+
+def normalize_answer(answer):
+    """
+    :param answer: (str)
+    :return: (str) answer in lowercase with single spaces between words
+    """
+    return ' '.join(answer.casefold().split())
+
+
+def fold_diacritics(text):
+    """
+    :param text: (str)
+    :return: (str) text with letters without diacritics, e.g. 'zażółć' -> 'zazolc'
+    """
+    decomposed_text = unicodedata.normalize('NFKD', text.translate(LETTERS_WITHOUT_DIACRITICS))
+    return ''.join(character for character in decomposed_text if not unicodedata.combining(character))
+
+
+def get_max_distance(answer):
+    """
+    :param answer: (str) accepted answer
+    :return: (int) number of typos allowed in the answer, there are none in short words, because they would match
+             other words
+    """
+    if len(answer) < 4:
+        return 0
+    elif len(answer) < 8:
+        return 1
+    return 2
+
+
+def is_within_distance(first, second, max_distance):
+    """
+    Checks if the edit distance between the texts, where a typo is a missing, an additional or a wrong letter or two
+    swapped letters, is at most max_distance. Only the cells of the distance matrix near its diagonal are computed.
+    :param first: (str)
+    :param second: (str)
+    :param max_distance: (int)
+    :return: (bool)
+    """
+    if abs(len(first) - len(second)) > max_distance:
+        return False
+    too_far = max_distance + 1
+    before_previous_row = None
+    row = [min(j, too_far) for j in range(len(second) + 1)]
+    for i in range(1, len(first) + 1):
+        previous_row, row = row, [too_far] * (len(second) + 1)
+        if i <= max_distance:
+            row[0] = i
+        for j in range(max(1, i - max_distance), min(len(second), i + max_distance) + 1):
+            cost = first[i - 1] != second[j - 1]
+            distance = min(previous_row[j] + 1, row[j - 1] + 1, previous_row[j - 1] + cost)
+            if i > 1 and j > 1 and first[i - 1] == second[j - 2] and first[i - 2] == second[j - 1]:
+                distance = min(distance, before_previous_row[j - 2] + 1)
+            row[j] = min(distance, too_far)
+        if min(row) > max_distance:
+            return False
+        before_previous_row = previous_row
+    return row[-1] <= max_distance
+
+
+class AnswerMatcher:
+    """
+    Grades answers for a flashcard. Accepted answers are normalized once, so checking an answer needs only a few set
+    lookups, unless it has a typo. Answers that differ only by case and whitespace are correct, answers without
+    diacritics or with a few typos are almost correct.
+    """
+    def __init__(self, accepted_answers):
+        """
+        :param accepted_answers: list of correct answers (str)
+        """
+        self.accepted_answers = accepted_answers
+        self._normalized_answers = {normalize_answer(answer) for answer in accepted_answers}
+        # Accepted answers without diacritics and the numbers of typos allowed in them
+        self._folded_answers = {}
+        for answer in self._normalized_answers:
+            folded_answer = fold_diacritics(answer)
+            self._folded_answers[folded_answer] = max(get_max_distance(folded_answer),
+                                                      self._folded_answers.get(folded_answer, 0))
+
+    def grade(self, answer):
+        """
+        :param answer: (str) answer given by a user
+        :return: (str) CORRECT, ALMOST_CORRECT or WRONG
+        """
+        answer = normalize_answer(answer)
+        if answer in self._normalized_answers:
+            return CORRECT
+        answer = fold_diacritics(answer)
+        if answer in self._folded_answers:
+            return ALMOST_CORRECT
+        for folded_answer, max_distance in self._folded_answers.items():
+            if max_distance and is_within_distance(answer, folded_answer, max_distance):
+                return ALMOST_CORRECT
+        return WRONG
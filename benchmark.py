@@ -0,0 +1,600 @@
+import subprocess
+import asyncio
+import platform
+import glob
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import random
+import socket
+from database import Database
+from flashcard import Flashcard
+from sqlite_database import SqliteDatabase, migrate_from_csv
+from dictionary_page_parser import parse_dictionary_page
+from trigram_index import TrigramIndex
+from learner_progress import LearnerProgress
+from learning_session import LearningSession, LEARNING_ENGLISH, LEARNING_POLISH, REVISING
+from session_replay import replay_sessions, SimulatedAnswers
+from review_log import ReviewLog, load_reviews, get_retention, get_hardest_words, get_latency_percentiles
+
+# Startup times above these thresholds (in seconds) are treated as regressions
+IMPORT_TIME_THRESHOLD = 0.1
+FIRST_MENU_TIME_THRESHOLD = 0.5
+# Modules that must not be imported before the user chooses a mode
+HEAVY_MODULES = ['pandas', 'numpy', 'bs4', 'requests', 'sqlite3', 'concurrent.futures', 'html.parser']
+# Results of benchmark_database and benchmark_learning_round are saved there and compared with the previous ones, a path
+# to another .json file can be given as an argument
+RESULTS_PATH = 'benchmark_results.json'
+# Operations slower than in the previous results by this ratio are reported
+REGRESSION_RATIO = 1.2
+# Number of flashcards used in each of the measured operations on a database
+NUMBER_OF_OPERATIONS = 100
+# Simulated learners of the server translate that part of the words correctly
+CORRECT_ANSWERS_RATIO = 0.8
+
+
+def generate_deck(file_path, number_of_flashcards):
+    """
+    Writes a synthetic deck in the data.csv format. Like in real decks, many flashcards share polish translations and
+    definitions.
+    :param file_path: (str)
+    :param number_of_flashcards: (int)
+    :return: None
+    """
+    with open(file_path, 'w', encoding='utf8', newline='') as file:
+        file.write('english_word;polish_words;example;definition;stage\r\n')
+        for i in range(number_of_flashcards):
+            file.write(f'word{i};słowo{i % 5000}/wyraz{i % 700};This is an example with the *** number {i}.;'
+                       f'a definition of the word number {i % 20000};{i % 3 + 1}\r\n')
+
+
+def load_with_pandas(file_path):
+    """
+    The previous way of loading data: pd.read_csv and a Flashcard created from each row of DataFrame.iterrows()
+    :param file_path: (str)
+    :return: list of 3 list of Flashcards in a corresponding stage
+    """
+    import pandas as pd
+    data = pd.read_csv(file_path, sep=';', encoding='utf8')
+    flashcards = [[], [], []]
+    for _, row in data.iterrows():
+        flashcards[row['stage'] - 1].append(
+            Flashcard(row['english_word'], row['polish_words'], row['definition'], row['example']))
+    return flashcards
+
+
+def generate_dictionary_page(word):
+    """
+    Creates a page resembling a page of the online dictionary: a long header and menu, several entries of the word
+    with definitions, translations and examples, and a long footer
+    :param word: (str)
+    :return: (str) html of the page
+    """
+    menu = ''.join(f'<li class="hdib"><a class="hdb" href="/link{i}">Link {i}</a></li>' for i in range(300))
+    entries = ''.join(
+        f'<div class="pr entry-body__el"><div class="pos-header"><span class="pos dpos">verb</span></div>'
+        f'<div class="def-block ddef_block"><div class="ddef_h"><div class="def ddef_d db">meaning {i} of '
+        f'<a class="query" href="/x">{word}</a> </div></div><div class="def-body ddef_b">'
+        f'<span class="trans dtrans dtrans-se">tłumaczenie {i}, przekład {i}</span>'
+        + ''.join(f'<div class="examp dexamp"> <span class="eg deg">Sentence {j} with {word} &amp; more.</span></div>'
+                  for j in range(4)) + '</div></div></div>' for i in range(20))
+    footer = ''.join(f'<div class="footer-item"><p>Footer paragraph {i}</p></div>' for i in range(300))
+    return (f'<html><head><script>var config = {{"a": 1}};</script><title>{word}</title></head><body><ul>{menu}</ul>'
+            f'{entries}{footer}</body></html>')
+
+
+def parse_with_beautiful_soup(source):
+    """
+    The previous way of parsing a dictionary page
+    :param source: (str) html of the page
+    :return: (tuple) like the one returned by parse_dictionary_page
+    """
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(source, 'html.parser')
+    return (soup.find('span', class_='dtrans-se').text.strip(), soup.find('div', class_='db').text.strip(),
+            [example.text.strip() for example in soup.find_all('div', class_='dexamp', limit=3)])
+
+
+def benchmark_parsing(pages_directory=None):
+    """
+    Compares parsing dictionary pages with parse_dictionary_page and with BeautifulSoup
+    :param pages_directory: (str) directory with saved pages of the online dictionary (*.html), generated pages are
+                            used when it's None
+    :return: None
+    """
+    if pages_directory is None:
+        pages = [generate_dictionary_page(f'word{i}') for i in range(20)]
+    else:
+        pages = []
+        for path in sorted(glob.glob(os.path.join(pages_directory, '*.html'))):
+            with open(path, encoding='utf8') as file:
+                pages.append(file.read())
+    print(f'Parsing {len(pages)} dictionary pages:')
+    print(f'  parse_dictionary_page: {measure(lambda: [parse_dictionary_page(page) for page in pages]):.3f}s')
+    try:
+        print(f'  BeautifulSoup:         {measure(lambda: [parse_with_beautiful_soup(page) for page in pages]):.3f}s')
+        if any(parse_dictionary_page(page) != parse_with_beautiful_soup(page) for page in pages):
+            print('  Parsed fields differ!')
+    except ImportError:
+        print('  BeautifulSoup:         not installed')
+
+
+def measure(function, *args):
+    """
+    :param function: function to be measured
+    :param args: arguments of the function
+    :return: (float) time of the call in seconds
+    """
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+def benchmark_loading(number_of_flashcards):
+    """
+    Compares loading a deck with Database and with the previous pandas based code
+    :param number_of_flashcards: (int)
+    :return: None
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        file_path = os.path.join(directory, 'data.csv')
+        generate_deck(file_path, number_of_flashcards)
+        print(f'Loading {number_of_flashcards} flashcards:')
+        print(f'  csv reader: {measure(Database, file_path):.3f}s')
+        try:
+            print(f'  pandas:     {measure(load_with_pandas, file_path):.3f}s')
+        except ImportError:
+            print('  pandas:     not installed')
+
+
+def benchmark_memory(number_of_flashcards):
+    """
+    Measures memory allocated by a loaded Database per flashcard, when it is loaded from the data file and from its
+    snapshot
+    :param number_of_flashcards: (int)
+    :return: None
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        file_path = os.path.join(directory, 'data.csv')
+        generate_deck(file_path, number_of_flashcards)
+        for source in ('data file', 'snapshot'):  # The snapshot is written when the data file is loaded
+            tracemalloc.start()
+            database = Database(file_path)
+            size, _ = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            database.close()
+            del database
+            print(f'Memory of {number_of_flashcards} flashcards ({source}): {size / 2 ** 20:.1f} MiB '
+                  f'({size / number_of_flashcards:.0f} bytes per flashcard)')
+
+
+def benchmark_backends(number_of_flashcards):
+    """
+    Compares load, lookup and save latency of the data file and the SQLite database
+    :param number_of_flashcards: (int)
+    :return: None
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        csv_path = os.path.join(directory, 'data.csv')
+        sqlite_path = os.path.join(directory, 'data.db')
+        generate_deck(csv_path, number_of_flashcards)
+        migrate_from_csv(csv_path, sqlite_path)
+        words = [f'word{i}' for i in range(0, number_of_flashcards, max(1, number_of_flashcards // 1000))]
+        print(f'Backends with {number_of_flashcards} flashcards:')
+        for name, backend, path in (('csv', Database, csv_path), ('sqlite', SqliteDatabase, sqlite_path)):
+            start = time.perf_counter()
+            database = backend(path)
+            load_time = time.perf_counter() - start
+            start = time.perf_counter()
+            flashcards = [database.get_flashcard(word) for word in words]
+            lookup_time = (time.perf_counter() - start) / len(words)
+            start = time.perf_counter()
+            for flashcard in flashcards:
+                database.change_definition(flashcard, 'changed definition')
+            change_time = (time.perf_counter() - start) / len(flashcards)
+            save_time = measure(database.save_data)
+            print(f'  {name:6} load: {load_time:.3f}s, lookup: {lookup_time * 1e6:.1f}us, '
+                  f'change: {change_time * 1e6:.1f}us, save_data: {save_time:.3f}s')
+            database.close()
+
+
+def benchmark_snapshot(number_of_flashcards):
+    """
+    Compares loading of the data file and of its binary snapshot
+    :param number_of_flashcards: (int)
+    :return: None
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        csv_path = os.path.join(directory, 'data.csv')
+        generate_deck(csv_path, number_of_flashcards)
+        csv_time = measure(Database, csv_path)  # Writes the snapshot
+        snapshot_time = measure(Database, csv_path)
+        print(f'Snapshot with {number_of_flashcards} flashcards:')
+        print(f'  data file: {csv_time:.3f}s')
+        print(f'  snapshot:  {snapshot_time:.3f}s')
+
+
+def generate_words(number_of_words, seed=0):
+    """
+    :param number_of_words: (int)
+    :param seed: (int) seed of the random generator
+    :return: list of distinct random words (str) made of 1 to 4 syllables similar to english ones
+    """
+    generator = random.Random(seed)
+    onsets = ['', 'b', 'bl', 'br', 'c', 'ch', 'cl', 'cr', 'd', 'dr', 'f', 'fl', 'fr', 'g', 'gl', 'gr', 'h', 'j', 'k',
+              'l', 'm', 'n', 'p', 'pl', 'pr', 'qu', 'r', 's', 'sc', 'sh', 'sk', 'sl', 'sm', 'sn', 'sp', 'st', 'str',
+              'sw', 't', 'th', 'tr', 'v', 'w', 'wh', 'y', 'z']
+    vowels = ['a', 'e', 'i', 'o', 'u', 'y', 'ai', 'ea', 'ee', 'ie', 'oa', 'oo', 'ou']
+    codas = ['', '', '', 'b', 'ck', 'd', 'ff', 'g', 'll', 'm', 'n', 'ng', 'nt', 'p', 'r', 'rt', 's', 'ss', 'st', 't',
+             'x']
+    words = set()
+    while len(words) < number_of_words:
+        words.add(''.join(generator.choice(onsets) + generator.choice(vowels) + generator.choice(codas)
+                          for _ in range(generator.randint(1, 4))))
+    return list(words)
+
+
+def misspell(word, generator):
+    """
+    :param word: (str)
+    :param generator: (random.Random)
+    :return: (str) word with one letter deleted, inserted, replaced or swapped with the next one
+    """
+    i = generator.randrange(len(word) - 1)
+    letter = generator.choice('abcdefghijklmnopqrstuvwxyz')
+    return generator.choice([word[:i] + word[i + 1:], word[:i] + letter + word[i:], word[:i] + letter + word[i + 1:],
+                             word[:i] + word[i + 1] + word[i] + word[i + 2:]])
+
+
+def benchmark_fuzzy_search(number_of_words, number_of_queries=1000):
+    """
+    Measures building of a trigram index and latency and recall of finding 5 words most similar to misspelt ones
+    :param number_of_words: (int)
+    :param number_of_queries: (int)
+    :return: None
+    """
+    words = generate_words(number_of_words)
+    start = time.perf_counter()
+    index = TrigramIndex(words)
+    build_time = time.perf_counter() - start
+    generator = random.Random(1)
+    queries = [(word, misspell(word, generator))
+               for word in generator.sample([word for word in words if len(word) > 2], number_of_queries)]
+    latencies = []
+    found = 0
+    for word, misspelt_word in queries:
+        start = time.perf_counter()
+        similar_words = index.find_similar(misspelt_word, 5)
+        latencies.append(time.perf_counter() - start)
+        found += word in similar_words
+    latencies.sort()
+    print(f'Fuzzy search in {number_of_words} words:')
+    print(f'  build: {build_time:.2f}s')
+    print(f'  search: {sum(latencies) / len(latencies) * 1e3:.3f}ms on average, '
+          f'{latencies[int(len(latencies) * 0.99)] * 1e3:.3f}ms p99')
+    print(f'  misspelt word found in top 5: {found / len(queries):.1%}')
+
+
+def benchmark_database(number_of_flashcards):
+    """
+    Measures the main operations of Database on a synthetic deck
+    :param number_of_flashcards: (int)
+    :return: (dict) names of the operations and their times in seconds: loading from the data file and from the snapshot,
+             get_flashcard, moving NUMBER_OF_OPERATIONS flashcards with move_to_higher_stage, delete_flashcard and
+             save_data
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        file_path = os.path.join(directory, 'data.csv')
+        generate_deck(file_path, number_of_flashcards)
+        results = {}
+        start = time.perf_counter()
+        database = Database(file_path)
+        results['load_data_file'] = time.perf_counter() - start
+        database.close()
+        start = time.perf_counter()
+        database = Database(file_path)
+        results['load_snapshot'] = time.perf_counter() - start
+
+        words = [f'word{i}' for i in range(0, number_of_flashcards, max(1, number_of_flashcards // 1000))]
+        start = time.perf_counter()
+        for word in words:
+            database.get_flashcard(word)
+        results['get_flashcard'] = (time.perf_counter() - start) / len(words)
+        results['move_to_higher_stage'] = measure(
+            database.move_to_higher_stage, database.first_stage_flashcards.ids()[:NUMBER_OF_OPERATIONS], 1)
+        flashcards = list(database.second_stage_flashcards)[:NUMBER_OF_OPERATIONS]
+        start = time.perf_counter()
+        for flashcard in flashcards:
+            database.delete_flashcard(flashcard)
+        results['delete_flashcard'] = (time.perf_counter() - start) / len(flashcards)
+        results['save_data'] = measure(database.save_data)
+        database.close()
+    print(f'Database with {number_of_flashcards} flashcards:')
+    for operation, operation_time in results.items():
+        print(f'  {operation + ":":21} {operation_time * 1e3:.4f}ms')
+    return results
+
+
+def benchmark_learning_round(number_of_flashcards):
+    """
+    Measures a whole learning session of the first stage of a synthetic deck, replayed without a user, in which every
+    word is translated correctly
+    :param number_of_flashcards: (int)
+    :return: (dict) time of the session in seconds
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        file_path = os.path.join(directory, 'data.csv')
+        generate_deck(file_path, number_of_flashcards)
+        database = Database(file_path)
+        number_of_learned_flashcards = len(database.first_stage_flashcards)
+        _, learning_time = replay_sessions(database, LEARNING_ENGLISH, 1, SimulatedAnswers())
+        database.close()
+    print(f'Learning {number_of_learned_flashcards} flashcards: {learning_time:.3f}s')
+    return {'start_learning': learning_time}
+
+
+def benchmark_replay(number_of_flashcards, number_of_sessions=1000, number_of_words=20):
+    """
+    Measures how many sessions per second can be replayed by a learner that gives 80% of correct answers
+    :param number_of_flashcards: (int) number of flashcards in the deck
+    :param number_of_sessions: (int) number of sessions in each mode
+    :param number_of_words: (int) number of words in each session
+    :return: None
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        file_path = os.path.join(directory, 'data.csv')
+        generate_deck(file_path, number_of_flashcards)
+        database = Database(file_path)
+        progress = LearnerProgress(database)
+        get_answer = SimulatedAnswers(0.8, random.Random(0))
+        print(f'Replayed sessions of {number_of_words} words with {number_of_flashcards} flashcards:')
+        # A new learner starts with all the flashcards in the first stage, so there is something to revise only after
+        # the sessions of both learning modes
+        for mode in (LEARNING_ENGLISH, LEARNING_POLISH, REVISING):
+            number_of_answers, replay_time = replay_sessions(progress, mode, number_of_sessions, get_answer,
+                                                             number_of_words, random.Random(0))
+            print(f'  {mode + ":":9} {number_of_sessions / replay_time:.1f} sessions per second, '
+                  f'{number_of_answers / replay_time:.0f} answers per second')
+        database.close()
+
+
+def benchmark_review_log(number_of_answers, number_of_flashcards=100000):
+    """
+    Measures appending answers to the review log and computing its statistics
+    :param number_of_answers: (int) number of answers in the log
+    :param number_of_flashcards: (int) number of flashcards that are answered
+    :return: None
+    """
+    generator = random.Random(0)
+    with tempfile.TemporaryDirectory() as directory:
+        review_log = ReviewLog(os.path.join(directory, 'reviews.log'))
+        start = time.perf_counter()
+        for _ in range(number_of_answers):
+            review_log.append(generator.randrange(number_of_flashcards), generator.randint(1, 3), 0,
+                              generator.random() < CORRECT_ANSWERS_RATIO, 0, generator.expovariate(0.2))
+        review_log.flush()
+        append_time = time.perf_counter() - start
+        print(f'Review log with {number_of_answers} answers:')
+        print(f'  append:              {append_time / number_of_answers * 1e6:.2f}us per answer')
+        try:
+            reviews = load_reviews(review_log.file_path)
+        except ImportError:
+            print('  statistics:          numpy not installed')
+            return
+        print(f'  load:                {measure(load_reviews, review_log.file_path):.3f}s')
+        print(f'  retention:           {measure(get_retention, reviews):.3f}s')
+        print(f'  hardest words:       {measure(get_hardest_words, reviews):.3f}s')
+        print(f'  latency percentiles: {measure(get_latency_percentiles, reviews):.3f}s')
+
+
+def save_results(results, file_path):
+    """
+    Saves the results with the current commit to a json file and reports operations that got slower since the results
+    previously saved there
+    :param results: (dict) numbers of flashcards and dicts of operations and their times
+    :param file_path: (str)
+    :return: None
+    """
+    try:
+        with open(file_path, encoding='utf8') as file:
+            previous_results = json.load(file)['results']
+    except (OSError, ValueError, KeyError):
+        previous_results = {}
+    regressions = []
+    for size, operations in results.items():
+        for operation, operation_time in operations.items():
+            previous_time = previous_results.get(size, {}).get(operation)
+            if previous_time and operation_time / previous_time > REGRESSION_RATIO:
+                regressions.append(f'{operation} with {size} flashcards: {previous_time * 1e3:.3f}ms -> '
+                                   f'{operation_time * 1e3:.3f}ms')
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    with open(file_path, 'w', encoding='utf8') as file:
+        json.dump({'commit': commit, 'python': platform.python_version(), 'results': results}, file, indent=2)
+    print(f'Results saved to {file_path}, slower than before:')
+    for regression in regressions or ['none']:
+        print(f'  {regression}')
+
+
+def benchmark_learner_progress(number_of_flashcards, number_of_learners=1000, number_of_words=10):
+    """
+    Measures memory used by progress of learners that learned some words of a shared deck
+    :param number_of_flashcards: (int) number of flashcards in the deck
+    :param number_of_learners: (int)
+    :param number_of_words: (int) number of words learned by each learner
+    :return: None
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        file_path = os.path.join(directory, 'data.csv')
+        generate_deck(file_path, number_of_flashcards)
+        database = Database(file_path)
+        generator = random.Random(0)
+        tracemalloc.start()
+        learners = []
+        for _ in range(number_of_learners):
+            progress = LearnerProgress(database)
+            session = LearningSession(progress, LEARNING_ENGLISH, number_of_words, generator)
+            while not session.is_finished:
+                session.answer(session.flashcard.polish_words[0])
+            del session
+            learners.append(progress)
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        database.close()
+    print(f'Progress of {number_of_learners} learners of {number_of_flashcards} flashcards, {number_of_words} words '
+          f'learned by each: {size / number_of_learners:.0f} bytes per learner')
+
+
+async def _send_request(reader, writer, method, path, data):
+    """
+    :param reader: (asyncio.StreamReader) connection to the server
+    :param writer: (asyncio.StreamWriter)
+    :param method: (str) HTTP method
+    :param path: (str)
+    :param data: (dict) body of the request
+    :return: (dict) body of the response
+    """
+    body = json.dumps(data, ensure_ascii=False).encode('utf8')
+    writer.write(f'{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n'
+                 f'Content-Length: {len(body)}\r\n\r\n'.encode('latin-1') + body)
+    head = (await reader.readuntil(b'\r\n\r\n')).decode('latin-1').lower()
+    length = int(head.split('content-length:')[1].split('\r\n')[0])
+    return json.loads(await reader.readexactly(length))
+
+
+async def _simulate_learner(port, learner, number_of_words, latencies, generator):
+    """
+    Learns english words of a deck generated by generate_deck, some of them are translated incorrectly
+    :param port: (int) port of the server
+    :param learner: (str) name of the learner
+    :param number_of_words: (int) number of words in the session
+    :param latencies: list to which the times of answers in seconds are appended
+    :param generator: (random.Random)
+    :return: None
+    """
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    response = await _send_request(reader, writer, 'POST', f'/learners/{learner}/session',
+                                   {'mode': 'english', 'number_of_words': number_of_words})
+    while 'question' in response:
+        if generator.random() < CORRECT_ANSWERS_RATIO:
+            answer = f'słowo{int(response["question"][4:]) % 5000}'
+        else:
+            answer = 'wrong answer'
+        start = time.perf_counter()
+        response = await _send_request(reader, writer, 'POST', f'/learners/{learner}/answers', {'answer': answer})
+        latencies.append(time.perf_counter() - start)
+    writer.close()
+
+
+async def _simulate_learners(port, number_of_learners, number_of_words):
+    """
+    :param port: (int) port of the server
+    :param number_of_learners: (int) number of learners learning at the same time
+    :param number_of_words: (int) number of words in a session of each learner
+    :return: (tuple) list of times of all the answers and the time of all the sessions in seconds
+    """
+    generator = random.Random(0)
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(_simulate_learner(port, f'learner{i}', number_of_words, latencies, generator)
+                           for i in range(number_of_learners)))
+    return latencies, time.perf_counter() - start
+
+
+def benchmark_server(number_of_flashcards, number_of_learners=2000, number_of_words=10):
+    """
+    Measures throughput and latency of answers of many learners learning at the same time with the server started
+    in another process
+    :param number_of_flashcards: (int) number of flashcards in the deck
+    :param number_of_learners: (int) number of concurrent sessions
+    :param number_of_words: (int) number of words in each session
+    :return: (dict) average time per answer and 99th percentile of the latency of an answer in seconds
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        file_path = os.path.join(directory, 'data.csv')
+        generate_deck(file_path, number_of_flashcards)
+        with socket.socket() as free_socket:
+            free_socket.bind(('127.0.0.1', 0))
+            port = free_socket.getsockname()[1]
+        process = subprocess.Popen([sys.executable, 'server.py', file_path, str(port)],
+                                   cwd=os.path.dirname(os.path.abspath(__file__)), stdout=subprocess.PIPE, text=True)
+        try:
+            process.stdout.readline()  # The server is started when it prints its address
+            latencies, total_time = asyncio.run(_simulate_learners(port, number_of_learners, number_of_words))
+        finally:
+            process.terminate()
+            process.wait()
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99)]
+    print(f'Server with {number_of_flashcards} flashcards and {number_of_learners} learners:')
+    print(f'  answers: {len(latencies)} in {total_time:.3f}s ({len(latencies) / total_time:.0f} per second)')
+    print(f'  median latency: {latencies[len(latencies) // 2] * 1e3:.2f}ms, p99 latency: {p99 * 1e3:.2f}ms '
+          f'(all the sessions are started at once)')
+    return {'server_time_per_answer': total_time / len(latencies), 'server_answer_p99': p99}
+
+
+def benchmark_startup():
+    """
+    Measures import time of main.py and time until the main menu is displayed, both in a new interpreter
+    :return: (bool) True if there are no regressions
+    """
+    directory = os.path.dirname(os.path.abspath(__file__))
+    check_imports = ('import sys, time; start = time.perf_counter(); import main; '
+                     'print(time.perf_counter() - start); '
+                     f'print(",".join(module for module in {HEAVY_MODULES!r} if module in sys.modules))')
+    output = subprocess.run([sys.executable, '-c', check_imports], cwd=directory, capture_output=True, text=True,
+                            check=True).stdout.splitlines()
+    import_time, imported_heavy_modules = float(output[0]), output[1] if len(output) > 1 else ''
+
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, 'main.py'], cwd=directory, stdin=subprocess.PIPE,
+                               stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    while 'Menu:' not in process.stdout.readline():
+        pass
+    first_menu_time = time.perf_counter() - start
+    process.communicate('9\n')
+
+    regressions = []
+    if import_time > IMPORT_TIME_THRESHOLD:
+        regressions.append(f'import time above {IMPORT_TIME_THRESHOLD}s')
+    if first_menu_time > FIRST_MENU_TIME_THRESHOLD:
+        regressions.append(f'time to the first menu above {FIRST_MENU_TIME_THRESHOLD}s')
+    if imported_heavy_modules:
+        regressions.append(f'modules imported at startup: {imported_heavy_modules}')
+    print('Startup:')
+    print(f'  import main:       {import_time:.3f}s')
+    print(f'  time to the menu:  {first_menu_time:.3f}s')
+    print(f'  regressions:       {", ".join(regressions) or "none"}')
+    return not regressions
+
+
+if __name__ == '__main__':
+    is_startup_fast = benchmark_startup()
+    sizes = [int(size) for size in sys.argv[1:] if size.isdecimal()] or [1000, 10000, 100000, 1000000]
+    # A directory with saved dictionary pages can be given as an argument
+    benchmark_parsing(next((argument for argument in sys.argv[1:] if os.path.isdir(argument)), None))
+    for size in sizes:
+        benchmark_loading(size)
+    for size in [100000, 1000000]:
+        benchmark_memory(size)
+    for size in sizes:
+        benchmark_backends(size)
+    for size in sizes:
+        benchmark_snapshot(size)
+    benchmark_fuzzy_search(1000000)
+    for size in [10000, 1000000]:
+        benchmark_learner_progress(size)
+    benchmark_replay(100000)
+    for size in [1000000, 5000000]:
+        benchmark_review_log(size)
+    benchmark_server(100000)
+    save_results({str(size): {**benchmark_database(size), **benchmark_learning_round(size)} for size in sizes},
+                 next((argument for argument in sys.argv[1:] if argument.endswith('.json')), RESULTS_PATH))
+    if not is_startup_fast:
+        sys.exit(1)
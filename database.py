@@ -1,6 +1,54 @@
-from flashcard import Flashcard
-import pandas as pd
+from flashcard import Flashcard, create_flashcards_from_online_dictionary
 from flashcard_creation_error import FlashcardCreationError
+from stage import Stage
+from scheduler import Scheduler, review
+from snapshot import read_snapshot, write_snapshot, copy_flashcards, read_lazy_texts, load_texts_lazily
+from trigram_index import TrigramIndex
+from instrumentation import instrumented
+from enrichment_queue import is_missing_text
+from functools import wraps
+from itertools import islice, repeat, chain
+import threading
+import json
+import csv
+import os
+
+# Number of rows read from the data file and validated at once
+CHUNK_SIZE = 10000
+# Maps a value of the stage column to an index of the corresponding stage list
+STAGE_INDEXES = {'1': 0, '2': 1, '3': 2}
+# Number of records in the journal after which it is compacted into the data file
+COMPACTION_THRESHOLD = 1000
+# Number of seconds without any changes after which the journal is compacted in the background, so a burst of changes
+# is saved to the data file with a single write
+SAVE_DELAY = 5
+
+
+def _read_rows_in_chunks(reader, chunk_size):
+    """
+    :param reader: iterator of rows of the data file
+    :param chunk_size: (int) maximal number of rows in a chunk
+    :return: generator of lists of rows
+    """
+    while True:
+        chunk = list(islice(reader, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _synchronized(method):
+    """
+    Decorator that makes the method hold the lock of the database, so flashcards aren't changed while they are saved
+    in the background
+    :param method: method of Database
+    :return: function
+    """
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
 
 
 class Database:
@@ -8,94 +56,519 @@ class Database:
         # fist stage is for learning polish translations of english words
         # second stage is for learning english translations of polish words
         # third stage is for revising already leaned words
+        self.file_path = file_path
+        # Binary copy of the data file that is loaded much faster, definitions and examples of the flashcards are
+        # read from it only when needed
+        self.snapshot_path = file_path + '.snapshot'
+        self.snapshot_texts = None
         self.first_stage_flashcards, self.second_stage_flashcards, self.third_stage_flashcards \
             = self._load_data(file_path)
         self.flashcards = [self.first_stage_flashcards, self.second_stage_flashcards, self.third_stage_flashcards]
+        self.next_card_id = max((max(stage.ids(), default=-1) for stage in self.flashcards)) + 1
+        # Indexes from an english word to its flashcard and from a polish word to flashcards with this translation
+        self._english_index = {}
+        self._polish_index = {}
+        # Index of english and polish words for finding misspelt words, built when it is used for the first time
+        self._trigram_index = None
+        for stage in self.flashcards:
+            for flashcard in stage:
+                self._index_flashcard(flashcard)
+        # Every modification is appended to the journal instead of rewriting the whole data file, the journal is
+        # replayed after loading the data file and compacted into it by save_data
+        self.journal_path = file_path + '.journal'
+        self.journal_length = self._replay_journal()
+        self.journal = open(self.journal_path, 'a', encoding='utf8')
+        self.scheduler = Scheduler(self.third_stage_flashcards)
+        # The journal is compacted by a background thread after a burst of changes, the database has to be closed to
+        # save the remaining changes
+        self._lock = threading.RLock()
+        self._save_lock = threading.Lock()  # Only one save at a time, the lock is held only for parts of it
+        self._dirty = threading.Event()  # Set when there are changes that aren't saved in the data file
+        self._closing = threading.Event()
+        self._writer = threading.Thread(target=self._save_in_background, daemon=True)
+        self._writer.start()
 
+    @instrumented
     def _load_data(self, file_path):
         """
-        :param file_path: (str) path to
-        :return: list of 3 list of Flashcards in a corresponding stage
+        Loads the snapshot of the data file or, if it doesn't exist or the data file was changed, the data file and
+        creates a new snapshot
+        :param file_path: (str) path to the semicolon separated data file
+        :return: list of 3 Stages
         """
-        data = None
+        snapshot = read_snapshot(self.snapshot_path, file_path)
+        if snapshot is not None:
+            stages, self.snapshot_texts = snapshot
+            return stages
         try:
-            data = pd.read_csv(file_path, sep=';', encoding='utf8')
+            file = open(file_path, encoding='utf8', newline='')
         except FileNotFoundError:
             print('File with given path does not exist!')
             exit()
-        return self._split_data_to_stages(data)
+        with file:
+            stages = self._split_data_to_stages(csv.reader(file, delimiter=';'))
+        flashcards = copy_flashcards(stages)
+        if self._write_snapshot(flashcards):
+            load_texts_lazily(flashcards, self.snapshot_texts)
+        return stages
 
-    def _split_data_to_stages(self, data):
+    @instrumented
+    def _write_snapshot(self, flashcards):
         """
-        Splits data into 3 learning stages
-        :param data: (DataFrame)
-        :return: list of 3 list of Flashcards in a corresponding stage
+        :param flashcards: (dict) copy of the flashcards returned by copy_flashcards, the same as in the data file
+        :return: (bool) True if the snapshot was written
         """
-        flashcards = [[], [], []]
-        for _, row in data.iterrows():
-            row_stage = row['stage']
-            if 0 <= row_stage <= 3:
-                flashcards[row['stage'] - 1].append(self._create_flashcard_from_data(row))
-            else:
-                print('Stage cannot be smaller than 0 or higher than 3!')
-                exit()
+        try:
+            self.snapshot_texts = write_snapshot(self.snapshot_path, self.file_path, flashcards, self.snapshot_texts)
+        except (OSError, ValueError):  # The data file is still loaded without the snapshot, only slower
+            return False
+        return True
+
+    def _split_data_to_stages(self, reader):
+        """
+        Splits data into 3 learning stages. The rows are read in chunks and stages of a whole chunk are validated at
+        once, so all the incorrect rows are reported before exiting.
+        Flashcards get ids from the id column or, if there is no such column, consecutive numbers. Ids have to be unique
+        integers. Review schedules are read from the interval, ease and due columns if they exist, the interval has to
+        be an integer and the ease and the due time numbers.
+        :param reader: csv reader over the data file, starting with the header row
+        :return: list of 3 Stages
+        """
+        columns = {name: i for i, name in enumerate(next(reader, []))}
+        try:
+            english_word, polish_words, definition, example, stage = (
+                columns[name] for name in ('english_word', 'polish_words', 'definition', 'example', 'stage'))
+        except KeyError as e:
+            print(f'Column {e} is missing in the data file!')
+            exit()
+        card_id = columns.get('id')
+        interval, ease, due = (columns.get(name) for name in ('interval', 'ease', 'due'))
+        has_schedules = None not in (interval, ease, due)
+        row_width = len(columns)
+        flashcards = [Stage(), Stage(), Stage()]
+        incorrect_rows = []  # Tuples of a row number and the reason why the row is incorrect
+        card_ids = set()  # Ids read from the id column
+        position = 0  # Flashcards get consecutive ids if there is no id column
+        # Empty lines, like the one an editor leaves at the end of a file, are skipped. Rows are numbered by the lines.
+        rows = ((reader.line_num, row) for row in reader if row)
+        for chunk in _read_rows_in_chunks(rows, CHUNK_SIZE):
+            stages = [row[stage] if len(row) == row_width else None for _, row in chunk]
+            if not STAGE_INDEXES.keys() >= set(stages):
+                incorrect_rows.extend((row_number, 'wrong number of columns' if row_stage is None
+                                       else f'stage has to be 1, 2 or 3, not {row_stage!r}')
+                                      for (row_number, _), row_stage in zip(chunk, stages)
+                                      if row_stage not in STAGE_INDEXES)
+            for flashcard_id, ((row_number, row), row_stage) in enumerate(zip(chunk, stages), start=position):
+                if row_stage not in STAGE_INDEXES:
+                    continue
+                if card_id is not None:
+                    try:
+                        flashcard_id = int(row[card_id])
+                    except ValueError:
+                        incorrect_rows.append((row_number, f'id has to be an integer, not {row[card_id]!r}'))
+                        continue
+                    # A flashcard with a repeated id would replace the previous one in its stage
+                    if flashcard_id in card_ids:
+                        incorrect_rows.append((row_number, f'id {flashcard_id} is used by another row'))
+                        continue
+                    card_ids.add(flashcard_id)
+                if has_schedules:
+                    try:
+                        schedule = int(row[interval]), float(row[ease]), float(row[due])
+                    except ValueError:
+                        incorrect_rows.append((row_number, 'interval has to be an integer and ease and due numbers, '
+                                                           f'not {row[interval]!r}, {row[ease]!r} and {row[due]!r}'))
+                        continue
+                if incorrect_rows:  # There is no point in creating flashcards that will not be used
+                    continue
+                flashcard = Flashcard(row[english_word], row[polish_words], row[definition], row[example])
+                flashcard.card_id = flashcard_id
+                if has_schedules:
+                    flashcard.interval, flashcard.ease, flashcard.due = schedule
+                flashcards[STAGE_INDEXES[row_stage]].add(flashcard)
+            position += len(chunk)
+        if incorrect_rows:
+            for row_number, reason in sorted(incorrect_rows):
+                print(f'Row {row_number}: {reason}!')
+            exit()
         return flashcards
 
-    def _create_flashcard_from_data(self, data):
+    @instrumented
+    def _replay_journal(self):
+        """
+        Applies all the records from the journal to the loaded flashcards
+        :return: (int) number of records in the journal
+        """
+        try:
+            file = open(self.journal_path, encoding='utf8')
+        except FileNotFoundError:
+            return 0
+        length = 0
+        with file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:  # The last record could have been written only partially
+                    continue
+                self._apply_journal_record(record)
+                length += 1
+        return length
+
+    def _get_recorded_flashcard(self, key):
+        """
+        :param key: (int) id of a flashcard or (str) its english word, which identified flashcards in journals written
+                    before they had ids
+        :return: (Flashcard) flashcard in any stage or None if there is no such flashcard
         """
-        :param data: (DataFrame)
-        :return: (Flashcard)
+        if isinstance(key, str):
+            return self.get_flashcard(key)
+        for stage in self.flashcards:
+            flashcard = stage.get(key)
+            if flashcard is not None:
+                return flashcard
+        return None
+
+    def _apply_journal_record(self, record):
+        """
+        Records describe the final state of the changed values and identify flashcards by their ids, which never change,
+        so applying a record again has no effect. It happens when the app crashes after the data file is saved, but
+        before the saved records are removed from the journal.
+        :param record: (dict) record from the journal
+        :return: None
+        """
+        operation = record['operation']
+        if operation == 'add':
+            if (self._get_recorded_flashcard(record['id']) is None
+                    and self.get_flashcard(record['english_word']) is None):
+                flashcard = Flashcard(record['english_word'], '/'.join(record['polish_words']), record['definition'],
+                                      record['example'])
+                flashcard.card_id = record['id']
+                self.next_card_id = max(self.next_card_id, flashcard.card_id + 1)
+                self.flashcards[record['stage'] - 1].add(flashcard)
+                self._index_flashcard(flashcard)
+        elif operation == 'schedule':
+            for key, interval, ease, due in record['schedules']:
+                flashcard = self._get_recorded_flashcard(key)
+                if flashcard is not None:
+                    flashcard.interval, flashcard.ease, flashcard.due = interval, ease, due
+        elif operation == 'stage':
+            for key in record.get('ids', record.get('english_words')):
+                flashcard = self._get_recorded_flashcard(key)
+                for stage in self.flashcards:
+                    if flashcard is not None and flashcard in stage:
+                        stage.remove(flashcard)
+                        self.flashcards[record['stage'] - 1].add(flashcard)
+                        break
+        else:
+            flashcard = self._get_recorded_flashcard(record.get('id', record.get('english_word')))
+            if flashcard is None:
+                return
+            if operation == 'set':
+                self._unindex_flashcard(flashcard)
+                setattr(flashcard, record['field'], record['value'])
+                self._index_flashcard(flashcard)
+            elif operation == 'rename':
+                if self.get_flashcard(record['new_word']) is None:
+                    self._unindex_flashcard(flashcard)
+                    flashcard.english_word = record['new_word']
+                    self._index_flashcard(flashcard)
+            elif operation == 'delete':
+                for stage in self.flashcards:
+                    if flashcard in stage:
+                        stage.remove(flashcard)
+                        self._unindex_flashcard(flashcard)
+
+    def _index_flashcard(self, flashcard):
+        """
+        Adds the flashcard to the english and polish indexes
+        :param flashcard: (Flashcard)
+        :return: None
+        """
+        self._index_english_word(flashcard)
+        for polish_word in flashcard.polish_words:
+            self._index_polish_word(flashcard, polish_word)
+
+    def _unindex_flashcard(self, flashcard):
+        """
+        Removes the flashcard from the english and polish indexes
+        :param flashcard: (Flashcard)
+        :return: None
+        """
+        self._unindex_english_word(flashcard)
+        for polish_word in flashcard.polish_words:
+            self._unindex_polish_word(flashcard, polish_word)
+
+    def _index_english_word(self, flashcard):
+        """
+        Adds the flashcard to the english index
+        :param flashcard: (Flashcard)
+        :return: None
+        """
+        if flashcard.english_word not in self._english_index:
+            self._english_index[flashcard.english_word] = flashcard
+            if self._trigram_index is not None:
+                self._trigram_index.add(flashcard.english_word)
+
+    def _unindex_english_word(self, flashcard):
+        """
+        Removes the flashcard from the english index
+        :param flashcard: (Flashcard)
+        :return: None
+        """
+        if self._english_index.get(flashcard.english_word) is flashcard:
+            del self._english_index[flashcard.english_word]
+            if self._trigram_index is not None:
+                self._trigram_index.remove(flashcard.english_word)
+
+    def _index_polish_word(self, flashcard, polish_word):
+        """
+        Adds the flashcard to the polish index of the word
+        :param flashcard: (Flashcard)
+        :param polish_word: (str) polish word of the flashcard
+        :return: None
+        """
+        flashcards = self._polish_index.get(polish_word)
+        if flashcards is None:
+            flashcards = self._polish_index[polish_word] = set()
+            if self._trigram_index is not None:
+                self._trigram_index.add(polish_word)
+        flashcards.add(flashcard)
+
+    def _unindex_polish_word(self, flashcard, polish_word):
+        """
+        Removes the flashcard from the polish index of the word
+        :param flashcard: (Flashcard)
+        :param polish_word: (str) polish word removed from the flashcard
+        :return: None
+        """
+        flashcards = self._polish_index.get(polish_word)
+        if flashcards is not None:
+            flashcards.discard(flashcard)
+            if not flashcards:
+                del self._polish_index[polish_word]
+                if self._trigram_index is not None:
+                    self._trigram_index.remove(polish_word)
+
+    @instrumented
+    def _append_to_journal(self, *records):
+        """
+        Appends records to the journal with a single write and compacts the journal when it gets too long
+        :param records: (dict)
+        :return: None
+        """
+        self.journal.write(''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in records))
+        self.journal.flush()
+        self.journal_length += len(records)
+        self._dirty.set()
+
+    def _save_in_background(self):
+        """
+        Compacts the journal into the data file when no changes were made for SAVE_DELAY seconds or the journal gets
+        too long, until the database is closed
+        :return: None
         """
-        return Flashcard(data['english_word'], data['polish_words'], data['definition'], data['example'])
+        while True:
+            self._dirty.wait()
+            while self._dirty.is_set() and self.journal_length < COMPACTION_THRESHOLD and not self._closing.is_set():
+                self._dirty.clear()
+                self._closing.wait(SAVE_DELAY)
+            if self._closing.is_set():
+                return
+            self._dirty.clear()
+            if self.journal_length:
+                try:
+                    self.save_data()
+                except OSError:  # The changes are still in the journal, they are saved after the next change
+                    pass
 
-    def move_to_higher_stage(self, list_of_indexes, originate_stage):
+    def close(self):
         """
-        :param list_of_indexes: list of indexes in one of the stages list
+        Stops the background writer, saves all the changes to the data file and closes the journal and the snapshot,
+        texts of the flashcards read lazily from the snapshot cannot be read afterwards
+        :return: None
+        """
+        self._closing.set()
+        self._dirty.set()
+        self._writer.join()
+        if self.journal_length:
+            self.save_data()
+        with self._lock:
+            self.journal.close()
+            if self.snapshot_texts is not None:
+                self.snapshot_texts.close()
+
+    def _journal_flashcard_field(self, flashcard, field):
+        """
+        :param flashcard: (Flashcard)
+        :param field: (str) name of the changed attribute of the flashcard
+        :return: None
+        """
+        self._append_to_journal({'operation': 'set', 'id': flashcard.card_id, 'field': field,
+                                 'value': getattr(flashcard, field)})
+
+    @instrumented
+    @_synchronized
+    def move_to_higher_stage(self, list_of_ids, originate_stage):
+        """
+        :param list_of_ids: list of ids of flashcards in the originate stage
         :param originate_stage: (int)
         :return: None
         """
-        list_of_indexes.sort(reverse=True)
-        for i in list_of_indexes:
-            if originate_stage == 1:
-                self.second_stage_flashcards.append(self.first_stage_flashcards.pop(i))
-            else:
-                self.third_stage_flashcards.append(self.second_stage_flashcards.pop(i))
+        moved = self.flashcards[originate_stage - 1].move_to(list_of_ids, self.flashcards[originate_stage])
+        if originate_stage == 2:
+            for flashcard in moved:
+                self.scheduler.add(flashcard)
+        if moved:
+            self._append_to_journal({'operation': 'stage', 'ids': [f.card_id for f in moved],
+                                     'stage': originate_stage + 1})
 
-    def move_to_first_stage_from_third_stage(self, list_of_indexes):
+    @instrumented
+    @_synchronized
+    def move_to_first_stage_from_third_stage(self, list_of_ids):
         """
-        :param list_of_indexes: list of indexes of third stage flashcards
+        :param list_of_ids: list of ids of third stage flashcards
         :return: None
         """
-        list_of_indexes.sort(reverse=True)
-        for i in list_of_indexes:
-            self.first_stage_flashcards.append(self.third_stage_flashcards.pop(i))
+        moved = self.third_stage_flashcards.move_to(list_of_ids, self.first_stage_flashcards)
+        if moved:
+            self._append_to_journal({'operation': 'stage', 'ids': [f.card_id for f in moved], 'stage': 1})
+
+    @instrumented
+    def get_flashcards_to_revise(self, number_of_words):
+        """
+        :param number_of_words: (int)
+        :return: list of ids of the given number of third stage flashcards that should be revised first
+        """
+        return self.scheduler.get_next_flashcards(number_of_words)
 
+    @instrumented
+    @_synchronized
+    def update_review_schedules(self, qualities):
+        """
+        Updates review schedules of revised third stage flashcards
+        :param qualities: dictionary where a key is an id of a flashcard and a value is a quality of the answer from
+                          0 to 5
+        :return: None
+        """
+        schedules = []
+        for card_id, quality in qualities.items():
+            flashcard = self.third_stage_flashcards[card_id]
+            review(flashcard, quality)
+            self.scheduler.add(flashcard)
+            schedules.append([card_id, flashcard.interval, flashcard.ease, flashcard.due])
+        if schedules:
+            self._append_to_journal({'operation': 'schedule', 'schedules': schedules})
+
+    @instrumented
     def save_data(self):
-        data = []
-        for i, stage in enumerate(self.flashcards, start=1):
-            for flashcard in stage:
-                data.append([flashcard.english_word, '/'.join(flashcard.polish_words), flashcard.example,
-                             flashcard.definition, str(i)])
-        df = pd.DataFrame(data, columns=['english_word', 'polish_words', 'example', 'definition', 'stage'])
-        df.to_csv('data.csv', sep=';', index=False, encoding='utf8')
+        """
+        Rewrites the data file with all the flashcards and removes the saved records from the journal. The lock is held
+        only while the flashcards are copied and afterwards, so they can be changed while the files are written, those
+        changes stay in the journal. The data file is written to a temporary file first and then renamed, so it's never
+        corrupted, even if the app crashes while saving.
+        :return: None
+        """
+        with self._save_lock:
+            with self._lock:
+                flashcards = copy_flashcards(self.flashcards)
+                self.journal.flush()
+                journal_size = os.fstat(self.journal.fileno()).st_size
+                journal_length = self.journal_length
+            self._write_data_file(flashcards)
+            with self._lock:
+                self._remove_saved_records(journal_size)
+                self.journal_length -= journal_length
+
+    def _write_data_file(self, flashcards):
+        """
+        Writes the copied flashcards to the data file and to a new snapshot, without holding the lock
+        :param flashcards: (dict) copy of the flashcards returned by copy_flashcards
+        :return: None
+        """
+        read_lazy_texts(flashcards, self.snapshot_texts)
+        stages = chain.from_iterable(repeat(str(stage), length)
+                                     for stage, length in enumerate(flashcards['stage_lengths'], start=1))
+        temporary_path = self.file_path + '.tmp'
+        with open(temporary_path, 'w', encoding='utf8', newline='') as file:
+            writer = csv.writer(file, delimiter=';')
+            writer.writerow(['english_word', 'polish_words', 'example', 'definition', 'stage', 'id', 'interval', 'ease',
+                             'due'])
+            writer.writerows([english_word, '/'.join(polish_words), example, definition, stage, str(card_id),
+                              str(interval), str(ease), str(due)]
+                             for english_word, polish_words, example, definition, stage, card_id, interval, ease, due
+                             in zip(flashcards['english_words'], flashcards['polish_words'], flashcards['examples'],
+                                    flashcards['definitions'], stages, flashcards['card_ids'],
+                                    flashcards['intervals'], flashcards['eases'], flashcards['dues']))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary_path, self.file_path)
+        if self._write_snapshot(flashcards):
+            with self._lock:
+                load_texts_lazily(flashcards, self.snapshot_texts)
+
+    def _remove_saved_records(self, journal_size):
+        """
+        Removes the records saved to the data file from the start of the journal, the records appended while it was
+        written are kept
+        :param journal_size: (int) size of the journal in bytes when the flashcards were copied
+        :return: None
+        """
+        self.journal.close()  # An open file cannot be replaced on Windows
+        try:
+            with open(self.journal_path, 'rb') as file:
+                file.seek(journal_size)
+                records = file.read()
+            temporary_path = self.journal_path + '.tmp'
+            with open(temporary_path, 'wb') as file:
+                file.write(records)
+            os.replace(temporary_path, self.journal_path)
+        finally:  # If the journal wasn't replaced, the saved records are applied again, what has no effect
+            self.journal = open(self.journal_path, 'a', encoding='utf8')
 
+    @instrumented
     def add_new_word(self, word):
         """
-        Creates new Flashcard with the given word and saves it in self.first_stage_flashcards
+        Creates new Flashcard with the given word and saves it in self.first_stage_flashcards. The word is downloaded
+        and the user chooses its example without holding the lock, so the background writer isn't stopped meanwhile.
         :param word: (str)
         :return: -1 when an error occurred when creating new Flashcard, 0 when there is already Flashcard with
                  the given english word in the database or 1 when there were no errors
         """
-        if self.get_flashcard(word) is None:
-            try:
-                new_flashcard = Flashcard(word)
-            except FlashcardCreationError:
-                return -1
-            self.first_stage_flashcards.append(new_flashcard)
-            self.save_data()
-            return 1
-        else:
+        if self.get_flashcard(word) is not None:
             return 0
+        try:
+            new_flashcard = Flashcard(word)
+        except FlashcardCreationError:
+            return -1
+        with self._lock:
+            if self.get_flashcard(word) is not None:  # The word was added in the meantime
+                return 0
+            self._append_to_journal(self._add_new_flashcard(new_flashcard))
+        return 1
+
+    @instrumented
+    def add_new_words(self, words, max_workers=8):
+        """
+        Creates new Flashcards with the given words, downloading them concurrently without holding the lock, and saves
+        them in self.first_stage_flashcards with a single write to the journal
+        :param words: list of english words (str)
+        :param max_workers: (int) maximal number of words downloaded at the same time
+        :return: dictionary where a key is a word and a value is a result like the one returned by add_new_word
+        """
+        results = {word: 0 for word in words}
+        new_words = [word for word in results if self.get_flashcard(word) is None]
+        new_flashcards = create_flashcards_from_online_dictionary(new_words, max_workers)
+        records = []
+        with self._lock:
+            for word, new_flashcard in new_flashcards.items():
+                if new_flashcard is None:
+                    results[word] = -1
+                elif self.get_flashcard(word) is None:  # The word could have been added in the meantime
+                    records.append(self._add_new_flashcard(new_flashcard))
+                    results[word] = 1
+            if records:
+                self._append_to_journal(*records)
+        return results
 
     def get_flashcard(self, english_word):
         """
@@ -103,17 +576,36 @@ class Database:
         :param english_word: (str)
         :return: (Flashcard) if there is a Flashcard with given english_word in the database or None otherwise
         """
-        for flashcard in self.first_stage_flashcards:
-            if flashcard.english_word == english_word:
-                return flashcard
-        for flashcard in self.second_stage_flashcards:
-            if flashcard.english_word == english_word:
-                return flashcard
-        for flashcard in self.third_stage_flashcards:
-            if flashcard.english_word == english_word:
-                return flashcard
-        return None
+        return self._english_index.get(english_word)
 
+    def get_flashcards_with_polish_word(self, polish_word):
+        """
+        Returns Flashcards that have given polish word among their translations
+        :param polish_word: (str)
+        :return: list of Flashcards sorted by their english words
+        """
+        return sorted(self._polish_index.get(polish_word, ()), key=lambda flashcard: flashcard.english_word)
+
+    @instrumented
+    def find_similar_flashcards(self, word, number=5):
+        """
+        Returns Flashcards whose english word or one of polish words is the most similar to the given word, used when
+        there is no flashcard with a misspelt word
+        :param word: (str) english or polish word
+        :param number: (int) maximal number of returned flashcards
+        :return: list of Flashcards from the most similar
+        """
+        if self._trigram_index is None:
+            self._trigram_index = TrigramIndex(list(self._english_index) + list(self._polish_index))
+        flashcards = {}
+        for similar_word in self._trigram_index.find_similar(word, number):
+            if similar_word in self._english_index:
+                flashcards.setdefault(self._english_index[similar_word])
+            for flashcard in self.get_flashcards_with_polish_word(similar_word):
+                flashcards.setdefault(flashcard)
+        return list(flashcards)[:number]
+
+    @_synchronized
     def change_english_word(self, flashcard, new_word):
         """
         :param flashcard: (Flashcard)
@@ -121,12 +613,15 @@ class Database:
         :return: 1 if a change was successful or 0 otherwise
         """
         if self.get_flashcard(new_word) is None:  # If there is no flashcard with this english word
+            self._append_to_journal({'operation': 'rename', 'id': flashcard.card_id, 'new_word': new_word})
+            self._unindex_english_word(flashcard)
             flashcard.english_word = new_word
-            self.save_data()
+            self._index_english_word(flashcard)
             return 1
         else:
             return 0
 
+    @_synchronized
     def change_polish_word(self, flashcard, polish_word_index, new_word):
         """
         :param polish_word_index: (int) index of the word that will be changed
@@ -135,12 +630,19 @@ class Database:
         :return: 1 if a change was successful or 0 otherwise
         """
         if 0 <= polish_word_index < len(flashcard.polish_words):
-            flashcard.polish_words[polish_word_index] = new_word
-            self.save_data()
+            old_word = flashcard.polish_words[polish_word_index]
+            # Lists of polish words are replaced, not changed, so a copy of the flashcards made for saving can share them
+            flashcard.polish_words = flashcard.polish_words[:polish_word_index] + [new_word] \
+                + flashcard.polish_words[polish_word_index + 1:]
+            if old_word not in flashcard.polish_words:
+                self._unindex_polish_word(flashcard, old_word)
+            self._index_polish_word(flashcard, new_word)
+            self._journal_flashcard_field(flashcard, 'polish_words')
             return 1
         else:
             return 0
 
+    @_synchronized
     def add_polish_translation(self, flashcard, new_word):
         """
         :param flashcard: (Flashcard)
@@ -148,12 +650,14 @@ class Database:
         :return: 1 if an addition was successful or 0 otherwise
         """
         if new_word not in flashcard.polish_words:
-            flashcard.polish_words.append(new_word)
-            self.save_data()
+            flashcard.polish_words = flashcard.polish_words + [new_word]
+            self._index_polish_word(flashcard, new_word)
+            self._journal_flashcard_field(flashcard, 'polish_words')
             return 1
         else:
             return 0
 
+    @_synchronized
     def delete_polish_word(self, flashcard, polish_word_index):
         """
         :param polish_word_index: (int) index of the word that will be changed
@@ -161,12 +665,17 @@ class Database:
         :return: 1 if a deletion was successful or 0 otherwise
         """
         if 0 <= polish_word_index < len(flashcard.polish_words):
-            flashcard.polish_words[polish_word_index].pop(polish_word_index)
-            self.save_data()
+            old_word = flashcard.polish_words[polish_word_index]
+            flashcard.polish_words = flashcard.polish_words[:polish_word_index] \
+                + flashcard.polish_words[polish_word_index + 1:]
+            if old_word not in flashcard.polish_words:
+                self._unindex_polish_word(flashcard, old_word)
+            self._journal_flashcard_field(flashcard, 'polish_words')
             return 1
         else:
             return 0
 
+    @_synchronized
     def change_definition(self, flashcard, new_definition):
         """
         :param flashcard: (Flashcard)
@@ -174,8 +683,9 @@ class Database:
         :return: None
         """
         flashcard.definition = new_definition
-        self.save_data()
+        self._journal_flashcard_field(flashcard, 'definition')
 
+    @_synchronized
     def change_example(self, flashcard, new_example):
         """
         :param flashcard: (Flashcard)
@@ -183,8 +693,32 @@ class Database:
         :return: None
         """
         flashcard.example = new_example
-        self.save_data()
+        self._journal_flashcard_field(flashcard, 'example')
+
+    @instrumented
+    @_synchronized
+    def enrich_flashcards(self, entries):
+        """
+        Fills in missing definitions and examples of flashcards with a single write to the journal
+        :param entries: list of tuples with an english word (str), its definition (str) and its example (str), like
+                        the ones returned by EnrichmentQueue.get_results
+        :return: (int) number of enriched flashcards
+        """
+        records = []
+        for english_word, definition, example in entries:
+            flashcard = self.get_flashcard(english_word)
+            if flashcard is None:  # The flashcard was deleted or renamed in the meantime
+                continue
+            for field, text in (('definition', definition), ('example', example)):
+                if is_missing_text(getattr(flashcard, field)) and not is_missing_text(text):
+                    setattr(flashcard, field, text)
+                    records.append({'operation': 'set', 'id': flashcard.card_id, 'field': field, 'value': text})
+        if records:
+            self._append_to_journal(*records)
+        return len({record['id'] for record in records})
 
+    @instrumented
+    @_synchronized
     def delete_flashcard(self, flashcard):
         """
         :param flashcard: (Flashcard)
@@ -193,10 +727,12 @@ class Database:
         for stage in self.flashcards:
             if flashcard in stage:
                 stage.remove(flashcard)
-                self.save_data()
+                self._unindex_flashcard(flashcard)
+                self._append_to_journal({'operation': 'delete', 'id': flashcard.card_id})
                 return 1
         return 0
 
+    @_synchronized
     def add_flashcard(self, english_word, polish_word, definition, example):
         """
         Creates new Flashcard from given parameters and adds it to the database
@@ -204,8 +740,45 @@ class Database:
         :param polish_word: (str)
         :param definition: (str)
         :param example: (str)
-        :return: None
+        :return: 1 if an addition was successful or 0 when there is already Flashcard with the given english word
+        """
+        if self.get_flashcard(english_word) is not None:
+            return 0
+        self._append_to_journal(self._add_new_flashcard(Flashcard(english_word, polish_word, definition, example)))
+        return 1
+
+    @instrumented
+    @_synchronized
+    def add_flashcards(self, rows):
+        """
+        Creates new Flashcards from the rows and adds them to the database with a single write to the journal
+        :param rows: list of tuples with an english word, polish words separated by '/', a definition and an example
+                     (str)
+        :return: list of results (1 if a flashcard was added, 0 when there is already a Flashcard with its english word)
+        """
+        results = []
+        records = []
+        for english_word, polish_words, definition, example in rows:
+            if self.get_flashcard(english_word) is not None:
+                results.append(0)
+            else:
+                records.append(self._add_new_flashcard(Flashcard(english_word, polish_words, definition, example)))
+                results.append(1)
+        if records:
+            self._append_to_journal(*records)
+        return results
+
+    def _add_new_flashcard(self, flashcard):
+        """
+        Gives the flashcard a new id and adds it to the first stage
+        :param flashcard: (Flashcard)
+        :return: (dict) journal record of the addition
         """
-        self.flashcards[0].append(Flashcard(english_word, polish_word, definition, example))
-        self.save_data()
+        flashcard.card_id = self.next_card_id
+        self.next_card_id += 1
+        self.first_stage_flashcards.add(flashcard)
+        self._index_flashcard(flashcard)
+        return {'operation': 'add', 'id': flashcard.card_id, 'english_word': flashcard.english_word,
+                'polish_words': flashcard.polish_words, 'definition': flashcard.definition,
+                'example': flashcard.example, 'stage': 1}
 
@@ -0,0 +1,77 @@
+import threading
+import sqlite3
+import json
+import time
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS entries (
+    english_word TEXT PRIMARY KEY,
+    polish_words TEXT NOT NULL,
+    definition TEXT NOT NULL,
+    examples TEXT NOT NULL,
+    downloaded_at REAL NOT NULL,
+    used_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_used_at ON entries (used_at);
+'''
+
+
+class DictionaryCache:
+    """
+    Entries of the online dictionary saved in a SQLite file. When there are more than max_entries entries, the least
+    recently used ones are removed. Entries older than ttl seconds are downloaded again, unless the cache is offline.
+    """
+    def __init__(self, file_path, max_entries=10000, ttl=30 * 24 * 60 * 60, offline=False):
+        """
+        :param file_path: (str) path to the cache file
+        :param max_entries: (int) maximal number of saved entries
+        :param ttl: (float) number of seconds after which an entry expires
+        :param offline: (bool) True if words should be taken only from the cache
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.offline = offline
+        # The cache is shared by the threads importing many words at once
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(file_path, check_same_thread=False)
+        self._connection.executescript(SCHEMA)
+        self._size = self._connection.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+
+    def get(self, english_word):
+        """
+        :param english_word: (str)
+        :return: (tuple) entry like the one returned by get_dictionary_entry or None if there is no valid entry
+        """
+        now = time.time()
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                'SELECT polish_words, definition, examples, downloaded_at FROM entries WHERE english_word = ?',
+                (english_word,)).fetchone()
+            if row is None or (not self.offline and now - row[3] > self.ttl):
+                return None
+            self._connection.execute('UPDATE entries SET used_at = ? WHERE english_word = ?', (now, english_word))
+        return json.loads(row[0]), row[1], json.loads(row[2])
+
+    def put(self, english_word, entry):
+        """
+        Saves the entry and removes the least recently used entries if the cache is full
+        :param english_word: (str)
+        :param entry: (tuple) list of polish words (str), definition (str) and list of examples (str)
+        :return: None
+        """
+        polish_words, definition, examples = entry
+        now = time.time()
+        with self._lock, self._connection:
+            if self._connection.execute('SELECT 1 FROM entries WHERE english_word = ?',
+                                        (english_word,)).fetchone() is None:
+                self._size += 1
+            self._connection.execute(
+                'INSERT OR REPLACE INTO entries (english_word, polish_words, definition, examples, downloaded_at, '
+                'used_at) VALUES (?, ?, ?, ?, ?, ?)',
+                (english_word, json.dumps(polish_words, ensure_ascii=False), definition,
+                 json.dumps(examples, ensure_ascii=False), now, now))
+            if self._size > self.max_entries:
+                self._size -= self._connection.execute(
+                    'DELETE FROM entries WHERE english_word IN '
+                    '(SELECT english_word FROM entries ORDER BY used_at LIMIT ?)',
+                    (self._size - self.max_entries,)).rowcount
@@ -0,0 +1,133 @@
+from html.parser import HTMLParser
+from instrumentation import instrumented
+
+NUMBER_OF_EXAMPLES = 3
+# Tags without an end tag, they are never open
+VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'keygen', 'link', 'menuitem', 'meta', 'param',
+             'source', 'track', 'wbr', 'basefont', 'bgsound', 'command', 'frame', 'image', 'isindex', 'nextid',
+             'spacer'}
+# Tags whose content isn't a part of the text of an element, like in BeautifulSoup. Their content cannot contain other
+# tags, so it's always inside the last open tag.
+IGNORED_TAGS = {'script', 'style'}
+
+
+class _ParsingFinished(Exception):
+    pass
+
+
+class _Element:
+    """
+    Element of the page whose text is being collected
+    """
+    __slots__ = ('field', 'index', 'position', 'parts')
+
+    def __init__(self, field, index, position):
+        self.field = field
+        self.index = index  # Index of an example in the list of examples
+        self.position = position  # Position of the element in the stack of open tags
+        self.parts = []
+
+
+class DictionaryPageParser(HTMLParser):
+    """
+    Collects texts of only those elements of a dictionary page that are used by flashcards: the first span.dtrans-se
+    (polish translations), the first div.db (definition) and the first 3 div.dexamp (examples). The texts are the same
+    as .text of these elements in BeautifulSoup, also on broken pages, because an end tag closes all the tags opened
+    after the matching start tag, like in BeautifulSoup. Parsing stops as soon as all of them are found.
+    """
+    def __init__(self):
+        super().__init__()
+        self._open_tags = []
+        self.polish_words = None
+        self.definition = None
+        self.examples = []  # Examples that are still being collected are None
+        self._open_elements = []
+
+    def _is_finished(self):
+        return self.polish_words is not None and self.definition is not None \
+            and len(self.examples) == NUMBER_OF_EXAMPLES and None not in self.examples
+
+    def _start_element(self, tag, attrs):
+        """
+        :param tag: (str)
+        :param attrs: list of (name, value) pairs of the attributes of the tag
+        :return: (str) name of the field collected from the element or None if the element isn't used
+        """
+        if tag != 'span' and tag != 'div':
+            return None
+        classes = (dict(attrs).get('class') or '').split()
+        if tag == 'span':
+            if 'dtrans-se' in classes and self.polish_words is None \
+                    and all(element.field != 'polish_words' for element in self._open_elements):
+                return 'polish_words'
+        elif 'db' in classes and self.definition is None \
+                and all(element.field != 'definition' for element in self._open_elements):
+            return 'definition'
+        elif 'dexamp' in classes and len(self.examples) < NUMBER_OF_EXAMPLES:
+            self.examples.append(None)
+            return 'examples'
+        return None
+
+    def _end_element(self, element):
+        """
+        Saves the text of the element
+        :param element: (_Element)
+        :return: None
+        """
+        text = ''.join(element.parts).strip()
+        if element.field == 'examples':
+            self.examples[element.index] = text
+        else:
+            setattr(self, element.field, text)
+
+    def handle_starttag(self, tag, attrs):
+        if tag in VOID_TAGS:
+            return
+        field = self._start_element(tag, attrs)
+        if field is not None:
+            self._open_elements.append(_Element(field, len(self.examples) - 1, len(self._open_tags)))
+        self._open_tags.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        for position in range(len(self._open_tags) - 1, -1, -1):
+            if self._open_tags[position] == tag:
+                break
+        else:  # End tag without a start tag is ignored
+            return
+        del self._open_tags[position:]
+        while self._open_elements and self._open_elements[-1].position >= position:
+            self._end_element(self._open_elements.pop())
+        if self._is_finished():
+            raise _ParsingFinished
+
+    def handle_data(self, data):
+        if self._open_tags and self._open_tags[-1] in IGNORED_TAGS:
+            return
+        for element in self._open_elements:
+            element.parts.append(data)
+
+    def close(self):
+        super().close()
+        while self._open_elements:  # Elements that weren't closed end with the page
+            self._end_element(self._open_elements.pop())
+
+
+@instrumented
+def parse_dictionary_page(source):
+    """
+    :param source: (str) html of a page of the online dictionary
+    :return: (tuple) text of polish translations (str) or None, definition (str) or None and list of up to
+             3 examples (str)
+    """
+    parser = DictionaryPageParser()
+    try:
+        parser.feed(source)
+        parser.close()
+    except _ParsingFinished:
+        pass
+    return parser.polish_words, parser.definition, parser.examples
@@ -0,0 +1,107 @@
+from flashcard import get_dictionary_entry, censor_example
+import threading
+import queue
+
+# Text saved instead of an example when there is none
+NO_EXAMPLE = '---'
+# Time in seconds given to the worker to finish downloading a word when the queue is closed
+CLOSE_TIMEOUT = 5
+
+
+def is_missing_text(text):
+    """
+    :param text: (str) definition or example of a flashcard
+    :return: (bool) True if the text is empty or is a placeholder
+    """
+    return not text.strip() or text == NO_EXAMPLE
+
+
+def needs_enrichment(flashcard):
+    """
+    :param flashcard: (Flashcard)
+    :return: (bool) True if the flashcard has no definition or no example
+    """
+    return is_missing_text(flashcard.definition) or is_missing_text(flashcard.example)
+
+
+class EnrichmentQueue:
+    """
+    Downloads missing definitions and examples of flashcards in a background thread, so a user can keep learning
+    in the meantime. Downloaded entries wait in the queue until the main thread takes them with get_results and merges
+    them into the database, because the database isn't thread-safe.
+    """
+    def __init__(self, get_entry=get_dictionary_entry):
+        """
+        :param get_entry: function that takes an english word and a requests.Session and returns an entry like
+                          get_dictionary_entry
+        """
+        self.get_entry = get_entry
+        self._words = queue.Queue()
+        self._results = queue.Queue()
+        self._queued_words = set()  # Every word is downloaded only once, even if it cannot be found
+        self._thread = None
+
+    def put(self, english_word):
+        """
+        Adds the word to the queue and starts the worker if it isn't running yet
+        :param english_word: (str)
+        :return: None
+        """
+        if english_word in self._queued_words:
+            return
+        self._queued_words.add(english_word)
+        self._words.put(english_word)
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._work, daemon=True)
+            self._thread.start()
+
+    def _work(self):
+        """
+        Downloads words from the queue until None is taken from it
+        :return: None
+        """
+        try:
+            import requests
+            session = requests.Session()
+        except ImportError:  # Words can still be taken from the dictionary cache
+            session = None
+        while True:
+            english_word = self._words.get()
+            if english_word is None:
+                break
+            try:
+                _, definition, examples = self.get_entry(english_word, session)
+            except Exception:  # The word is left as it is, it can still be modified manually
+                continue
+            example = censor_example(examples[0], english_word) if examples else NO_EXAMPLE
+            self._results.put((english_word, definition, example))
+        if session is not None:
+            session.close()
+
+    def get_results(self):
+        """
+        Takes all the entries downloaded so far without waiting for the others
+        :return: list of tuples with an english word (str), its definition (str) and its censored example (str)
+        """
+        results = []
+        while True:
+            try:
+                results.append(self._results.get_nowait())
+            except queue.Empty:
+                return results
+
+    def close(self):
+        """
+        Stops the worker after the word it's downloading, words left in the queue are skipped
+        :return: None
+        """
+        if self._thread is None:
+            return
+        while True:
+            try:
+                self._words.get_nowait()
+            except queue.Empty:
+                break
+        self._words.put(None)
+        self._thread.join(CLOSE_TIMEOUT)
+        self._thread = None
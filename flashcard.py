@@ -1,8 +1,25 @@
 from flashcard_creation_error import FlashcardCreationError
-from bs4 import BeautifulSoup
-import requests
+from instrumentation import instrumented
+import sys
 import os
 
+# Modules used for downloading words (requests, concurrent.futures, dictionary_page_parser) are imported only when
+# a word is downloaded, so they don't slow down the start of the app
+
+DICTIONARY_URL = 'https://dictionary.cambridge.org/dictionary/english-polish/'
+HEADERS = {"User-Agent": "Mozilla/5.0"}
+# (DictionaryCache) cache checked before downloading a word, there is no cache when None
+dictionary_cache = None
+
+
+def use_dictionary_cache(cache):
+    """
+    :param cache: (DictionaryCache) cache used by all the flashcards downloaded from now on
+    :return: None
+    """
+    global dictionary_cache
+    dictionary_cache = cache
+
 
 def _split_polish_words_with_comma(polish_words):
     """
@@ -12,8 +29,96 @@ def _split_polish_words_with_comma(polish_words):
     return polish_words.replace(', ', ';').split(';')
 
 
+@instrumented
+def get_dictionary_entry(english_word, session=None):
+    """
+    Gets polish words, definition and examples of the word from dictionary_cache or from online dictionary
+    :param english_word: (str)
+    :param session: (requests.Session) session used to send the request, by default a new connection is opened
+    :return: (tuple) list of polish words (str), definition (str) and list of up to 3 examples (str)
+    """
+    from dictionary_page_parser import parse_dictionary_page
+    if dictionary_cache is not None:
+        entry = dictionary_cache.get(english_word)
+        if entry is not None:
+            return entry
+        if dictionary_cache.offline:
+            raise FlashcardCreationError(f'Error! Word {english_word} is not in the dictionary cache.')
+    if session is None:
+        import requests
+        session = requests
+    source = session.get(DICTIONARY_URL + english_word, headers=HEADERS).text
+    polish_words, definition, examples = parse_dictionary_page(source)
+    if polish_words is None or definition is None:
+        raise FlashcardCreationError(f'Error! Word {english_word} is not in the online dictionary.')
+    polish_words = _split_polish_words_with_comma(polish_words)
+    if dictionary_cache is not None:
+        dictionary_cache.put(english_word, (polish_words, definition, examples))
+    return polish_words, definition, examples
+
+
+def censor_example(example, english_word):
+    """
+    :param example: (str) example of a sentence containing the english word
+    :param english_word: (str)
+    :return: (str) example with the english word replaced with ***
+    """
+    return example.replace(english_word, '***').replace(english_word[:-1], '***')
+
+
+def _create_flashcard_with_first_example(english_word, session):
+    """
+    Creates a flashcard from online dictionary without asking the user to choose an example
+    :param english_word: (str)
+    :param session: (requests.Session)
+    :return: (Flashcard) or None if the flashcard cannot be created
+    """
+    try:
+        polish_words, definition, examples = get_dictionary_entry(english_word, session)
+    except Exception:
+        return None
+    flashcard = Flashcard(english_word, '/'.join(polish_words), definition, examples[0] if examples else '---')
+    if examples:
+        flashcard._censor_example()
+    return flashcard
+
+
+def create_flashcards_from_online_dictionary(english_words, max_workers=8):
+    """
+    Creates flashcards of many words at once. The words are downloaded and parsed concurrently, reusing connections
+    from a shared pool. The first example of each word is saved.
+    :param english_words: list of english words (str)
+    :param max_workers: (int) maximal number of words downloaded at the same time
+    :return: dictionary where a key is an english word and a value is its Flashcard or None if it cannot be created
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from requests.adapters import HTTPAdapter
+    import requests
+    with requests.Session() as session:
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        with ThreadPoolExecutor(max_workers) as executor:
+            flashcards = executor.map(lambda english_word: _create_flashcard_with_first_example(english_word, session),
+                                      english_words)
+            return dict(zip(english_words, flashcards))
+
+
 class Flashcard:
+    # Flashcards don't have __dict__, what saves a lot of memory in big databases
+    __slots__ = ('card_id', 'english_word', 'polish_words', '_definition', '_example', '_texts', 'interval', 'ease',
+                 'due')
+
     def __init__(self, new_word, polish_words=None, definition=None, example=None):
+        self.card_id = None  # Given by the Database
+        # Definition and example of a flashcard loaded from a snapshot are None, they are read from _texts when needed
+        self._definition = None
+        self._example = None
+        self._texts = None
+        # Review schedule: number of days between revisions, how easy the word is and when to revise it (timestamp)
+        self.interval = 0
+        self.ease = 2.5
+        self.due = 0.0
         self.english_word = new_word
         if polish_words is None:  # creating a flashcard with getting data from online dictionary
             try:
@@ -23,24 +128,40 @@ class Flashcard:
 
         else:
             self._load_polish_words(polish_words)
-            self.definition = definition
+            # The same definitions are often shared by many flashcards, so only one copy of each is kept
+            self.definition = sys.intern(definition)
             self.example = example
 
+    @property
+    def definition(self):
+        # Read once, because a background save can switch the flashcard to lazy loading between two reads
+        definition = self._definition
+        if definition is None:
+            return self._texts.get_definition(self.card_id)
+        return definition
+
+    @definition.setter
+    def definition(self, definition):
+        self._definition = definition
+
+    @property
+    def example(self):
+        example = self._example
+        if example is None:
+            return self._texts.get_example(self.card_id)
+        return example
+
+    @example.setter
+    def example(self, example):
+        self._example = example
+
+    @instrumented
     def _get_data_from_online_dictionary(self):
         """
         Gets polish_words, definition and examples from online dictionary and stores them in corresponding attributes
         :return: None
         """
-        source = requests.get('https://dictionary.cambridge.org/dictionary/english-polish/' + self.english_word,
-                              headers={"User-Agent": "Mozilla/5.0"}).text
-        soup = BeautifulSoup(source, 'html.parser')
-        self.polish_words = _split_polish_words_with_comma(soup.find('span', class_='dtrans-se').text.strip())
-        self.definition = soup.find('div', class_='db').text.strip()
-        examples = []
-        for i, example in enumerate(soup.find_all('div', class_='dexamp')):
-            if i == 3:
-                break
-            examples.append(example.text.strip())
+        self.polish_words, self.definition, examples = get_dictionary_entry(self.english_word)
 
         self.example = ''
         if len(examples) == 0:
@@ -56,8 +177,7 @@ class Flashcard:
         Replaces self.english_word in example with *** and stores it in self.example
         :return: None
         """
-        self.example = self.example.replace(self.english_word, '***')
-        self.example = self.example.replace(self.english_word[:-1], '***')
+        self.example = censor_example(self.example, self.english_word)
 
     def _choose_example(self, examples):
         """
@@ -85,11 +205,27 @@ class Flashcard:
 
     def _load_polish_words(self, polish_words):
         """
-        Splits polish_words using a '/' sign and saves them to self.polish_words as a list of strings
+        Splits polish_words using a '/' sign and saves them to self.polish_words as a list of interned strings
         :param polish_words: (str)
         :return: nothing
         """
-        self.polish_words = polish_words.split('/')
+        self.polish_words = [sys.intern(polish_word) for polish_word in polish_words.split('/')]
+
+    def get_texts_in_memory(self):
+        """
+        :return: (tuple) definition and example of the flashcard, None instead of the ones that are read from a snapshot
+        """
+        return self._definition, self._example
+
+    def load_texts_lazily(self, texts):
+        """
+        Forgets the definition and the example, from now on they are read from texts when needed
+        :param texts: (SnapshotTexts) texts of a snapshot with this flashcard
+        :return: nothing
+        """
+        self._texts = texts
+        self._definition = None
+        self._example = None
 
     def get_flashcard_summary(self):
         """
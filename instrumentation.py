@@ -0,0 +1,90 @@
+from functools import wraps
+import threading
+import time
+import json
+import os
+
+# Instrumentation is enabled by setting this environment variable to 1 before the app is started. When it's disabled,
+# functions aren't wrapped at all, so there is no overhead.
+ENVIRONMENT_VARIABLE = 'FLASHCARDS_INSTRUMENTATION'
+ENABLED = os.environ.get(ENVIRONMENT_VARIABLE) == '1'
+# Upper bounds of the buckets of latency histograms in microseconds, the last bucket has no bound
+BUCKET_BOUNDS = [10 ** exponent for exponent in range(1, 8)]
+
+_lock = threading.Lock()  # Dictionary entries are downloaded by many threads at once
+_statistics = {}  # Names of operations and their statistics
+
+
+def _record(name, duration):
+    """
+    :param name: (str) name of an operation
+    :param duration: (float) duration of a call of the operation in seconds
+    :return: None
+    """
+    microseconds = duration * 1e6
+    bucket = next((i for i, bound in enumerate(BUCKET_BOUNDS) if microseconds < bound), len(BUCKET_BOUNDS))
+    with _lock:
+        statistics = _statistics.get(name)
+        if statistics is None:
+            statistics = _statistics[name] = {'count': 0, 'total': 0.0, 'max': 0.0,
+                                              'histogram': [0] * (len(BUCKET_BOUNDS) + 1)}
+        statistics['count'] += 1
+        statistics['total'] += duration
+        statistics['max'] = max(statistics['max'], duration)
+        statistics['histogram'][bucket] += 1
+
+
+def instrumented(function):
+    """
+    Decorator that records the number of calls and the latencies of the function if instrumentation is enabled
+    :param function: function to be instrumented
+    :return: function
+    """
+    if not ENABLED:
+        return function
+    name = f'{function.__module__}.{function.__qualname__}'
+
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            _record(name, time.perf_counter() - start)
+    return wrapper
+
+
+def get_statistics():
+    """
+    :return: (dict) names of operations and dicts with the number of calls, the total and maximal time in seconds and
+             the histogram of latencies (numbers of calls in the buckets of BUCKET_BOUNDS)
+    """
+    with _lock:
+        return {name: dict(statistics, histogram=list(statistics['histogram']))
+                for name, statistics in _statistics.items()}
+
+
+def export_statistics(file_path):
+    """
+    Saves the statistics with the bounds of the buckets to a json file
+    :param file_path: (str)
+    :return: None
+    """
+    with open(file_path, 'w', encoding='utf8') as file:
+        json.dump({'bucket_bounds_us': BUCKET_BOUNDS, 'operations': get_statistics()}, file, indent=2)
+
+
+def format_statistics():
+    """
+    :return: list of lines (str) with the statistics of operations from the slowest in total
+    """
+    labels = [f'<{bound // 1000}ms' if bound >= 1000 else f'<{bound}us' for bound in BUCKET_BOUNDS]
+    labels.append(f'>={BUCKET_BOUNDS[-1] // 1000}ms')
+    lines = []
+    for name, statistics in sorted(get_statistics().items(), key=lambda item: -item[1]['total']):
+        lines.append(f'{name}: {statistics["count"]} calls, {statistics["total"] * 1e3:.1f}ms in total, '
+                     f'{statistics["total"] / statistics["count"] * 1e3:.2f}ms on average, '
+                     f'{statistics["max"] * 1e3:.2f}ms max')
+        lines.append('  ' + ', '.join(f'{label}: {count}' for label, count
+                                      in zip(labels, statistics['histogram']) if count))
+    return lines
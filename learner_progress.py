@@ -0,0 +1,231 @@
+from scheduler import review
+from types import SimpleNamespace
+from array import array
+import heapq
+import struct
+import os
+
+MAGIC = b'FLASHLRN'
+VERSION = 1
+# Magic, version and number of flashcards with the learner's own progress. The header is followed by arrays of their
+# ids, stages, intervals, eases and due times.
+HEADER = struct.Struct('<8sIQ')
+# Review schedule of the flashcards that the learner hasn't revised yet, the same as the one of a new Flashcard
+INITIAL_INTERVAL = 0
+INITIAL_EASE = 2.5
+INITIAL_DUE = 0.0
+
+
+class LearnerStage:
+    """
+    Flashcards in one stage of a learner, has the same interface as Stage
+    """
+    def __init__(self, progress, stage):
+        """
+        :param progress: (LearnerProgress)
+        :param stage: (int) 1, 2 or 3
+        """
+        self._progress = progress
+        self._stage = stage
+
+    def __len__(self):
+        return len(self.ids())
+
+    def __iter__(self):
+        return (self[card_id] for card_id in self.ids())
+
+    def __contains__(self, flashcard):
+        return self._progress.get_stage(flashcard.card_id) == self._stage
+
+    def __getitem__(self, card_id):
+        if self._progress.get_stage(card_id) != self._stage:
+            raise KeyError(card_id)
+        return self._progress.get_flashcard(card_id)
+
+    def ids(self):
+        """
+        :return: list of ids of the flashcards in the stage of the learner
+        """
+        return self._progress.get_ids(self._stage)
+
+
+class LearnerProgress:
+    """
+    Progress of one learner over a deck shared by many learners. Only the contents of the flashcards are shared, the
+    stages and review schedules saved in the deck belong to its owner. Flashcards that the learner hasn't learned yet
+    are in the first stage with the initial review schedule, only the stages and schedules that the learner changed are
+    kept in compact arrays, so the memory used by a learner is proportional to the number of words they learned, not to
+    the size of the deck. It has the same interface as Database for LearningSession.
+    """
+    def __init__(self, database):
+        """
+        :param database: (Database or SqliteDatabase) shared deck
+        """
+        self.database = database
+        self._positions = {}  # Ids of flashcards with the learner's own progress and their positions in the arrays
+        self._stages = array('b')
+        self._intervals = array('q')
+        self._eases = array('d')
+        self._dues = array('d')
+        self.first_stage_flashcards, self.second_stage_flashcards, self.third_stage_flashcards \
+            = (LearnerStage(self, stage) for stage in (1, 2, 3))
+        self.flashcards = [self.first_stage_flashcards, self.second_stage_flashcards, self.third_stage_flashcards]
+
+    def __len__(self):
+        return len(self._positions)
+
+    def _find_flashcard(self, card_id):
+        """
+        :param card_id: (int)
+        :return: (Flashcard) flashcard of the deck with the id or None if it was deleted
+        """
+        for flashcards in self.database.flashcards:
+            try:
+                return flashcards[card_id]
+            except KeyError:
+                pass
+        return None
+
+    def get_flashcard(self, card_id):
+        """
+        :param card_id: (int)
+        :return: (Flashcard) flashcard of the deck with the id
+        """
+        flashcard = self._find_flashcard(card_id)
+        if flashcard is None:
+            raise KeyError(card_id)
+        return flashcard
+
+    def get_stage(self, card_id):
+        """
+        :param card_id: (int)
+        :return: (int) stage of the flashcard for the learner or None if there is no flashcard with the id
+        """
+        if self._find_flashcard(card_id) is None:
+            return None
+        position = self._positions.get(card_id)
+        if position is None:
+            return 1
+        return self._stages[position]
+
+    def get_ids(self, stage):
+        """
+        :param stage: (int) 1, 2 or 3
+        :return: list of ids of the flashcards in the stage of the learner
+        """
+        if stage != 1:
+            return [card_id for card_id, position in self._positions.items()
+                    if self._stages[position] == stage and self._find_flashcard(card_id) is not None]
+        # All the flashcards of the deck except the ones that the learner moved to another stage
+        moved_ids = {card_id for card_id, position in self._positions.items() if self._stages[position] != 1}
+        return [card_id for flashcards in self.database.flashcards for card_id in flashcards.ids()
+                if card_id not in moved_ids]
+
+    def get_schedule(self, card_id):
+        """
+        :param card_id: (int) id of a flashcard in the deck
+        :return: (SimpleNamespace) interval, ease and due time of the flashcard for the learner
+        """
+        position = self._positions.get(card_id)
+        if position is None:
+            self.get_flashcard(card_id)
+            return SimpleNamespace(interval=INITIAL_INTERVAL, ease=INITIAL_EASE, due=INITIAL_DUE)
+        return SimpleNamespace(interval=self._intervals[position], ease=self._eases[position],
+                               due=self._dues[position])
+
+    def _get_position(self, card_id):
+        """
+        Adds the flashcard in the first stage with the initial review schedule to the learner's own progress, if the
+        learner hasn't changed it yet
+        :param card_id: (int) id of a flashcard in the deck
+        :return: (int) position of the progress of the flashcard in the arrays
+        """
+        position = self._positions.get(card_id)
+        if position is None:
+            position = self._positions[card_id] = len(self._stages)
+            self._stages.append(1)
+            self._intervals.append(INITIAL_INTERVAL)
+            self._eases.append(INITIAL_EASE)
+            self._dues.append(INITIAL_DUE)
+        return position
+
+    def move_to_higher_stage(self, list_of_ids, originate_stage):
+        """
+        :param list_of_ids: list of ids of flashcards in the originate stage of the learner
+        :param originate_stage: (int) 1 or 2
+        :return: None
+        """
+        for card_id in list_of_ids:
+            self._stages[self._get_position(card_id)] = originate_stage + 1
+
+    def move_to_first_stage_from_third_stage(self, list_of_ids):
+        """
+        :param list_of_ids: list of ids of flashcards in the third stage of the learner
+        :return: None
+        """
+        for card_id in list_of_ids:
+            self._stages[self._get_position(card_id)] = 1
+
+    def get_flashcards_to_revise(self, number_of_words):
+        """
+        :param number_of_words: (int)
+        :return: list of ids of the given number of third stage flashcards of the learner that should be revised first
+        """
+        # Only flashcards that the learner moved have their own progress, so only they can be in the third stage
+        candidates = [(self._dues[position], card_id) for card_id, position in self._positions.items()
+                      if self._stages[position] == 3 and self._find_flashcard(card_id) is not None]
+        return [card_id for _, card_id in heapq.nsmallest(number_of_words, candidates)]
+
+    def update_review_schedules(self, qualities):
+        """
+        Updates review schedules of revised third stage flashcards of the learner
+        :param qualities: dictionary where a key is an id of a flashcard and a value is a quality of the answer from
+                          0 to 5
+        :return: None
+        """
+        for card_id, quality in qualities.items():
+            schedule = self.get_schedule(card_id)
+            review(schedule, quality)
+            position = self._get_position(card_id)
+            self._intervals[position], self._eases[position], self._dues[position] \
+                = schedule.interval, schedule.ease, schedule.due
+
+    def save(self, file_path):
+        """
+        Saves the learner's own progress, first to a temporary file, so the previous progress is never corrupted
+        :param file_path: (str)
+        :return: None
+        """
+        temporary_path = file_path + '.tmp'
+        with open(temporary_path, 'wb') as file:
+            file.writelines([HEADER.pack(MAGIC, VERSION, len(self._positions)),
+                             array('q', self._positions).tobytes(), self._stages.tobytes(),
+                             self._intervals.tobytes(), self._eases.tobytes(), self._dues.tobytes()])
+        os.replace(temporary_path, file_path)
+
+
+def load_learner_progress(database, file_path):
+    """
+    :param database: (Database or SqliteDatabase) deck of the learner
+    :param file_path: (str) file saved by LearnerProgress.save
+    :return: (LearnerProgress) progress from the file or a new progress if there is no valid file
+    """
+    progress = LearnerProgress(database)
+    try:
+        with open(file_path, 'rb') as file:
+            data = file.read()
+        magic, version, number_of_flashcards = HEADER.unpack_from(data)
+    except (OSError, struct.error):
+        return progress
+    arrays = [array(typecode) for typecode in 'qbqdd']
+    if magic != MAGIC or version != VERSION \
+            or len(data) != HEADER.size + number_of_flashcards * sum(values.itemsize for values in arrays):
+        return progress
+    offset = HEADER.size
+    for values in arrays:
+        size = values.itemsize * number_of_flashcards
+        values.frombytes(data[offset:offset + size])
+        offset += size
+    card_ids, progress._stages, progress._intervals, progress._eases, progress._dues = arrays
+    progress._positions = {card_id: position for position, card_id in enumerate(card_ids)}
+    return progress
@@ -0,0 +1,190 @@
+from answer_matcher import AnswerMatcher, WRONG
+from score_tracker import ScoreTracker
+from review_log import ENGLISH_TO_POLISH, POLISH_TO_ENGLISH
+import random
+import time
+
+# Modes of a session: translating english words of the first stage, polish words of the second stage or revising
+# english words of the third stage
+LEARNING_ENGLISH = 'english'
+LEARNING_POLISH = 'polish'
+REVISING = 'revising'
+MODES = (LEARNING_ENGLISH, LEARNING_POLISH, REVISING)
+# Answers that ask for a hint instead: first letters of the correct answer, an example sentence and a definition
+LETTERS_HINT = 'l'
+EXAMPLE_HINT = 's'
+DEFINITION_HINT = 'd'
+# Flags of the hints used for a word, saved in the review log
+HINT_FLAGS = {LETTERS_HINT: 1, EXAMPLE_HINT: 2, DEFINITION_HINT: 4}
+# Number of rounds in which all the words are tested, afterwards only the words that weren't translated correctly
+# even once are tested until they are
+NUMBER_OF_ROUNDS = 2
+# Quality of an answer (0-5) used for scheduling revisions, depending on how many times the word was correctly
+# translated in the first 2 rounds of revising
+REVISING_QUALITIES = {0: 1, 1: 3, 2: 5}
+
+
+class LearningSession:
+    """
+    Session of learning or revising flashcards that takes answers and returns feedback, without any input or output,
+    so it can be used by the console, by a server or without a user. When the last word is translated, the flashcards
+    are moved between stages and the summary of the session is available.
+    """
+    def __init__(self, database, mode, number_of_words=None, generator=random, review_log=None):
+        """
+        :param database: (Database or SqliteDatabase)
+        :param mode: (str) LEARNING_ENGLISH, LEARNING_POLISH or REVISING
+        :param number_of_words: (int) number of words tested in the session, all the words of the stage by default
+        :param generator: (random.Random) generator used to choose and shuffle the words
+        :param review_log: (ReviewLog) log to which graded answers are appended or None
+        """
+        if mode not in MODES:
+            raise ValueError(f'Unknown mode {mode}')
+        self.database = database
+        self.mode = mode
+        self.generator = generator
+        self.review_log = review_log
+        if mode == REVISING:
+            self.stage = 3
+            self.flashcards = database.third_stage_flashcards
+            card_ids = database.get_flashcards_to_revise(len(self.flashcards) if number_of_words is None
+                                                         else number_of_words)
+        else:
+            self.stage = 1 if mode == LEARNING_ENGLISH else 2
+            self.flashcards = database.flashcards[self.stage - 1]
+            card_ids = self.flashcards.ids()
+            if number_of_words is not None and number_of_words < len(card_ids):
+                card_ids = generator.sample(card_ids, number_of_words)
+        # Flashcards are kept by the session, because other sessions can move them to other stages in the meantime
+        self._session_flashcards = {card_id: self.flashcards[card_id] for card_id in card_ids}
+        # Stores how many times each word was correctly guessed and which word is tested next
+        self.tracker = ScoreTracker(card_ids, NUMBER_OF_ROUNDS, generator)
+        self.summary = None  # (dict) set at the end of the session
+        self._letters_counter = 1  # How many letters are given by the next letters hint
+        # Accepted answers and matchers of the words by their ids, each created when the word is answered for the first
+        # time and reused in the next rounds unless the word was modified in the meantime
+        self._matchers = {}
+        self._hints = 0  # Flags of the hints used for the current word
+        self._question_time = time.perf_counter()  # When the current word was asked
+        if self.tracker.is_finished:
+            self.summary = {'total': 0}
+
+    def __len__(self):
+        return len(self.tracker)
+
+    @property
+    def round(self):
+        return self.tracker.round
+
+    @property
+    def is_finished(self):
+        return self.summary is not None
+
+    @property
+    def flashcard(self):
+        """
+        :return: (Flashcard) flashcard that is being tested or None at the end of the session
+        """
+        if self.is_finished:
+            return None
+        return self._session_flashcards[self.tracker.card_id]
+
+    @property
+    def question(self):
+        """
+        :return: (str) word that has to be translated or None at the end of the session
+        """
+        flashcard = self.flashcard
+        if flashcard is None:
+            return None
+        if self.mode == LEARNING_POLISH:
+            return ' / '.join(flashcard.polish_words)
+        return flashcard.english_word
+
+    def _get_accepted_answers(self):
+        """
+        :return: list of translations (str) of the word that is being tested
+        """
+        if self.mode == LEARNING_POLISH:
+            return [self.flashcard.english_word]
+        return self.flashcard.polish_words
+
+    def answer(self, answer):
+        """
+        Gives a hint or grades the answer and goes to the next word. A word translated after a letters hint isn't
+        counted as translated correctly.
+        :param answer: (str) translation typed by a user or one of the hints
+        :return: (dict) 'hint' with the text of a hint or 'grade' (CORRECT, ALMOST_CORRECT or WRONG), 'correct_answer',
+                 'definition' and 'example' of the word
+        """
+        flashcard = self.flashcard
+        if flashcard is None:
+            raise ValueError('The session is finished')
+        if answer in HINT_FLAGS:
+            self._hints |= HINT_FLAGS[answer]
+        if answer == LETTERS_HINT:
+            hint = self._get_accepted_answers()[0][:self._letters_counter]
+            self._letters_counter += 1
+            return {'hint': hint}
+        elif answer == EXAMPLE_HINT:
+            return {'hint': flashcard.example}
+        elif answer == DEFINITION_HINT:
+            return {'hint': flashcard.definition}
+        accepted_answers = self._get_accepted_answers()
+        matched_answers, matcher = self._matchers.get(flashcard.card_id, (None, None))
+        if matched_answers != accepted_answers:
+            matcher = AnswerMatcher(accepted_answers)
+            self._matchers[flashcard.card_id] = (accepted_answers, matcher)
+        grade = matcher.grade(answer)
+        is_correct = grade != WRONG and self._letters_counter == 1
+        if self.review_log is not None:
+            self.review_log.append(flashcard.card_id, self.stage,
+                                   POLISH_TO_ENGLISH if self.mode == LEARNING_POLISH else ENGLISH_TO_POLISH,
+                                   is_correct, self._hints, time.perf_counter() - self._question_time)
+        feedback = {'grade': grade, 'correct_answer': ' / '.join(accepted_answers),
+                    'definition': flashcard.definition, 'example': flashcard.example}
+        self._go_to_next_word(is_correct)
+        return feedback
+
+    def _go_to_next_word(self, is_correct):
+        """
+        Records the answer and goes to the next word, the session ends when all the words were translated correctly at
+        least once
+        :param is_correct: (bool) whether the word was translated correctly
+        :return: None
+        """
+        self.tracker.record(is_correct)
+        self._letters_counter = 1
+        self._hints = 0
+        self._question_time = time.perf_counter()
+        if self.tracker.is_finished:
+            self._finish()
+
+    def _finish(self):
+        """
+        Moves the learned words to the higher stage or, after revising, updates review schedules and moves forgotten
+        words to the first stage. Flashcards moved by other sessions in the meantime are skipped.
+        :return: None
+        """
+        if self.mode == REVISING:
+            # Scores count only the rounds, so the forgotten words, translated correctly only afterwards, have score 0
+            self.database.update_review_schedules({card_id: REVISING_QUALITIES[score]
+                                                   for card_id, score in zip(self.tracker.card_ids, self.tracker.scores)
+                                                   if self._is_in_stage(card_id)})
+            forgotten_words = [card_id for card_id in self.tracker.forgotten if self._is_in_stage(card_id)]
+            self.database.move_to_first_stage_from_third_stage(forgotten_words)
+            self.summary = {'forgotten': len(forgotten_words), 'total': len(self.tracker)}
+        else:
+            words_learned = [card_id for card_id in self.tracker.learned if self._is_in_stage(card_id)]
+            self.database.move_to_higher_stage(words_learned, self.stage)
+            self.summary = {'learned': len(words_learned), 'total': len(self.tracker)}
+        # Flushed after the flashcards are moved, so a log that can't be written doesn't lose the progress
+        if self.review_log is not None:
+            self.review_log.flush()
+
+    def _is_in_stage(self, card_id):
+        """
+        :param card_id: (int) id of a flashcard of the session
+        :return: (bool) whether the flashcard is still in the stage of the session
+        """
+        return self._session_flashcards[card_id] in self.flashcards
@@ -1,145 +1,165 @@
 import os
-import random
+from flashcard import use_dictionary_cache
 from database import Database
-
+from answer_matcher import CORRECT, ALMOST_CORRECT
+from enrichment_queue import EnrichmentQueue, needs_enrichment
+from learning_session import LearningSession, LEARNING_ENGLISH, LEARNING_POLISH, REVISING
+from review_log import ReviewLog, load_reviews, format_review_statistics
+from word_list_io import import_word_list, export_word_list
+import instrumentation
+
+# Path to either a semicolon separated data file or a SQLite database (.db) created with sqlite_database.py
 PATH = 'C:/Users/kajte/PycharmProjects/angielskiv2/data.csv'
 
-database = Database(PATH)
+# Downloaded words are saved next to the data file, in offline mode new words are taken only from there
+DICTIONARY_CACHE_PATH = os.path.join(os.path.dirname(PATH), 'dictionary_cache.db')
+OFFLINE = False
+# Timings of operations are saved there on quit when instrumentation is enabled (FLASHCARDS_INSTRUMENTATION=1)
+INSTRUMENTATION_PATH = os.path.join(os.path.dirname(PATH), 'instrumentation.json')
+# Answers typed in sessions are appended to this file when it's set, so they can be replayed with session_replay.py
+ANSWERS_PATH = None
+# Every graded answer is appended to this binary log, its statistics are shown with the statistics of flashcards
+REVIEW_LOG_PATH = os.path.join(os.path.dirname(PATH), 'reviews.log')
 
+# The database is loaded by load_database when it's needed for the first time, so the menu is displayed at once
+database = None
+# Missing definitions and examples are downloaded in the background and merged into the database between questions
+enrichment_queue = EnrichmentQueue()
+review_log = ReviewLog(REVIEW_LOG_PATH)
 
-def clear_console():
+
+def load_database():
     """
+    Loads the database and the dictionary cache if they aren't loaded yet.
     :return: None
     """
-    os.system('cls')
+    global database
+    if database is not None:
+        return
+    if PATH.endswith('.db'):
+        from sqlite_database import SqliteDatabase
+        database = SqliteDatabase(PATH)
+    else:
+        database = Database(PATH)
+    from dictionary_cache import DictionaryCache
+    use_dictionary_cache(DictionaryCache(DICTIONARY_CACHE_PATH, offline=OFFLINE))
 
 
-def crate_list_with_remaining_word_indexes(dictionary):
+def enrich_in_background(flashcards):
     """
-    Creates a list of indexes of the words that wasn't correctly translated even once.
-    :param dictionary: dictionary where a key is a word index and a value is a number of how many times the word was
-                       correctly translated
-    :return: list of indexes of the words that wasn't correctly translated even once
+    Adds flashcards without a definition or an example to the enrichment queue
+    :param flashcards: iterable of Flashcards
+    :return: None
     """
-    return [key for key, value in dictionary.items() if value < 1]
+    for flashcard in flashcards:
+        if needs_enrichment(flashcard):
+            enrichment_queue.put(flashcard.english_word)
 
 
-def summarize_learning_session(scores, stage):
+def merge_enriched_flashcards():
     """
-    :param stage: (int) current stage of flashcards
-    :param scores: dictionary of scores, where key is an index of a word and value is number that tells how many times
-                   the word was translated
+    Merges the definitions and examples downloaded so far into the database without waiting for the others
     :return: None
     """
-    words_learned = [key for key, value in scores.items() if value == 2]
-    database.move_to_higher_stage(words_learned, stage)
-    number_of_words_learned = len(words_learned)
-    total_number_of_words = len(scores)
-    print('Good job!')
-    print(f'Words learned: {number_of_words_learned}/{total_number_of_words} '
-          f'({round(number_of_words_learned / total_number_of_words * 100, 2)}%)')
+    results = enrichment_queue.get_results()
+    if results:
+        database.enrich_flashcards(results)
 
-    input()
+
+def clear_console():
+    """
+    :return: None
+    """
+    os.system('cls')
 
 
-def summarize_revising_session(scores):
+def print_feedback(feedback):
     """
-    :param scores: dictionary of scores, where key is an index of a word and value is number that tells how many times
-                   the word was translated
+    Prints the grade of an answer with the correct answer, the definition and the example of the word
+    :param feedback: (dict) feedback returned by LearningSession.answer
     :return: None
     """
-    forgotten_words = [key for key, value in scores.items() if value == 0]
-    database.move_to_first_stage_from_third_stage(forgotten_words)
-    number_of_forgotten_words = len(forgotten_words)
-    total_number_of_words = len(scores)
-    print('Good job!')
-    print(f'Forgotten words: {number_of_forgotten_words}/{total_number_of_words} '
-          f'({round(number_of_forgotten_words / total_number_of_words * 100, 2)}%)')
-    input()
+    if feedback['grade'] == CORRECT:
+        print('Correct!')
+    elif feedback['grade'] == ALMOST_CORRECT:
+        print(f'Almost correct! Correct answer: {feedback["correct_answer"]}')
+    else:
+        print(feedback['correct_answer'])
+    print(feedback['definition'])
+    print(feedback['example'])
+
+
+def record_answer(question, answer):
+    """
+    Appends the answer to ANSWERS_PATH, if it's set, so the session can be replayed with session_replay.py
+    :param question: (str) word that was tested
+    :param answer: (str)
+    :return: None
+    """
+    if ANSWERS_PATH is not None:
+        with open(ANSWERS_PATH, 'a', encoding='utf8') as file:
+            file.write(f'{question}\t{answer}\n')
 
 
-def test_english_word(word_index, flashcards):
+def test_word(session):
     """
-    Displays english word and waits for a polish translation of the word.
+    Displays the word that is being tested and waits for its translation.
     Instead of translation the user can type special letters:
     - 'l' to get a hint in a form of first letters of the expected answer
     - 's' to get example of the word used in a sentence
     - 'd' to get definition of the word
-    After using one of these letters score of current word won't be increased
-    :param word_index: (int) index of the word
-    :param flashcards: list of Flashcards
-    :return: (bool) True if answer was correct
+    After using the letter l score of current word won't be increased
+    An almost correct answer (without diacritics or with a typo) is also accepted
+    :param session: (LearningSession)
+    :return: None
     """
+    merge_enriched_flashcards()
+    # Only the current flashcard is checked, its texts are read anyway, and it's asked again in the next round
+    enrich_in_background([session.flashcard])
     clear_console()
-    print(flashcards[word_index].english_word)
-    letters_counter = 1  # How many letters should be displayed when a user submits the letter l
+    question = session.question
+    print(question)
     while True:
         answer = input()
-        if answer == 'l':  # Printing first letter_counter letters of the correct answer
-            print(flashcards[word_index].polish_words[0][:letters_counter])
-            letters_counter += 1
-        elif answer == 's':  # Printing sentence with the word
-            print(flashcards[word_index].example)
-        elif answer == 'd':  # Printing definition of the word
-            print(flashcards[word_index].definition)
-        elif answer in flashcards[word_index].polish_words:  # if answer is correct
-            print('Correct!')
-            print(flashcards[word_index].definition)
-            print(flashcards[word_index].example)
+        record_answer(question, answer)
+        feedback = session.answer(answer)
+        if 'hint' in feedback:
+            print(feedback['hint'])
+        else:
+            print_feedback(feedback)
             input()
-            if letters_counter == 1:
-                return True
-            else:
-                return False
+            return
 
-        else:  # if answer is wrong
-            possible_answers = ' / '.join(flashcards[word_index].polish_words)
-            print(possible_answers)
-            print(flashcards[word_index].definition)
-            print(flashcards[word_index].example)
-            input()
-            return False
+
+def print_summary(summary):
+    """
+    :param summary: (dict) summary of a finished LearningSession
+    :return: None
+    """
+    print('Good job!')
+    if 'learned' in summary:
+        print(f'Words learned: {summary["learned"]}/{summary["total"]} '
+              f'({round(summary["learned"] / summary["total"] * 100, 2)}%)')
+    else:
+        print(f'Forgotten words: {summary["forgotten"]}/{summary["total"]} '
+              f'({round(summary["forgotten"] / summary["total"] * 100, 2)}%)')
+    input()
 
 
-def test_polish_word(word_index):
+def run_session(session):
     """
-    Displays polish word and waits for a english translation of the word.
-    Instead of translation the user can type special letters:
-    - 'l' to get a hint in a form of first letters of the expected answer
-    - 's' to get example of the word used in a sentence
-    - 'd' to get definition of the word
-    After using one of these letters score of current word won't be increased
-    :param word_index: (int) index of the word
-    :return: (bool) True if answer was correct
+    Tests the words of the session until it's finished and prints its summary
+    :param session: (LearningSession)
+    :return: None
     """
+    if session.is_finished:
+        print('There are no words to learn!')
+        input()
+        return
+    while not session.is_finished:
+        test_word(session)
     clear_console()
-    print(' / '.join(database.second_stage_flashcards[word_index].polish_words))
-    letters_counter = 1  # How many letters should be displayed when a user submits the letter l
-    while True:
-        answer = input()
-        if answer == 'l':  # Printing first letter_counter letters of the correct answer
-            print(database.second_stage_flashcards[word_index].english_word[:letters_counter])
-            letters_counter += 1
-        elif answer == 's':  # Printing sentence with the word
-            print(database.second_stage_flashcards[word_index].example)
-        elif answer == 'd':  # Printing definition of the word
-            print(database.second_stage_flashcards[word_index].definition)
-        elif answer == database.second_stage_flashcards[word_index].english_word:  # if answer is correct
-            print('Correct!')
-            print(database.second_stage_flashcards[word_index].definition)
-            print(database.second_stage_flashcards[word_index].example)
-            input()
-            if letters_counter == 1:
-                return True
-            else:
-                return False
-
-        else:  # if answer is wrong
-            print(database.second_stage_flashcards[word_index].english_word)
-            print(database.second_stage_flashcards[word_index].definition)
-            print(database.second_stage_flashcards[word_index].example)
-            input()
-            return False
+    print_summary(session.summary)
 
 
 def start_learning(stage):
@@ -149,78 +169,17 @@ def start_learning(stage):
     :param stage: (int) stage of learning (1 for learning English to Polish, 2 the other way around)
     :return: None
     """
-    if stage == 1:
-        flashcards = database.first_stage_flashcards
-    else:
-        flashcards = database.second_stage_flashcards
-    # Dictionary that stores how many times each word was correctly guessed
-    scores = {i: 0 for i in range(len(flashcards))}
-    if len(scores) == 0:
-        print('There are no words to learn!')
-        input()
-        return
-
-    order = crate_list_with_remaining_word_indexes(scores)
-    for i in range(2):  # Test all words 2 times
-        random.shuffle(order)
-        for word_index in order:
-            if stage == 1:
-                if test_english_word(word_index, flashcards):
-                    scores[word_index] += 1
-            else:
-                if test_polish_word(word_index):
-                    scores[word_index] += 1
-    while True:
-        order = crate_list_with_remaining_word_indexes(scores)
-        random.shuffle(order)
-        if not order:  # End learning when all the words was correctly translated 2 times
-            clear_console()
-            summarize_learning_session(scores, stage)
-            break
-        for word_index in order:  # Testing only words that wasn't guessed correctly even once
-            if stage == 1:
-                if test_english_word(word_index, flashcards):
-                    scores[word_index] += 1
-            else:
-                if test_polish_word(word_index):
-                    scores[word_index] += 1
-    database.save_data()
+    run_session(LearningSession(database, LEARNING_ENGLISH if stage == 1 else LEARNING_POLISH, review_log=review_log))
 
 
 def start_revising(number_of_words):
     """
-    Tests all the words from the third stage in a random order 2 times and then tests all the words again that wasn't
-    correctly translated even once and saves the modified database.
+    Tests the words from the third stage that should be revised first in a random order 2 times and then tests all
+    the words again that wasn't correctly translated even once and saves the modified database.
     :param number_of_words: (int) number of words to revise
     :return: None
     """
-    # Dictionary that stores how many times each word was correctly guessed
-    scores = {i: 0 for i in random.sample(range(len(database.third_stage_flashcards)), number_of_words)}
-    if len(scores) == 0:
-        print('There are no words to learn!')
-        input()
-        return
-
-    order = crate_list_with_remaining_word_indexes(scores)
-    for i in range(2):  # test all words 2 times
-        random.shuffle(order)
-        for word_index in order:
-            if test_english_word(word_index, database.third_stage_flashcards):
-                scores[word_index] += 1
-    forgotten_words = crate_list_with_remaining_word_indexes(scores)  # Words that wasn't correctly translated even once
-    while True:
-        order = crate_list_with_remaining_word_indexes(scores)
-        random.shuffle(order)
-        if not order:  # End learning when all the words was correctly translated 2 times
-            clear_console()
-            for word_index in forgotten_words:
-                scores[word_index] = 0
-            summarize_revising_session(scores)
-            break
-        for word_index in order:  # Testing only words that wasn't translated correctly even once
-            if test_english_word(word_index, database.third_stage_flashcards):
-                scores[word_index] += 1
-    database.save_data()
+    run_session(LearningSession(database, REVISING, number_of_words, review_log=review_log))
 
 
 def ask_for_revising_details():
@@ -258,8 +217,12 @@ def add_new_word_manually():
     definition = input()
     print('Type an example:')
     example = input()
-    database.add_flashcard(english_word, polish_word, definition, example)
-    print('Flashcard added!')
+    if database.add_flashcard(english_word, polish_word, definition, example):
+        print('Flashcard added!')
+        # A missing definition or example is downloaded while the user does something else
+        enrich_in_background([database.get_flashcard(english_word)])
+    else:
+        print(f'A flashcard with the word {english_word} already exists!')
     input()
 
 
@@ -274,6 +237,8 @@ def add_new_word():
     result = database.add_new_word(new_word)
     if result == 1:
         clear_console()
+        # The online dictionary may have no example of the word, it's looked up again in the background
+        enrich_in_background([database.get_flashcard(new_word)])
         print(database.get_flashcard(new_word).get_flashcard_summary())
         print(f'\nSuccessfully added a word {new_word}!')
         print('\nWould you like to modify anything?')
@@ -289,6 +254,52 @@ def add_new_word():
             add_new_word_manually()
 
 
+def import_words(file_path):
+    """
+    Adds flashcards of the words from a .tsv, .csv or plain word list to the database in chunks.
+    :param file_path: (str) path to the word list
+    :return: None
+    """
+    print('\nImporting...')
+    summary = import_word_list(database, file_path)
+    print(f'\nSuccessfully added {summary["added"]} words!')
+    if summary['existing']:
+        print(f'{summary["existing"]} words already exist.')
+    if summary['failed']:
+        print(f'Cannot add these words: {", ".join(summary["failed"])}')
+    for row_number, reason in summary['invalid']:
+        print(f'Row {row_number}: {reason}!')
+    # Missing definitions and examples are downloaded while the user does something else
+    enrich_in_background(database.get_flashcard(english_word) for english_word in summary['incomplete'])
+    input()
+
+
+def add_new_words():
+    """
+    Asks for a list of words or a path to a word list and adds flashcards of all of them to the database at once.
+    :return: None
+    """
+    clear_console()
+    print('Type new english words separated by commas or a path to a word list (.tsv, .csv or .txt):')
+    text = input()
+    if os.path.isfile(text.strip()):
+        import_words(text.strip())
+        return
+    new_words = [word.strip() for word in text.split(',') if word.strip()]
+    print('\nDownloading...')
+    results = database.add_new_words(new_words)
+    added = [word for word, result in results.items() if result == 1]
+    enrich_in_background(database.get_flashcard(word) for word in added)
+    existing = [word for word, result in results.items() if result == 0]
+    failed = [word for word, result in results.items() if result == -1]
+    print(f'\nSuccessfully added {len(added)} words!')
+    if existing:
+        print(f'Flashcards with these words already exist: {", ".join(existing)}')
+    if failed:
+        print(f'Cannot add these words: {", ".join(failed)}')
+    input()
+
+
 def change_english_translation(flashcard):
     """
     :param flashcard: (Flashcard)
@@ -402,17 +413,51 @@ def delete_flashcard(flashcard):
         input()
 
 
+def choose_flashcard(flashcards, can_go_back=False):
+    """
+    Asks a user to choose one of the flashcards.
+    :param flashcards: list of Flashcards
+    :param can_go_back: (bool) True if a user can choose none of the flashcards
+    :return: (Flashcard) or None if a user went back
+    """
+    print('\nSelect the flashcard you want to change:')
+    for i, flashcard in enumerate(flashcards, start=1):
+        print(f'{i}. {flashcard.english_word} ({" / ".join(flashcard.polish_words)})')
+    if can_go_back:
+        print(f'{len(flashcards) + 1}. Go back')
+    while True:
+        flashcard_index = input()
+        if flashcard_index.isnumeric() and 1 <= int(flashcard_index) <= len(flashcards):
+            return flashcards[int(flashcard_index) - 1]
+        if can_go_back and flashcard_index == str(len(flashcards) + 1):
+            return None
+        print('Wrong input! Try again:')
+
+
 def modify_word():
     """
     Asks for a word that a user want to modify and displays the modifying menu.
+    The word can be either english or one of the polish translations.
     :return: None
     """
-    print('Type the english word you want to change:')
-    flashcard = database.get_flashcard(input())
+    print('Type the english or polish word you want to change:')
+    word = input()
+    flashcard = database.get_flashcard(word)
+    if flashcard is None:
+        flashcards = database.get_flashcards_with_polish_word(word)
+        if len(flashcards) == 1:
+            flashcard = flashcards[0]
+        elif len(flashcards) > 1:
+            flashcard = choose_flashcard(flashcards)
     if flashcard is None:
         print('There is no flashcard with this word in the database!')
-        input()
-    else:
+        similar_flashcards = database.find_similar_flashcards(word)
+        if similar_flashcards:  # The word could be misspelt
+            print('Maybe you meant one of these words.')
+            flashcard = choose_flashcard(similar_flashcards, can_go_back=True)
+        else:
+            input()
+    if flashcard is not None:
         clear_console()
         print(flashcard.get_flashcard_summary())
         print('\nChoose an action to be performed:')
@@ -450,9 +495,37 @@ def display_modifying_menu(flashcard):
         delete_flashcard(flashcard)
 
 
+def find_english_word(card_id):
+    """
+    :param card_id: (int)
+    :return: (str) english word of the flashcard with the id or None if it was deleted
+    """
+    for flashcards in database.flashcards:
+        try:
+            return flashcards[card_id].english_word
+        except KeyError:
+            pass
+    return None
+
+
+def export_words():
+    """
+    Asks for a path and writes all the flashcards to a word list there.
+    :return: None
+    """
+    print('Type a path to the word list (.tsv and .csv with translations, otherwise only english words):')
+    file_path = input().strip()
+    try:
+        print(f'\nExported {export_word_list(database, file_path)} flashcards!')
+    except OSError:
+        print('\nCannot write the word list there!')
+    input()
+
+
 def show_statistics():
     """
-    Prints number of flashcards in each stage
+    Prints number of flashcards in each stage, statistics of the logged answers and timings of operations if
+    instrumentation is enabled
     :return: None
     """
     clear_console()
@@ -463,33 +536,70 @@ def show_statistics():
     print(f'Number of flashcards in stage 2: {s2}')
     print(f'Number of flashcards in stage 3: {s3}')
     print(f'Total number of flashcards: {s1 + s2 + s3}')
+    print()
+    try:
+        for line in format_review_statistics(load_reviews(REVIEW_LOG_PATH), find_english_word):
+            print(line)
+    except ImportError:
+        print('Install numpy to see statistics of answers.')
+    print()
+    if instrumentation.ENABLED:
+        print('Timings of operations:')
+        for line in instrumentation.format_statistics():
+            print(line)
+    else:
+        print(f'Set {instrumentation.ENVIRONMENT_VARIABLE}=1 to see timings of operations.')
     input()
 
 
-while True:
-    clear_console()
-    print('\t\tMenu:')
-    print('1. Learning (english to polish)')
-    print('2. Learning (polish to english)')
-    print('3. Revising already learned words')
-    print('4. Add new word')
-    print('5. Modify a word')
-    print('6. Show statistics')
-    print('7. Quit')
-    action = input()
+def main():
+    """
+    Displays the main menu until a user quits. The database is loaded when a user chooses any mode.
+    :return: None
+    """
+    while True:
+        clear_console()
+        print('\t\tMenu:')
+        print('1. Learning (english to polish)')
+        print('2. Learning (polish to english)')
+        print('3. Revising already learned words')
+        print('4. Add new word')
+        print('5. Add new words from a list')
+        print('6. Modify a word')
+        print('7. Show statistics')
+        print('8. Export words to a file')
+        print('9. Quit')
+        action = input()
 
-    clear_console()
-    if '1' in action:
-        start_learning(1)
-    elif '2' in action:
-        start_learning(2)
-    elif '3' in action:
-        ask_for_revising_details()
-    elif '4' in action:
-        add_new_word()
-    elif '5' in action:
-        modify_word()
-    elif '6' in action:
-        show_statistics()
-    elif '7' in action:
-        quit()
+        clear_console()
+        if '9' not in action:
+            load_database()
+            merge_enriched_flashcards()
+        if '1' in action:
+            start_learning(1)
+        elif '2' in action:
+            start_learning(2)
+        elif '3' in action:
+            ask_for_revising_details()
+        elif '4' in action:
+            add_new_word()
+        elif '5' in action:
+            add_new_words()
+        elif '6' in action:
+            modify_word()
+        elif '7' in action:
+            show_statistics()
+        elif '8' in action:
+            export_words()
+        elif '9' in action:
+            enrichment_queue.close()
+            if database is not None:
+                merge_enriched_flashcards()
+                database.close()  # Compacts the journal into the data file
+            if instrumentation.ENABLED:
+                instrumentation.export_statistics(INSTRUMENTATION_PATH)
+            quit()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+import struct
+import time
+import os
+
+MAGIC = b'FLASHREV'
+VERSION = 1
+HEADER = struct.Struct('<8sI')
+# Time of the answer, id of the flashcard, its stage, direction of the translation, whether it was translated correctly,
+# hints used (flags of learning_session.HINT_FLAGS) and response time in seconds
+RECORD = struct.Struct('<dqBBBBf')
+RECORD_FIELDS = [('time', '<f8'), ('card_id', '<i8'), ('stage', 'u1'), ('direction', 'u1'), ('correct', 'u1'),
+                 ('hints', 'u1'), ('response_time', '<f4')]
+ENGLISH_TO_POLISH = 0
+POLISH_TO_ENGLISH = 1
+# Answers are kept in memory until there are this many bytes of them or the session ends
+FLUSH_SIZE = 64 * 1024
+# Words answered fewer times aren't counted among the hardest words
+MINIMAL_ANSWERS = 3
+LATENCY_PERCENTILES = (50, 90, 99)
+
+
+class ReviewLog:
+    """
+    Append-only binary log of graded answers. Answers are buffered and appended to the file in chunks, the file isn't
+    kept open in the meantime, so there can be a log for every learner.
+    """
+    def __init__(self, file_path):
+        """
+        :param file_path: (str) file created when the first answers are flushed
+        """
+        self.file_path = file_path
+        self._buffer = bytearray()
+
+    def append(self, card_id, stage, direction, is_correct, hints, response_time):
+        """
+        :param card_id: (int) id of the flashcard
+        :param stage: (int) stage of the flashcard when it was answered
+        :param direction: (int) ENGLISH_TO_POLISH or POLISH_TO_ENGLISH
+        :param is_correct: (bool) whether the answer was counted as correct
+        :param hints: (int) flags of the hints used
+        :param response_time: (float) time from the question to the answer in seconds
+        :return: None
+        """
+        self._buffer += RECORD.pack(time.time(), card_id, stage, direction, is_correct, hints, response_time)
+        if len(self._buffer) >= FLUSH_SIZE:
+            self.flush()
+
+    def flush(self):
+        """
+        Appends the buffered answers to the file, with a header if the file is new
+        :return: None
+        """
+        if not self._buffer:
+            return
+        with open(self.file_path, 'ab') as file:
+            if file.tell() == 0:
+                file.write(HEADER.pack(MAGIC, VERSION))
+            file.write(self._buffer)
+        self._buffer.clear()
+
+
+def load_reviews(file_path):
+    """
+    Requires NumPy. A record cut off by a crash at the end of the file is skipped.
+    :param file_path: (str) file written by ReviewLog
+    :return: (numpy.ndarray) structured array of the answers with RECORD_FIELDS, empty if there is no valid file
+    """
+    import numpy as np
+    dtype = np.dtype(RECORD_FIELDS)
+    try:
+        with open(file_path, 'rb') as file:
+            magic, version = HEADER.unpack(file.read(HEADER.size))
+            number_of_records = (os.fstat(file.fileno()).st_size - HEADER.size) // dtype.itemsize
+            if magic != MAGIC or version != VERSION:
+                return np.empty(0, dtype)
+            return np.fromfile(file, dtype, count=number_of_records)
+    except (OSError, struct.error):
+        return np.empty(0, dtype)
+
+
+def get_retention(reviews):
+    """
+    :param reviews: (numpy.ndarray) answers returned by load_reviews
+    :return: dictionary where a key is a stage and a value is a tuple of the number of answers (int) and the ratio of
+             correct ones (float), only for stages with answers
+    """
+    import numpy as np
+    answers = np.bincount(reviews['stage'], minlength=4)
+    correct = np.bincount(reviews['stage'], weights=reviews['correct'], minlength=4)
+    return {stage: (int(answers[stage]), float(correct[stage] / answers[stage]))
+            for stage in range(1, len(answers)) if answers[stage]}
+
+
+def get_hardest_words(reviews, number_of_words=10, minimal_answers=MINIMAL_ANSWERS):
+    """
+    :param reviews: (numpy.ndarray) answers returned by load_reviews
+    :param number_of_words: (int)
+    :param minimal_answers: (int) minimal number of answers of a word
+    :return: list of tuples of an id of a flashcard (int), its number of answers (int) and the ratio of correct ones
+             (float), from the lowest ratio, words with more answers first
+    """
+    import numpy as np
+    card_ids, inverse, answers = np.unique(reviews['card_id'], return_inverse=True, return_counts=True)
+    correct = np.bincount(inverse.ravel(), weights=reviews['correct'], minlength=len(card_ids))
+    ratios = correct / np.maximum(answers, 1)
+    candidates = np.flatnonzero(answers >= minimal_answers)
+    hardest = candidates[np.lexsort((-answers[candidates], ratios[candidates]))[:number_of_words]]
+    return [(int(card_ids[i]), int(answers[i]), float(ratios[i])) for i in hardest]
+
+
+def get_latency_percentiles(reviews, percentiles=LATENCY_PERCENTILES):
+    """
+    :param reviews: (numpy.ndarray) answers returned by load_reviews
+    :param percentiles: tuple of percentiles (int)
+    :return: dictionary where a key is a percentile and a value is the response time in seconds, empty if there are no
+             answers
+    """
+    import numpy as np
+    if not len(reviews):
+        return {}
+    return dict(zip(percentiles, np.percentile(reviews['response_time'], percentiles).tolist()))
+
+
+def format_review_statistics(reviews, get_word):
+    """
+    :param reviews: (numpy.ndarray) answers returned by load_reviews
+    :param get_word: function that takes an id of a flashcard and returns its word or None if it was deleted
+    :return: list of lines (str) with the retention in each stage, the hardest words and percentiles of response times
+    """
+    lines = [f'Answers: {len(reviews)}']
+    for stage, (answers, ratio) in get_retention(reviews).items():
+        lines.append(f'  stage {stage}: {answers} answers, {ratio * 100:.1f}% correct')
+    latencies = get_latency_percentiles(reviews)
+    if latencies:
+        lines.append('Response time: ' + ', '.join(f'p{percentile} {latency:.1f}s'
+                                                   for percentile, latency in latencies.items()))
+    hardest_words = get_hardest_words(reviews)
+    if hardest_words:
+        lines.append('Hardest words:')
+        for card_id, answers, ratio in hardest_words:
+            word = get_word(card_id)
+            lines.append(f'  {word if word is not None else "(deleted)"}: {ratio * 100:.0f}% of {answers} answers')
+    return lines
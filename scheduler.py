@@ -0,0 +1,68 @@
+import heapq
+import itertools
+import time
+
+SECONDS_IN_DAY = 24 * 60 * 60
+MIN_EASE = 1.3
+
+
+def review(flashcard, quality, now=None):
+    """
+    Updates the review schedule of the flashcard with the SM-2 algorithm
+    :param flashcard: (Flashcard)
+    :param quality: (int) quality of the answer from 0 (complete blackout) to 5 (perfect response)
+    :param now: (float) time of the review as a timestamp, the current time by default
+    :return: None
+    """
+    if now is None:
+        now = time.time()
+    if quality < 3:  # The word was forgotten, so it has to be learned from the beginning
+        flashcard.interval = 0
+    elif flashcard.interval == 0:
+        flashcard.interval = 1
+    elif flashcard.interval == 1:
+        flashcard.interval = 6
+    else:
+        flashcard.interval = round(flashcard.interval * flashcard.ease)
+    flashcard.ease = max(MIN_EASE, flashcard.ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+    flashcard.due = now + flashcard.interval * SECONDS_IN_DAY
+
+
+class Scheduler:
+    """
+    Flashcards of a stage in a heap ordered by the time when they should be revised. Flashcards that left the stage
+    or were rescheduled aren't removed from the heap immediately, they are skipped when they get to the top.
+    """
+    def __init__(self, stage):
+        """
+        :param stage: (Stage) stage of scheduled flashcards
+        """
+        self._stage = stage
+        self._counter = itertools.count()  # Breaks ties between flashcards with the same due time
+        self._heap = [(flashcard.due, next(self._counter), flashcard) for flashcard in stage]
+        heapq.heapify(self._heap)
+
+    def add(self, flashcard):
+        """
+        Schedules a flashcard that was added to the stage or whose due time has changed
+        :param flashcard: (Flashcard)
+        :return: None
+        """
+        heapq.heappush(self._heap, (flashcard.due, next(self._counter), flashcard))
+
+    def get_next_flashcards(self, number):
+        """
+        :param number: (int) number of flashcards
+        :return: list of ids of the given number of flashcards that should be revised first
+        """
+        valid_entries = []
+        scheduled_ids = set()
+        while self._heap and len(valid_entries) < number:
+            entry = heapq.heappop(self._heap)
+            due, _, flashcard = entry
+            if flashcard in self._stage and flashcard.due == due and flashcard.card_id not in scheduled_ids:
+                valid_entries.append(entry)
+                scheduled_ids.add(flashcard.card_id)
+        for entry in valid_entries:
+            heapq.heappush(self._heap, entry)
+        return [flashcard.card_id for _, _, flashcard in valid_entries]
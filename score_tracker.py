@@ -0,0 +1,87 @@
+from collections import deque
+from array import array
+import random
+
+
+class ScoreTracker:
+    """
+    Scores of the words of a session and the queue of words to test. All the words are tested in the given number of
+    rounds in a random order, then the words that weren't translated correctly even once are tested again until they
+    are. The words to test again and the learned words are collected while answers are given, so recording an answer
+    takes constant time and the scores never have to be scanned.
+    """
+    def __init__(self, card_ids, number_of_rounds, generator=random):
+        """
+        :param card_ids: list of ids of flashcards
+        :param number_of_rounds: (int) number of rounds in which all the words are tested
+        :param generator: (random.Random) generator used to shuffle the words
+        """
+        self.card_ids = list(card_ids)
+        self.number_of_rounds = number_of_rounds
+        self.generator = generator
+        # Numbers of correct translations in the rounds of all the words, by their indexes in card_ids
+        self.scores = array('B', bytes(len(self.card_ids)))
+        self.round = 0
+        self.learned = []  # Ids of the words translated correctly in all the rounds
+        self.forgotten = None  # Ids of the words not translated correctly in any round, known after the last round
+        self._queue = deque(self._shuffle(list(range(len(self.card_ids)))))
+        self._missed = []  # Indexes of the words that will be tested again after the queue
+        if not self._queue:
+            self.forgotten = []
+
+    def __len__(self):
+        return len(self.card_ids)
+
+    def _shuffle(self, indexes):
+        """
+        :param indexes: list of indexes of words
+        :return: the same list in a random order
+        """
+        self.generator.shuffle(indexes)
+        return indexes
+
+    @property
+    def is_finished(self):
+        return not self._queue
+
+    @property
+    def card_id(self):
+        """
+        :return: (int) id of the word that is being tested or None if all the words were translated
+        """
+        if not self._queue:
+            return None
+        return self.card_ids[self._queue[0]]
+
+    def record(self, is_correct):
+        """
+        Records the answer to the word that is being tested and goes to the next word
+        :param is_correct: (bool)
+        :return: None
+        """
+        index = self._queue.popleft()
+        if self.round < self.number_of_rounds:
+            if is_correct:
+                self.scores[index] += 1
+                if self.scores[index] == self.number_of_rounds:
+                    self.learned.append(self.card_ids[index])
+            if self.round == self.number_of_rounds - 1 and self.scores[index] == 0:
+                self._missed.append(index)
+        elif not is_correct:
+            self._missed.append(index)
+        if not self._queue:
+            self._start_next_round()
+
+    def _start_next_round(self):
+        """
+        Queues all the words again or, after the last round, only the missed ones
+        :return: None
+        """
+        self.round += 1
+        if self.round < self.number_of_rounds:
+            self._queue.extend(self._shuffle(list(range(len(self.card_ids)))))
+            return
+        if self.round == self.number_of_rounds:
+            self.forgotten = [self.card_ids[index] for index in self._missed]
+        self._queue.extend(self._shuffle(self._missed))
+        self._missed = []
@@ -0,0 +1,354 @@
+from database import Database
+from flashcard import get_dictionary_entry, censor_example, use_dictionary_cache
+from enrichment_queue import NO_EXAMPLE
+from learning_session import LearningSession, MODES
+from learner_progress import LearnerProgress, load_learner_progress
+from review_log import ReviewLog
+import instrumentation
+import asyncio
+import re
+import signal
+import traceback
+import json
+import sys
+import os
+
+# Local JSON API serving many learners from one process. All the learners share the contents of one deck, but each of
+# them has their own stages and review schedules and can have one learning or revising session at a time:
+#   GET    /statistics                       numbers of flashcards in the stages of the deck and of active sessions
+#   GET    /learners/<name>/statistics       numbers of flashcards in the stages of the learner
+#   POST   /words                            {"english_word", optional "polish_words", "definition", "example"}
+#   POST   /learners/<name>/session          {"mode": "english", "polish" or "revising", optional "number_of_words"}
+#   GET    /learners/<name>/session          current word of the session
+#   DELETE /learners/<name>/session          abandons the session
+#   POST   /learners/<name>/answers          {"answer"}, feedback and the next word or the summary of the session
+# Usage: python server.py <data file or .db> [port]
+HOST = '127.0.0.1'
+PORT = 8080
+# Maximal number of connections waiting to be accepted
+BACKLOG = 1024
+# Maximal size of a request body in bytes
+MAX_BODY_SIZE = 64 * 1024
+# Names of learners are used as names of files with their progress
+LEARNER_NAME_PATTERN = re.compile(r'[A-Za-z0-9_-]{1,64}')
+REASONS = {200: 'OK', 201: 'Created', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           409: 'Conflict', 413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+
+def _format_response(status, data, keep_alive):
+    """
+    :param status: (int) HTTP status code
+    :param data: (dict) body of the response
+    :param keep_alive: (bool) False if the connection is closed after the response
+    :return: (bytes) HTTP response with the data as JSON
+    """
+    body = json.dumps(data, ensure_ascii=False).encode('utf8')
+    return (f'HTTP/1.1 {status} {REASONS[status]}\r\nContent-Type: application/json; charset=utf-8\r\n'
+            f'Content-Length: {len(body)}\r\nConnection: {"keep-alive" if keep_alive else "close"}\r\n\r\n'
+            ).encode('latin-1') + body
+
+
+def _describe_session(session):
+    """
+    :param session: (LearningSession)
+    :return: (dict) current word of the session or its summary if it's finished
+    """
+    if session.is_finished:
+        return {'summary': session.summary}
+    return {'mode': session.mode, 'round': session.round, 'question': session.question}
+
+
+class FlashcardServer:
+    """
+    Handles HTTP requests of learners. Requests are handled one by one in the event loop, so the database is used only
+    by one thread, except downloading words, which is done in a thread pool.
+    """
+    def __init__(self, database, progress_directory=None):
+        """
+        :param database: (Database or SqliteDatabase) deck shared by all the learners
+        :param progress_directory: (str) directory where progress of every learner is saved after each session, it's
+                                   kept only in memory when None, answers of the learners are logged there as well
+        """
+        self.database = database
+        self.progress_directory = progress_directory
+        self.sessions = {}  # Names of learners and their LearningSessions
+        self.progress = {}  # Names of learners and their LearnerProgress
+
+    def _get_progress_path(self, learner, extension='.progress'):
+        """
+        :param learner: (str) name of a learner
+        :param extension: (str) '.progress' for the progress of the learner or '.reviews' for the log of their answers
+        :return: (str) path to the file of the learner or None if it isn't saved
+        """
+        if self.progress_directory is None:
+            return None
+        return os.path.join(self.progress_directory, learner + extension)
+
+    def get_progress(self, learner):
+        """
+        :param learner: (str) name of a learner
+        :return: (LearnerProgress) progress of the learner, loaded when it's used for the first time
+        """
+        progress = self.progress.get(learner)
+        if progress is None:
+            progress_path = self._get_progress_path(learner)
+            if progress_path is None:
+                progress = LearnerProgress(self.database)
+            else:
+                progress = load_learner_progress(self.database, progress_path)
+            self.progress[learner] = progress
+        return progress
+
+    async def handle_connection(self, reader, writer):
+        """
+        Reads requests from the connection and writes responses until the client closes it
+        :param reader: (asyncio.StreamReader)
+        :param writer: (asyncio.StreamWriter)
+        :return: None
+        """
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                request_line, *header_lines = head.decode('latin-1').rstrip('\r\n').split('\r\n')
+                headers = {}
+                for line in header_lines:
+                    name, _, value = line.partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                try:
+                    method, target, version = request_line.split(' ')
+                    length = int(headers.get('content-length', 0))
+                except ValueError:
+                    writer.write(_format_response(400, {'error': 'Malformed request'}, False))
+                    break
+                if length > MAX_BODY_SIZE:
+                    writer.write(_format_response(413, {'error': 'Request body is too large'}, False))
+                    break
+                body = await reader.readexactly(length) if length else b''
+                try:
+                    status, data = await self.handle_request(method, target.split('?')[0], body)
+                except Exception:  # A bug in one request shouldn't leave the client without a response
+                    traceback.print_exc()
+                    status, data = 500, {'error': 'Internal server error'}
+                keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                writer.write(_format_response(status, data, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def handle_request(self, method, path, body):
+        """
+        :param method: (str) HTTP method
+        :param path: (str) path of the request
+        :param body: (bytes) JSON body of the request or an empty body
+        :return: (tuple) HTTP status code (int) and the body of the response (dict)
+        """
+        try:
+            data = json.loads(body) if body else {}
+        except ValueError:
+            return 400, {'error': 'The body is not valid JSON'}
+        if not isinstance(data, dict):
+            return 400, {'error': 'The body has to be a JSON object'}
+        parts = path.strip('/').split('/')
+        if parts == ['statistics']:
+            if method == 'GET':
+                return 200, self.get_statistics()
+        elif parts == ['words']:
+            if method == 'POST':
+                return await self.add_word(data)
+        elif len(parts) == 3 and parts[0] == 'learners' and not LEARNER_NAME_PATTERN.fullmatch(parts[1]):
+            return 400, {'error': f'Invalid name of a learner {parts[1]}'}
+        elif len(parts) == 3 and parts[0] == 'learners' and parts[2] == 'statistics':
+            if method == 'GET':
+                stages = [len(stage) for stage in self.get_progress(parts[1]).flashcards]
+                return 200, {'stages': stages, 'total': sum(stages)}
+        elif len(parts) == 3 and parts[0] == 'learners' and parts[2] == 'session':
+            if method == 'POST':
+                return self.start_session(parts[1], data)
+            elif method == 'GET':
+                session = self.sessions.get(parts[1])
+                if session is None:
+                    return 404, {'error': f'Learner {parts[1]} has no session'}
+                return 200, _describe_session(session)
+            elif method == 'DELETE':
+                if self._abandon_session(parts[1]) is None:
+                    return 404, {'error': f'Learner {parts[1]} has no session'}
+                return 200, {}
+        elif len(parts) == 3 and parts[0] == 'learners' and parts[2] == 'answers':
+            if method == 'POST':
+                return self.answer(parts[1], data)
+        else:
+            return 404, {'error': f'There is no resource {path}'}
+        return 405, {'error': f'Method {method} is not allowed for {path}'}
+
+    def get_statistics(self):
+        """
+        :return: (dict) numbers of flashcards in the stages, of all the flashcards and of active sessions and timings
+                 of operations if instrumentation is enabled
+        """
+        stages = [len(stage) for stage in self.database.flashcards]
+        statistics = {'stages': stages, 'total': sum(stages), 'sessions': len(self.sessions),
+                      'learners': len(self.progress)}
+        if instrumentation.ENABLED:
+            statistics['operations'] = instrumentation.get_statistics()
+        return statistics
+
+    async def add_word(self, data):
+        """
+        Adds a flashcard with the given translations, definition and example or, if there are no translations, with
+        the ones from the online dictionary
+        :param data: (dict) body of the request
+        :return: (tuple) HTTP status code (int) and the body of the response (dict)
+        """
+        english_word = data.get('english_word')
+        if not isinstance(english_word, str) or not english_word.strip():
+            return 400, {'error': 'english_word is required'}
+        if self.database.get_flashcard(english_word) is not None:
+            return 409, {'error': f'A flashcard with the word {english_word} already exists'}
+        if 'polish_words' in data:
+            polish_words = data['polish_words']
+            if isinstance(polish_words, str):
+                polish_words = [polish_words]
+            if not isinstance(polish_words, list) or not polish_words \
+                    or not all(isinstance(polish_word, str) and polish_word.strip() for polish_word in polish_words):
+                return 400, {'error': 'polish_words has to be a non-empty string or a non-empty list of them'}
+            definition, example = data.get('definition', ''), data.get('example', NO_EXAMPLE)
+            if not isinstance(definition, str) or not isinstance(example, str):
+                return 400, {'error': 'definition and example have to be strings'}
+        else:
+            try:
+                polish_words, definition, examples = await asyncio.get_running_loop().run_in_executor(
+                    None, get_dictionary_entry, english_word)
+            except Exception:
+                return 404, {'error': f'Word {english_word} cannot be downloaded'}
+            example = censor_example(examples[0], english_word) if examples else NO_EXAMPLE
+        if not self.database.add_flashcard(english_word, '/'.join(polish_words), definition, example):
+            return 409, {'error': f'A flashcard with the word {english_word} already exists'}
+        return 201, {'english_word': english_word, 'polish_words': polish_words, 'definition': definition,
+                     'example': example}
+
+    def start_session(self, learner, data):
+        """
+        Starts a new session of the learner, the previous one is abandoned
+        :param learner: (str) name of the learner
+        :param data: (dict) body of the request
+        :return: (tuple) HTTP status code (int) and the body of the response (dict)
+        """
+        mode = data.get('mode')
+        number_of_words = data.get('number_of_words')
+        if mode not in MODES:
+            return 400, {'error': f'mode has to be one of: {", ".join(MODES)}'}
+        if number_of_words is not None and (not isinstance(number_of_words, int) or isinstance(number_of_words, bool)
+                                            or number_of_words < 1):
+            return 400, {'error': 'number_of_words has to be a positive integer'}
+        self._abandon_session(learner)
+        review_log_path = self._get_progress_path(learner, '.reviews')
+        session = LearningSession(self.get_progress(learner), mode, number_of_words,
+                                  review_log=None if review_log_path is None else ReviewLog(review_log_path))
+        if session.is_finished:
+            return 409, {'error': 'There are no words to learn'}
+        self.sessions[learner] = session
+        return 201, dict(_describe_session(session), words=len(session))
+
+    def answer(self, learner, data):
+        """
+        :param learner: (str) name of the learner
+        :param data: (dict) body of the request
+        :return: (tuple) HTTP status code (int) and the body of the response (dict) with feedback and the next word
+                 or the summary of the finished session
+        """
+        session = self.sessions.get(learner)
+        if session is None:
+            return 404, {'error': f'Learner {learner} has no session'}
+        answer = data.get('answer')
+        if not isinstance(answer, str):
+            return 400, {'error': 'answer is required'}
+        feedback = session.answer(answer)
+        if session.is_finished:
+            del self.sessions[learner]
+            progress_path = self._get_progress_path(learner)
+            if progress_path is not None:
+                self.get_progress(learner).save(progress_path)
+        return 200, dict(feedback, **_describe_session(session))
+
+    def _abandon_session(self, learner):
+        """
+        Ends the session of the learner without finishing it, its logged answers are kept
+        :param learner: (str) name of the learner
+        :return: (LearningSession) abandoned session or None if the learner had no session
+        """
+        session = self.sessions.pop(learner, None)
+        if session is not None and session.review_log is not None:
+            session.review_log.flush()
+        return session
+
+    def close(self):
+        """
+        Appends the logged answers of unfinished sessions to the files of the learners
+        :return: None
+        """
+        for session in self.sessions.values():
+            if session.review_log is not None:
+                session.review_log.flush()
+
+
+async def serve(database, progress_directory=None, host=HOST, port=PORT):
+    """
+    Serves the database until the process is interrupted or terminated
+    :param database: (Database or SqliteDatabase)
+    :param progress_directory: (str) directory with progress of the learners or None
+    :param host: (str)
+    :param port: (int)
+    :return: None
+    """
+    server = FlashcardServer(database, progress_directory)
+    loop = asyncio.get_running_loop()
+    stopped = loop.create_future()
+    try:
+        loop.add_signal_handler(signal.SIGTERM, stopped.set_result, None)
+    except (NotImplementedError, AttributeError):  # There are no signal handlers on Windows
+        pass
+    try:
+        async with await asyncio.start_server(server.handle_connection, host, port, backlog=BACKLOG):
+            print(f'Serving on http://{host}:{port}', flush=True)
+            await stopped
+    finally:
+        server.close()
+
+
+def main():
+    """
+    Loads the database given as an argument, serves it and saves it when the server is stopped. Progress of
+    the learners is saved in a directory next to the database.
+    :return: None
+    """
+    if len(sys.argv) < 2:
+        print('Usage: python server.py <data file or .db> [port]')
+        sys.exit(1)
+    file_path = sys.argv[1]
+    port = int(sys.argv[2]) if len(sys.argv) > 2 else PORT
+    if file_path.endswith('.db'):
+        from sqlite_database import SqliteDatabase
+        database = SqliteDatabase(file_path)
+    else:
+        database = Database(file_path)
+    from dictionary_cache import DictionaryCache
+    use_dictionary_cache(DictionaryCache(os.path.join(os.path.dirname(file_path), 'dictionary_cache.db')))
+    progress_directory = file_path + '.learners'
+    os.makedirs(progress_directory, exist_ok=True)
+    try:
+        asyncio.run(serve(database, progress_directory, port=port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        database.close()
+
+
+if __name__ == '__main__':
+    main()
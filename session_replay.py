@@ -0,0 +1,135 @@
+from database import Database
+from learner_progress import LearnerProgress
+from learning_session import LearningSession, MODES, LEARNING_POLISH
+from collections import deque
+import random
+import time
+import sys
+
+# Answer given instead of a correct one, it's never accepted
+WRONG_ANSWER = ''
+
+
+def load_recording(file_path):
+    """
+    :param file_path: (str) file with answers recorded by main.py, a word and an answer separated by a tab in each line
+    :return: dictionary where a key is a tested word and a value is a deque of its answers in the recorded order
+    """
+    recording = {}
+    with open(file_path, encoding='utf8') as file:
+        for line in file:
+            question, _, answer = line.rstrip('\n').partition('\t')
+            recording.setdefault(question, deque()).append(answer)
+    return recording
+
+
+class SimulatedAnswers:
+    """
+    Translates words correctly with the given probability and incorrectly otherwise
+    """
+    def __init__(self, correct_ratio=1.0, generator=random):
+        """
+        :param correct_ratio: (float) probability of a correct answer, greater than 0, so every session ends
+        :param generator: (random.Random)
+        """
+        if not 0 < correct_ratio <= 1:
+            raise ValueError('correct_ratio has to be in (0, 1]')
+        self.correct_ratio = correct_ratio
+        self.generator = generator
+
+    def __call__(self, session):
+        """
+        :param session: (LearningSession)
+        :return: (str) answer to the current word of the session
+        """
+        if self.generator.random() >= self.correct_ratio:
+            return WRONG_ANSWER
+        if session.mode == LEARNING_POLISH:
+            return session.flashcard.english_word
+        return session.flashcard.polish_words[0]
+
+
+class RecordedAnswers:
+    """
+    Answers words with answers recorded by main.py. Words are tested in a random order, so the answers are given by
+    the words, not by their positions in the recording. When there are no more recorded answers for a word, it's
+    answered by the fallback.
+    """
+    def __init__(self, recording, fallback=None):
+        """
+        :param recording: (dict) recording returned by load_recording, its answers are used up
+        :param fallback: function that takes a session and returns an answer, SimulatedAnswers() by default
+        """
+        self.recording = recording
+        self.fallback = SimulatedAnswers() if fallback is None else fallback
+
+    def __call__(self, session):
+        """
+        :param session: (LearningSession)
+        :return: (str) answer to the current word of the session
+        """
+        answers = self.recording.get(session.question)
+        if answers:
+            return answers.popleft()
+        return self.fallback(session)
+
+
+def replay_session(session, get_answer):
+    """
+    Answers the words of the session at full speed until it's finished
+    :param session: (LearningSession)
+    :param get_answer: function that takes the session and returns an answer to its current word
+    :return: (int) number of answers
+    """
+    number_of_answers = 0
+    while not session.is_finished:
+        session.answer(get_answer(session))
+        number_of_answers += 1
+    return number_of_answers
+
+
+def replay_sessions(database, mode, number_of_sessions, get_answer, number_of_words=None, generator=random):
+    """
+    Replays sessions one after another, each of them starts where the previous one finished
+    :param database: (Database, SqliteDatabase or LearnerProgress)
+    :param mode: (str) mode of the sessions, one of learning_session.MODES
+    :param number_of_sessions: (int)
+    :param get_answer: function that takes a session and returns an answer to its current word
+    :param number_of_words: (int) number of words in a session, all the words of the stage by default
+    :param generator: (random.Random) generator used by the sessions
+    :return: (tuple) number of answers (int) and time of all the sessions in seconds (float)
+    """
+    number_of_answers = 0
+    start = time.perf_counter()
+    for _ in range(number_of_sessions):
+        number_of_answers += replay_session(LearningSession(database, mode, number_of_words, generator), get_answer)
+    return number_of_answers, time.perf_counter() - start
+
+
+def main():
+    """
+    Replays sessions of a new learner of the deck given as an argument. The sessions don't change the flashcards of the
+    deck, but the deck is opened like by the app, so its snapshot may be written and its journal is compacted into the
+    data file when it's closed.
+    :return: None
+    """
+    if len(sys.argv) < 4 or sys.argv[2] not in MODES:
+        print(f'Usage: python session_replay.py <data file> <{"|".join(MODES)}> <number of sessions> '
+              f'[number of words] [recorded answers]')
+        sys.exit(1)
+    number_of_sessions = int(sys.argv[3])
+    number_of_words = int(sys.argv[4]) if len(sys.argv) > 4 else None
+    get_answer = RecordedAnswers(load_recording(sys.argv[5])) if len(sys.argv) > 5 else SimulatedAnswers(0.8)
+    database = Database(sys.argv[1])
+    progress = LearnerProgress(database)
+    number_of_answers, replay_time = replay_sessions(progress, sys.argv[2], number_of_sessions, get_answer,
+                                                     number_of_words)
+    print(f'{number_of_sessions} sessions, {number_of_answers} answers in {replay_time:.3f}s '
+          f'({number_of_sessions / replay_time:.1f} sessions per second, '
+          f'{number_of_answers / replay_time:.0f} answers per second)')
+    print(f'Flashcards of the learner in the stages: {", ".join(str(len(stage)) for stage in progress.flashcards)}')
+    database.close()
+
+
+if __name__ == '__main__':
+    main()
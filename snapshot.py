@@ -0,0 +1,414 @@
+from flashcard import Flashcard
+from stage import Stage
+from collections import OrderedDict
+from array import array
+import threading
+import struct
+import mmap
+import sys
+import gc
+import os
+
+MAGIC = b'FLASHSNP'
+VERSION = 2
+# Magic, version, size and modification time (ns) of the data file, number of flashcards in each stage and number of
+# polish words of all the flashcards. The header is followed by arrays of ids, intervals, eases, due times, numbers of
+# polish words and positions of the polish words in their table, by tables of english words and distinct polish words,
+# by an array of positions of definitions in their table and by tables of distinct definitions and examples, which are
+# read only when needed. Flashcards are saved stage after stage.
+HEADER = struct.Struct('<8sIqqIIII')
+LENGTH = struct.Struct('<Q')
+POSITION = struct.Struct('<I')
+OFFSETS = struct.Struct('<QQ')
+# Number of flashcards whose definitions and examples are kept in memory after reading
+TEXTS_CACHE_SIZE = 128
+
+
+def _get_data_file_signature(data_file_path):
+    """
+    :param data_file_path: (str)
+    :return: (tuple) size and modification time of the data file, the snapshot is valid only for the same signature
+    """
+    stat = os.stat(data_file_path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _pack_strings(strings):
+    """
+    Joins the strings into a length-prefixed table of null-terminated strings
+    :param strings: list of strings (str)
+    :return: (bytes)
+    """
+    data = ''.join(string + '\0' for string in strings).encode('utf8')
+    if data.count(0) != len(strings):
+        raise ValueError('Strings in a snapshot cannot contain null characters')
+    return LENGTH.pack(len(data)) + data
+
+
+def _pack_indexed_strings(strings):
+    """
+    Joins the strings into a table of strings that can be read one by one: number of the strings, offsets of their
+    starts and of the end of the last one and the strings
+    :param strings: list of strings (str)
+    :return: (bytes)
+    """
+    encoded_strings = [string.encode('utf8') for string in strings]
+    offsets = array('Q', [0])
+    for encoded_string in encoded_strings:
+        offsets.append(offsets[-1] + len(encoded_string))
+    return LENGTH.pack(len(strings)) + offsets.tobytes() + b''.join(encoded_strings)
+
+
+def _unpack_strings(data, offset):
+    """
+    :param data: (mmap) content of the snapshot
+    :param offset: (int) offset of the table of strings
+    :return: list of strings (str)
+    """
+    length, = LENGTH.unpack_from(data, offset)
+    offset += LENGTH.size
+    return data[offset:offset + length - 1].decode('utf8').split('\0') if length else []
+
+
+def _unpack_array(data, offset, typecode, length):
+    """
+    :param data: (mmap) content of the snapshot
+    :param offset: (int) offset of the array
+    :param typecode: (str) type of the elements of the array
+    :param length: (int) number of the elements
+    :return: array
+    """
+    values = array(typecode)
+    values.frombytes(data[offset:offset + length * values.itemsize])
+    return values
+
+
+def _get_positions(strings, table):
+    """
+    :param strings: iterable of strings (str)
+    :param table: (dict) distinct strings (str) and their positions (int), new strings are added to it
+    :return: array of positions of the strings in the table
+    """
+    return array('I', [table.setdefault(string, len(table)) for string in strings])
+
+
+def _read_layout(data):
+    """
+    :param data: (mmap) content of the snapshot
+    :return: (dict) values from the header and offsets of all the parts of the snapshot
+    """
+    magic, version, size, modification_time, *stage_lengths, number_of_polish_words = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError('Not a snapshot of the current version')
+    number_of_flashcards = sum(stage_lengths)
+    layout = {'signature': (size, modification_time), 'stage_lengths': stage_lengths,
+              'number_of_flashcards': number_of_flashcards, 'number_of_polish_words': number_of_polish_words}
+    offset = HEADER.size
+    for name, item_size, length in (('card_ids', 8, number_of_flashcards), ('intervals', 8, number_of_flashcards),
+                                    ('eases', 8, number_of_flashcards), ('dues', 8, number_of_flashcards),
+                                    ('polish_word_counts', 4, number_of_flashcards),
+                                    ('polish_word_positions', 4, number_of_polish_words)):
+        layout[name] = offset
+        offset += item_size * length
+    for name in ('english_words', 'polish_words'):
+        layout[name] = offset
+        offset += LENGTH.size + LENGTH.unpack_from(data, offset)[0]
+    layout['definition_positions'] = offset
+    offset += POSITION.size * number_of_flashcards
+    for name in ('definitions', 'examples'):
+        number_of_strings, = LENGTH.unpack_from(data, offset)
+        layout[name] = offset + LENGTH.size  # Offsets of the strings
+        offset = layout[name] + LENGTH.size * (number_of_strings + 1)
+        layout[name + '_data'] = offset
+        offset += LENGTH.unpack_from(data, offset - LENGTH.size)[0]
+    if offset != len(data):
+        raise ValueError('Snapshot is damaged')
+    return layout
+
+
+class SnapshotTexts:
+    """
+    Definitions and examples of the flashcards loaded from a snapshot. The snapshot is memory-mapped, so they are read
+    from the file only when a flashcard is shown and only the recently shown ones are kept in memory. The snapshot can
+    be replaced by another thread, while flashcards are shown.
+    """
+    def __init__(self, file_path):
+        """
+        :param file_path: (str) path to the snapshot
+        """
+        self.file_path = file_path
+        self._cache = OrderedDict()  # Ids of the recently shown flashcards and their definitions and examples
+        self._lock = threading.Lock()  # Texts cannot be read while the snapshot is being replaced
+        self.open()
+
+    def open(self):
+        """
+        Maps the snapshot to memory
+        :return: None
+        """
+        with open(self.file_path, 'rb') as file:
+            self.data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self.layout = _read_layout(self.data)
+        except (ValueError, struct.error):
+            self.data.close()
+            raise
+        card_ids = _unpack_array(self.data, self.layout['card_ids'], 'q', self.layout['number_of_flashcards'])
+        # Rows of the flashcards in the snapshot by their ids
+        self._rows = array('I', bytes(POSITION.size * (max(card_ids, default=-1) + 1)))
+        for row, card_id in enumerate(card_ids):
+            self._rows[card_id] = row
+
+    def close(self):
+        """
+        Unmaps the snapshot, it has to be done before the snapshot is replaced
+        :return: None
+        """
+        self._cache.clear()
+        self.data.close()
+
+    def replace(self, new_file_path):
+        """
+        Replaces the snapshot with a new one and maps it to memory, the new snapshot has to contain all the flashcards
+        that use these texts
+        :param new_file_path: (str) path to the new snapshot, which is renamed to self.file_path
+        :return: None
+        """
+        with self._lock:
+            self.close()  # A mapped file cannot be replaced on Windows
+            try:
+                os.replace(new_file_path, self.file_path)
+            finally:  # If the snapshot wasn't replaced, the flashcards can still use the previous one
+                self.open()
+
+    def _read_string(self, table, index):
+        """
+        :param table: (str) name of a table of strings that can be read one by one
+        :param index: (int) index of the string in the table
+        :return: (str)
+        """
+        start, end = OFFSETS.unpack_from(self.data, self.layout[table] + LENGTH.size * index)
+        data_offset = self.layout[table + '_data']
+        return self.data[data_offset + start:data_offset + end].decode('utf8')
+
+    def _read_table(self, table):
+        """
+        :param table: (str) name of a table of strings that can be read one by one
+        :return: list of all the strings (str) in the table
+        """
+        number_of_strings, = LENGTH.unpack_from(self.data, self.layout[table] - LENGTH.size)
+        offsets = _unpack_array(self.data, self.layout[table], 'Q', number_of_strings + 1)
+        data_offset = self.layout[table + '_data']
+        data = self.data[data_offset:data_offset + offsets[-1]]
+        return [data[start:end].decode('utf8') for start, end in zip(offsets, offsets[1:])]
+
+    def read_texts(self, card_ids):
+        """
+        Reads definitions and examples of many flashcards at once, straight from the tables without the cache, what is
+        much faster than reading them one by one when all the flashcards are saved
+        :param card_ids: list of ids of flashcards from the snapshot
+        :return: (tuple) lists of definitions (str) and examples (str) of the flashcards
+        """
+        with self._lock:
+            definitions = self._read_table('definitions')
+            examples = self._read_table('examples')
+            definition_positions = _unpack_array(self.data, self.layout['definition_positions'], 'I',
+                                                 self.layout['number_of_flashcards'])
+            rows = [self._rows[card_id] for card_id in card_ids]
+        return [definitions[definition_positions[row]] for row in rows], [examples[row] for row in rows]
+
+    def _get_texts(self, card_id):
+        """
+        :param card_id: (int) id of a flashcard from the snapshot
+        :return: (tuple) definition (str) and example (str) of the flashcard
+        """
+        with self._lock:
+            texts = self._cache.get(card_id)
+            if texts is not None:
+                self._cache.move_to_end(card_id)
+                return texts
+            row = self._rows[card_id]
+            definition_position, = POSITION.unpack_from(self.data, self.layout['definition_positions']
+                                                         + POSITION.size * row)
+            texts = self._read_string('definitions', definition_position), self._read_string('examples', row)
+            self._cache[card_id] = texts
+            if len(self._cache) > TEXTS_CACHE_SIZE:
+                self._cache.popitem(last=False)
+            return texts
+
+    def get_definition(self, card_id):
+        """
+        :param card_id: (int) id of a flashcard from the snapshot
+        :return: (str)
+        """
+        return self._get_texts(card_id)[0]
+
+    def get_example(self, card_id):
+        """
+        :param card_id: (int) id of a flashcard from the snapshot
+        :return: (str)
+        """
+        return self._get_texts(card_id)[1]
+
+
+def copy_flashcards(stages):
+    """
+    Copies all the fields of the flashcards to columns, which are written to the data file and to the snapshot, so
+    the flashcards can be changed while they are saved. Definitions and examples that aren't in memory are None until
+    read_lazy_texts copies them from the snapshot.
+    :param stages: list of 3 Stages
+    :return: (dict) 'stage_lengths', lists of the 'flashcards' and of their 'card_ids', 'english_words',
+             'polish_words', 'definitions', 'examples', 'intervals', 'eases' and 'dues' and 'lazy_positions' of
+             the flashcards with texts in the snapshot
+    """
+    flashcards = [flashcard for stage in stages for flashcard in stage]
+    definitions, examples = [], []
+    lazy_positions = []
+    for position, flashcard in enumerate(flashcards):
+        definition, example = flashcard.get_texts_in_memory()
+        definitions.append(definition)
+        examples.append(example)
+        if definition is None or example is None:
+            lazy_positions.append(position)
+    return {'stage_lengths': [len(stage) for stage in stages], 'flashcards': flashcards,
+            'lazy_positions': lazy_positions,
+            'card_ids': [flashcard.card_id for flashcard in flashcards],
+            'english_words': [flashcard.english_word for flashcard in flashcards],
+            'polish_words': [flashcard.polish_words for flashcard in flashcards],  # Database never changes these lists
+            'definitions': definitions, 'examples': examples,
+            'intervals': [flashcard.interval for flashcard in flashcards],
+            'eases': [flashcard.ease for flashcard in flashcards], 'dues': [flashcard.due for flashcard in flashcards]}
+
+
+def read_lazy_texts(flashcards, texts):
+    """
+    Fills in the definitions and examples of the copied flashcards that are read from the snapshot. They are copied
+    from its tables all at once, what is much faster than reading them one by one through the cache of SnapshotTexts.
+    :param flashcards: (dict) copy of the flashcards returned by copy_flashcards
+    :param texts: (SnapshotTexts) texts of the snapshot the flashcards were loaded from
+    :return: None
+    """
+    lazy_positions = flashcards['lazy_positions']
+    if not lazy_positions:
+        return
+    definitions, examples = flashcards['definitions'], flashcards['examples']
+    lazy_definitions, lazy_examples = texts.read_texts([flashcards['card_ids'][position]
+                                                        for position in lazy_positions])
+    for position, definition, example in zip(lazy_positions, lazy_definitions, lazy_examples):
+        if definitions[position] is None:
+            definitions[position] = definition
+        if examples[position] is None:
+            examples[position] = example
+
+
+def load_texts_lazily(flashcards, texts):
+    """
+    From now on definitions and examples of the copied flashcards are read from the snapshot, except the ones that
+    were changed after the flashcards were copied
+    :param flashcards: (dict) copy of the flashcards returned by copy_flashcards that was written to the snapshot
+    :param texts: (SnapshotTexts) texts of the snapshot
+    :return: None
+    """
+    for flashcard, definition, example in zip(flashcards['flashcards'], flashcards['definitions'],
+                                              flashcards['examples']):
+        definition_in_memory, example_in_memory = flashcard.get_texts_in_memory()
+        if definition_in_memory in (None, definition) and example_in_memory in (None, example):
+            flashcard.load_texts_lazily(texts)
+
+
+def write_snapshot(file_path, data_file_path, flashcards, texts=None):
+    """
+    Saves the flashcards to a binary snapshot of the data file. The snapshot is written to a temporary file first
+    and then renamed, so an existing snapshot is never corrupted. Flashcards that read their texts from the previous
+    snapshot read them from the new one, load_texts_lazily switches the other ones to it.
+    :param file_path: (str) path to the snapshot
+    :param data_file_path: (str) path to the data file with the same flashcards
+    :param flashcards: (dict) copy of the flashcards returned by copy_flashcards with all the texts
+    :param texts: (SnapshotTexts) texts of the previous snapshot of the flashcards or None, they are switched to the new
+                  snapshot
+    :return: (SnapshotTexts) texts of the new snapshot
+    """
+    size, modification_time = _get_data_file_signature(data_file_path)
+    polish_words, definitions = {}, {}
+    polish_word_positions = _get_positions(
+        (polish_word for words in flashcards['polish_words'] for polish_word in words), polish_words)
+    parts = [HEADER.pack(MAGIC, VERSION, size, modification_time, *flashcards['stage_lengths'],
+                         len(polish_word_positions)),
+             array('q', flashcards['card_ids']).tobytes(),
+             array('q', flashcards['intervals']).tobytes(),
+             array('d', flashcards['eases']).tobytes(),
+             array('d', flashcards['dues']).tobytes(),
+             array('I', [len(words) for words in flashcards['polish_words']]).tobytes(),
+             polish_word_positions.tobytes(),
+             _pack_strings(flashcards['english_words']),
+             _pack_strings(list(polish_words)),
+             _get_positions(flashcards['definitions'], definitions).tobytes(),
+             _pack_indexed_strings(list(definitions)),
+             _pack_indexed_strings(flashcards['examples'])]
+    temporary_path = file_path + '.tmp'
+    with open(temporary_path, 'wb') as file:
+        file.writelines(parts)
+    if texts is None:
+        os.replace(temporary_path, file_path)
+        texts = SnapshotTexts(file_path)
+    else:
+        texts.replace(temporary_path)
+    return texts
+
+
+def read_snapshot(file_path, data_file_path):
+    """
+    :param file_path: (str) path to the snapshot
+    :param data_file_path: (str) path to the data file
+    :return: (tuple) list of 3 Stages and their SnapshotTexts or None if there is no valid snapshot of the current data
+             file
+    """
+    try:
+        texts = SnapshotTexts(file_path)
+    except (OSError, ValueError, struct.error):
+        return None
+    try:
+        is_valid = texts.layout['signature'] == _get_data_file_signature(data_file_path)
+    except OSError:
+        is_valid = False
+    if not is_valid:
+        texts.close()
+        return None
+    data, layout = texts.data, texts.layout
+    number_of_flashcards = layout['number_of_flashcards']
+    card_ids = _unpack_array(data, layout['card_ids'], 'q', number_of_flashcards)
+    intervals = _unpack_array(data, layout['intervals'], 'q', number_of_flashcards)
+    eases = _unpack_array(data, layout['eases'], 'd', number_of_flashcards)
+    dues = _unpack_array(data, layout['dues'], 'd', number_of_flashcards)
+    polish_word_counts = _unpack_array(data, layout['polish_word_counts'], 'I', number_of_flashcards)
+    polish_word_positions = _unpack_array(data, layout['polish_word_positions'], 'I',
+                                          layout['number_of_polish_words'])
+    english_words = _unpack_strings(data, layout['english_words'])
+    # Only one copy of each polish word is kept, like when they are loaded from the data file
+    polish_words = [sys.intern(polish_word) for polish_word in _unpack_strings(data, layout['polish_words'])]
+
+    stages = [Stage(), Stage(), Stage()]
+    start = 0
+    polish_word_start = 0
+    # Millions of new objects would start many useless garbage collections, the flashcards don't have reference cycles
+    is_gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for stage, stage_length in zip(stages, layout['stage_lengths']):
+            for i in range(start, start + stage_length):
+                # The fields are already parsed, so the flashcard is created without __init__
+                flashcard = Flashcard.__new__(Flashcard)
+                flashcard.card_id, flashcard.interval, flashcard.ease, flashcard.due \
+                    = card_ids[i], intervals[i], eases[i], dues[i]
+                flashcard.english_word = english_words[i]
+                polish_word_end = polish_word_start + polish_word_counts[i]
+                flashcard.polish_words = [polish_words[position]
+                                          for position in polish_word_positions[polish_word_start:polish_word_end]]
+                polish_word_start = polish_word_end
+                flashcard.load_texts_lazily(texts)
+                stage.add(flashcard)
+            start += stage_length
+    finally:
+        if is_gc_enabled:
+            gc.enable()
+    return stages, texts
@@ -0,0 +1,493 @@
+from flashcard import Flashcard, create_flashcards_from_online_dictionary
+from flashcard_creation_error import FlashcardCreationError
+from database import Database
+from scheduler import review
+from trigram_index import TrigramIndex
+from instrumentation import instrumented
+from enrichment_queue import is_missing_text
+import sqlite3
+import sys
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS flashcards (
+    id INTEGER PRIMARY KEY,
+    english_word TEXT NOT NULL UNIQUE,
+    polish_words TEXT NOT NULL,
+    definition TEXT NOT NULL,
+    example TEXT NOT NULL,
+    stage INTEGER NOT NULL,
+    interval INTEGER NOT NULL DEFAULT 0,
+    ease REAL NOT NULL DEFAULT 2.5,
+    due REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS flashcards_stage ON flashcards (stage, id);
+CREATE TABLE IF NOT EXISTS polish_words (
+    polish_word TEXT NOT NULL,
+    card_id INTEGER NOT NULL REFERENCES flashcards (id) ON DELETE CASCADE
+);
+CREATE INDEX IF NOT EXISTS polish_words_polish_word ON polish_words (polish_word);
+CREATE INDEX IF NOT EXISTS polish_words_card_id ON polish_words (card_id);
+'''
+# Columns added to databases created before review schedules were introduced
+SCHEDULE_COLUMNS = {
+    'interval': 'INTEGER NOT NULL DEFAULT 0',
+    'ease': 'REAL NOT NULL DEFAULT 2.5',
+    'due': 'REAL NOT NULL DEFAULT 0',
+}
+COLUMNS = 'id, english_word, polish_words, definition, example, interval, ease, due'
+
+
+def _create_flashcard_from_row(row):
+    """
+    :param row: (tuple) values of COLUMNS
+    :return: (Flashcard)
+    """
+    flashcard = Flashcard(row[1], row[2], row[3], row[4])
+    flashcard.card_id = row[0]
+    flashcard.interval, flashcard.ease, flashcard.due = row[5], row[6], row[7]
+    return flashcard
+
+
+def _connect(file_path):
+    """
+    :param file_path: (str) path to the SQLite database file
+    :return: (sqlite3.Connection) connection to the database with created tables
+    """
+    connection = sqlite3.connect(file_path)
+    connection.execute('PRAGMA journal_mode = WAL')
+    connection.execute('PRAGMA synchronous = NORMAL')
+    connection.execute('PRAGMA foreign_keys = ON')
+    connection.executescript(SCHEMA)
+    existing_columns = {row[1] for row in connection.execute('PRAGMA table_info(flashcards)')}
+    for name, definition in SCHEDULE_COLUMNS.items():
+        if name not in existing_columns:
+            connection.execute(f'ALTER TABLE flashcards ADD COLUMN {name} {definition}')
+    connection.execute('CREATE INDEX IF NOT EXISTS flashcards_stage_due ON flashcards (stage, due)')
+    return connection
+
+
+def migrate_from_csv(csv_path, sqlite_path):
+    """
+    Copies all the flashcards from the data file (and its journal) to a new SQLite database. The data file is closed
+    like by the app, so its journal is compacted into it.
+    :param csv_path: (str) path to the semicolon separated data file
+    :param sqlite_path: (str) path to the SQLite database file
+    :return: (int) number of migrated flashcards
+    """
+    database = Database(csv_path)
+    try:
+        connection = _connect(sqlite_path)
+        number_of_flashcards = 0
+        with connection:
+            for stage_number, stage in enumerate(database.flashcards, start=1):
+                connection.executemany(
+                    'INSERT INTO flashcards (id, english_word, polish_words, definition, example, stage, interval, '
+                    'ease, due) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    ((flashcard.card_id, flashcard.english_word, '/'.join(flashcard.polish_words),
+                      flashcard.definition, flashcard.example, stage_number, flashcard.interval, flashcard.ease,
+                      flashcard.due) for flashcard in stage))
+                connection.executemany(
+                    'INSERT INTO polish_words (polish_word, card_id) VALUES (?, ?)',
+                    ((polish_word, flashcard.card_id) for flashcard in stage for polish_word in flashcard.polish_words))
+                number_of_flashcards += len(stage)
+        connection.close()
+    finally:
+        # Stops the background writer and unmaps the snapshot, the texts are already copied
+        database.close()
+    return number_of_flashcards
+
+
+class SqliteStage:
+    """
+    Flashcards of one learning stage read from the database only when they are needed, has the same interface as Stage
+    """
+    def __init__(self, connection, stage):
+        self._connection = connection
+        self._stage = stage
+
+    def __len__(self):
+        return self._connection.execute('SELECT COUNT(*) FROM flashcards WHERE stage = ?', (self._stage,)).fetchone()[0]
+
+    def __iter__(self):
+        cursor = self._connection.execute(f'SELECT {COLUMNS} FROM flashcards WHERE stage = ? ORDER BY id',
+                                          (self._stage,))
+        return map(_create_flashcard_from_row, cursor)
+
+    def __contains__(self, flashcard):
+        return self._connection.execute('SELECT 1 FROM flashcards WHERE id = ? AND stage = ?',
+                                        (flashcard.card_id, self._stage)).fetchone() is not None
+
+    def __getitem__(self, card_id):
+        row = self._connection.execute(f'SELECT {COLUMNS} FROM flashcards WHERE id = ? AND stage = ?',
+                                       (card_id, self._stage)).fetchone()
+        if row is None:
+            raise KeyError(card_id)
+        return _create_flashcard_from_row(row)
+
+    def ids(self):
+        """
+        :return: list of ids of the flashcards in the stage
+        """
+        return [row[0] for row in self._connection.execute('SELECT id FROM flashcards WHERE stage = ? ORDER BY id',
+                                                           (self._stage,))]
+
+
+class SqliteDatabase:
+    """
+    Database of flashcards stored in a SQLite file, has the same interface as Database. Every modification is
+    a separate transaction, so there is nothing to be saved at the end.
+    """
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.connection = _connect(file_path)
+        self.first_stage_flashcards, self.second_stage_flashcards, self.third_stage_flashcards \
+            = (SqliteStage(self.connection, stage) for stage in (1, 2, 3))
+        self.flashcards = [self.first_stage_flashcards, self.second_stage_flashcards, self.third_stage_flashcards]
+        # Index of english and polish words for finding misspelt words, built when it is used for the first time
+        self._trigram_index = None
+
+    def _update_trigram_index(self, removed_words, added_words):
+        """
+        :param removed_words: list of english and polish words (str) removed from the database
+        :param added_words: list of english and polish words (str) added to the database
+        :return: None
+        """
+        if self._trigram_index is not None:
+            for word in removed_words:
+                self._trigram_index.remove(word)
+            for word in added_words:
+                self._trigram_index.add(word)
+
+    def _move(self, list_of_ids, originate_stage, destination_stage):
+        """
+        :param list_of_ids: list of ids of flashcards in the originate stage
+        :param originate_stage: (int)
+        :param destination_stage: (int)
+        :return: None
+        """
+        with self.connection:
+            self.connection.executemany('UPDATE flashcards SET stage = ? WHERE id = ? AND stage = ?',
+                                        ((destination_stage, card_id, originate_stage) for card_id in list_of_ids))
+
+    def _update_polish_words(self, flashcard):
+        """
+        Saves changed polish words of the flashcard
+        :param flashcard: (Flashcard)
+        :return: None
+        """
+        with self.connection:
+            old_words = [row[0] for row in self.connection.execute(
+                'SELECT polish_word FROM polish_words WHERE card_id = ?', (flashcard.card_id,))]
+            self.connection.execute('UPDATE flashcards SET polish_words = ? WHERE id = ?',
+                                    ('/'.join(flashcard.polish_words), flashcard.card_id))
+            self.connection.execute('DELETE FROM polish_words WHERE card_id = ?', (flashcard.card_id,))
+            self.connection.executemany('INSERT INTO polish_words (polish_word, card_id) VALUES (?, ?)',
+                                        ((polish_word, flashcard.card_id) for polish_word in flashcard.polish_words))
+        self._update_trigram_index(old_words, flashcard.polish_words)
+
+    def _insert_flashcards(self, flashcards):
+        """
+        Adds the flashcards to the first stage in one transaction and gives them ids
+        :param flashcards: list of Flashcards
+        :return: None
+        """
+        with self.connection:
+            for flashcard in flashcards:
+                flashcard.card_id = self.connection.execute(
+                    'INSERT INTO flashcards (english_word, polish_words, definition, example, stage) '
+                    'VALUES (?, ?, ?, ?, 1)',
+                    (flashcard.english_word, '/'.join(flashcard.polish_words), flashcard.definition,
+                     flashcard.example)).lastrowid
+                self.connection.executemany('INSERT INTO polish_words (polish_word, card_id) VALUES (?, ?)',
+                                            ((polish_word, flashcard.card_id) for polish_word in flashcard.polish_words))
+        for flashcard in flashcards:
+            self._update_trigram_index([], [flashcard.english_word] + flashcard.polish_words)
+
+    @instrumented
+    def move_to_higher_stage(self, list_of_ids, originate_stage):
+        """
+        :param list_of_ids: list of ids of flashcards in the originate stage
+        :param originate_stage: (int)
+        :return: None
+        """
+        self._move(list_of_ids, originate_stage, originate_stage + 1)
+
+    @instrumented
+    def move_to_first_stage_from_third_stage(self, list_of_ids):
+        """
+        :param list_of_ids: list of ids of third stage flashcards
+        :return: None
+        """
+        self._move(list_of_ids, 3, 1)
+
+    @instrumented
+    def get_flashcards_to_revise(self, number_of_words):
+        """
+        :param number_of_words: (int)
+        :return: list of ids of the given number of third stage flashcards that should be revised first
+        """
+        return [row[0] for row in self.connection.execute(
+            'SELECT id FROM flashcards WHERE stage = 3 ORDER BY due LIMIT ?', (number_of_words,))]
+
+    @instrumented
+    def update_review_schedules(self, qualities):
+        """
+        Updates review schedules of revised third stage flashcards
+        :param qualities: dictionary where a key is an id of a flashcard and a value is a quality of the answer from
+                          0 to 5
+        :return: None
+        """
+        flashcards = [self.third_stage_flashcards[card_id] for card_id in qualities]
+        for flashcard in flashcards:
+            review(flashcard, qualities[flashcard.card_id])
+        with self.connection:
+            self.connection.executemany('UPDATE flashcards SET interval = ?, ease = ?, due = ? WHERE id = ?',
+                                        ((flashcard.interval, flashcard.ease, flashcard.due, flashcard.card_id)
+                                         for flashcard in flashcards))
+
+    @instrumented
+    def save_data(self):
+        """
+        All the modifications are already saved
+        :return: None
+        """
+        self.connection.commit()
+
+    def close(self):
+        """
+        Closes the connection to the database
+        :return: None
+        """
+        self.connection.commit()
+        self.connection.close()
+
+    @instrumented
+    def add_new_word(self, word):
+        """
+        Creates new Flashcard with the given word and saves it in the first stage
+        :param word: (str)
+        :return: -1 when an error occurred when creating new Flashcard, 0 when there is already Flashcard with
+                 the given english word in the database or 1 when there were no errors
+        """
+        if self.get_flashcard(word) is None:
+            try:
+                new_flashcard = Flashcard(word)
+            except FlashcardCreationError:
+                return -1
+            self._insert_flashcards([new_flashcard])
+            return 1
+        else:
+            return 0
+
+    @instrumented
+    def add_new_words(self, words, max_workers=8):
+        """
+        Creates new Flashcards with the given words, downloading them concurrently, and saves them in the first stage
+        in a single transaction
+        :param words: list of english words (str)
+        :param max_workers: (int) maximal number of words downloaded at the same time
+        :return: dictionary where a key is a word and a value is a result like the one returned by add_new_word
+        """
+        results = {word: 0 for word in words}
+        new_words = [word for word in results if self.get_flashcard(word) is None]
+        new_flashcards = []
+        for word, new_flashcard in create_flashcards_from_online_dictionary(new_words, max_workers).items():
+            if new_flashcard is None:
+                results[word] = -1
+            else:
+                new_flashcards.append(new_flashcard)
+                results[word] = 1
+        self._insert_flashcards(new_flashcards)
+        return results
+
+    def get_flashcard(self, english_word):
+        """
+        Returns a Flashcard with given english word
+        :param english_word: (str)
+        :return: (Flashcard) if there is a Flashcard with given english_word in the database or None otherwise
+        """
+        row = self.connection.execute(f'SELECT {COLUMNS} FROM flashcards WHERE english_word = ?',
+                                      (english_word,)).fetchone()
+        return None if row is None else _create_flashcard_from_row(row)
+
+    def get_flashcards_with_polish_word(self, polish_word):
+        """
+        Returns Flashcards that have given polish word among their translations
+        :param polish_word: (str)
+        :return: list of Flashcards sorted by their english words
+        """
+        return [_create_flashcard_from_row(row) for row in self.connection.execute(
+            'SELECT DISTINCT f.id, f.english_word, f.polish_words, f.definition, f.example, f.interval, f.ease, f.due '
+            'FROM polish_words p JOIN flashcards f ON f.id = p.card_id WHERE p.polish_word = ? ORDER BY f.english_word',
+            (polish_word,))]
+
+    @instrumented
+    def find_similar_flashcards(self, word, number=5):
+        """
+        Returns Flashcards whose english word or one of polish words is the most similar to the given word, used when
+        there is no flashcard with a misspelt word
+        :param word: (str) english or polish word
+        :param number: (int) maximal number of returned flashcards
+        :return: list of Flashcards from the most similar
+        """
+        if self._trigram_index is None:
+            self._trigram_index = TrigramIndex(row[0] for row in self.connection.execute(
+                'SELECT english_word FROM flashcards UNION ALL SELECT polish_word FROM polish_words'))
+        flashcards = {}
+        for similar_word in self._trigram_index.find_similar(word, number):
+            english_flashcard = self.get_flashcard(similar_word)
+            if english_flashcard is not None:
+                flashcards.setdefault(english_flashcard.card_id, english_flashcard)
+            for flashcard in self.get_flashcards_with_polish_word(similar_word):
+                flashcards.setdefault(flashcard.card_id, flashcard)
+        return list(flashcards.values())[:number]
+
+    def change_english_word(self, flashcard, new_word):
+        """
+        :param flashcard: (Flashcard)
+        :param new_word: (str)
+        :return: 1 if a change was successful or 0 otherwise
+        """
+        try:
+            with self.connection:
+                self.connection.execute('UPDATE flashcards SET english_word = ? WHERE id = ?',
+                                        (new_word, flashcard.card_id))
+        except sqlite3.IntegrityError:  # There is already a flashcard with this english word
+            return 0
+        self._update_trigram_index([flashcard.english_word], [new_word])
+        flashcard.english_word = new_word
+        return 1
+
+    def change_polish_word(self, flashcard, polish_word_index, new_word):
+        """
+        :param polish_word_index: (int) index of the word that will be changed
+        :param flashcard: (Flashcard)
+        :param new_word: (str)
+        :return: 1 if a change was successful or 0 otherwise
+        """
+        if 0 <= polish_word_index < len(flashcard.polish_words):
+            flashcard.polish_words[polish_word_index] = new_word
+            self._update_polish_words(flashcard)
+            return 1
+        else:
+            return 0
+
+    def add_polish_translation(self, flashcard, new_word):
+        """
+        :param flashcard: (Flashcard)
+        :param new_word: (str)
+        :return: 1 if an addition was successful or 0 otherwise
+        """
+        if new_word not in flashcard.polish_words:
+            flashcard.polish_words.append(new_word)
+            self._update_polish_words(flashcard)
+            return 1
+        else:
+            return 0
+
+    def delete_polish_word(self, flashcard, polish_word_index):
+        """
+        :param polish_word_index: (int) index of the word that will be changed
+        :param flashcard: (Flashcard)
+        :return: 1 if a deletion was successful or 0 otherwise
+        """
+        if 0 <= polish_word_index < len(flashcard.polish_words):
+            flashcard.polish_words.pop(polish_word_index)
+            self._update_polish_words(flashcard)
+            return 1
+        else:
+            return 0
+
+    def change_definition(self, flashcard, new_definition):
+        """
+        :param flashcard: (Flashcard)
+        :param new_definition: (str)
+        :return: None
+        """
+        with self.connection:
+            self.connection.execute('UPDATE flashcards SET definition = ? WHERE id = ?',
+                                    (new_definition, flashcard.card_id))
+        flashcard.definition = new_definition
+
+    def change_example(self, flashcard, new_example):
+        """
+        :param flashcard: (Flashcard)
+        :param new_example: (str)
+        :return: None
+        """
+        with self.connection:
+            self.connection.execute('UPDATE flashcards SET example = ? WHERE id = ?', (new_example, flashcard.card_id))
+        flashcard.example = new_example
+
+    @instrumented
+    def enrich_flashcards(self, entries):
+        """
+        Fills in missing definitions and examples of flashcards in a single transaction
+        :param entries: list of tuples with an english word (str), its definition (str) and its example (str), like
+                        the ones returned by EnrichmentQueue.get_results
+        :return: (int) number of enriched flashcards
+        """
+        enriched_words = set()
+        with self.connection:
+            for english_word, definition, example in entries:
+                flashcard = self.get_flashcard(english_word)
+                if flashcard is None:  # The flashcard was deleted or renamed in the meantime
+                    continue
+                for field, text in (('definition', definition), ('example', example)):
+                    if is_missing_text(getattr(flashcard, field)) and not is_missing_text(text):
+                        self.connection.execute(f'UPDATE flashcards SET {field} = ? WHERE id = ?',
+                                                (text, flashcard.card_id))
+                        enriched_words.add(english_word)
+        return len(enriched_words)
+
+    @instrumented
+    def delete_flashcard(self, flashcard):
+        """
+        :param flashcard: (Flashcard)
+        :return: 1 if a deletion was successful or 0 otherwise
+        """
+        with self.connection:
+            deleted = self.connection.execute('DELETE FROM flashcards WHERE id = ?', (flashcard.card_id,)).rowcount
+        if deleted:
+            self._update_trigram_index([flashcard.english_word] + flashcard.polish_words, [])
+        return 1 if deleted else 0
+
+    def add_flashcard(self, english_word, polish_word, definition, example):
+        """
+        Creates new Flashcard from given parameters and adds it to the database
+        :param english_word: (str)
+        :param polish_word: (str)
+        :param definition: (str)
+        :param example: (str)
+        :return: 1 if an addition was successful or 0 when there is already Flashcard with the given english word
+        """
+        if self.get_flashcard(english_word) is not None:
+            return 0
+        self._insert_flashcards([Flashcard(english_word, polish_word, definition, example)])
+        return 1
+
+    @instrumented
+    def add_flashcards(self, rows):
+        """
+        Creates new Flashcards from the rows and adds them to the database in a single transaction
+        :param rows: list of tuples with an english word, polish words separated by '/', a definition and an example
+                     (str)
+        :return: list of results (1 if a flashcard was added, 0 when there is already a Flashcard with its english word)
+        """
+        results = []
+        new_flashcards = {}
+        for english_word, polish_words, definition, example in rows:
+            if english_word in new_flashcards or self.get_flashcard(english_word) is not None:
+                results.append(0)
+            else:
+                new_flashcards[english_word] = Flashcard(english_word, polish_words, definition, example)
+                results.append(1)
+        self._insert_flashcards(list(new_flashcards.values()))
+        return results
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        print('Usage: python sqlite_database.py <data.csv> <data.db>')
+    else:
+        print(f'Migrated {migrate_from_csv(sys.argv[1], sys.argv[2])} flashcards.')
@@ -0,0 +1,60 @@
+class Stage:
+    """
+    Flashcards of one learning stage stored by their ids, so an id of a flashcard stays valid when other flashcards
+    are moved or deleted
+    """
+    def __init__(self):
+        self._flashcards = {}
+
+    def __len__(self):
+        return len(self._flashcards)
+
+    def __iter__(self):
+        return iter(self._flashcards.values())
+
+    def __contains__(self, flashcard):
+        return self._flashcards.get(flashcard.card_id) is flashcard
+
+    def __getitem__(self, card_id):
+        return self._flashcards[card_id]
+
+    def get(self, card_id):
+        """
+        :param card_id: (int)
+        :return: (Flashcard) flashcard with the id or None if it isn't in the stage
+        """
+        return self._flashcards.get(card_id)
+
+    def ids(self):
+        """
+        :return: list of ids of the flashcards in the stage
+        """
+        return list(self._flashcards)
+
+    def add(self, flashcard):
+        """
+        :param flashcard: (Flashcard)
+        :return: None
+        """
+        self._flashcards[flashcard.card_id] = flashcard
+
+    def remove(self, flashcard):
+        """
+        :param flashcard: (Flashcard) flashcard in the stage
+        :return: None
+        """
+        del self._flashcards[flashcard.card_id]
+
+    def move_to(self, card_ids, stage):
+        """
+        Moves flashcards with given ids to another stage. All the ids are checked before any flashcard is moved, so
+        KeyError leaves both stages unchanged.
+        :param card_ids: iterable of ids of flashcards in the stage, repeated ids are moved once
+        :param stage: (Stage) destination stage
+        :return: list of moved Flashcards
+        """
+        moved = [self._flashcards[card_id] for card_id in dict.fromkeys(card_ids)]
+        for flashcard in moved:
+            del self._flashcards[flashcard.card_id]
+        stage._flashcards.update((flashcard.card_id, flashcard) for flashcard in moved)
+        return moved
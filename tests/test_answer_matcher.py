@@ -0,0 +1,63 @@
+import unittest
+
+from answer_matcher import AnswerMatcher, CORRECT, ALMOST_CORRECT, WRONG, fold_diacritics, is_within_distance
+
+
+class AnswerMatcherTest(unittest.TestCase):
+    def test_grades(self):
+        matcher = AnswerMatcher(['przekazywać', 'komunikować', 'kot', 'zażółcić gęślą'])
+        cases = [
+            ('przekazywać', CORRECT),
+            ('  Przekazywać ', CORRECT),
+            ('KOMUNIKOWAĆ', CORRECT),
+            ('zażółcić   gęślą', CORRECT),
+            ('przekazywac', ALMOST_CORRECT),  # Without diacritics
+            ('zazolcic gesla', ALMOST_CORRECT),
+            ('przekazywaść', ALMOST_CORRECT),  # A wrong letter
+            ('przkazywać', ALMOST_CORRECT),  # A missing letter
+            ('przekazzywać', ALMOST_CORRECT),  # An additional letter
+            ('przekazywaćć', ALMOST_CORRECT),
+            ('pzrekazywać', ALMOST_CORRECT),  # Swapped letters
+            ('pzrekazywca', ALMOST_CORRECT),  # 2 typos in a long word
+            ('pzrkazywca', WRONG),  # 3 typos
+            ('kto', WRONG),  # Short words have to be exact
+            ('kat', WRONG),
+            ('kot kot', WRONG),
+            ('', WRONG),
+            ('przekazywać/komunikować', WRONG),
+        ]
+        for answer, grade in cases:
+            with self.subTest(answer=answer):
+                self.assertEqual(matcher.grade(answer), grade)
+
+    def test_typos_in_medium_words(self):
+        matcher = AnswerMatcher(['dom', 'rzeka', 'słowo'])
+        self.assertEqual(matcher.grade('rzkea'), ALMOST_CORRECT)
+        self.assertEqual(matcher.grade('rzecz'), WRONG)
+        self.assertEqual(matcher.grade('slowo'), ALMOST_CORRECT)
+        self.assertEqual(matcher.grade('slow'), ALMOST_CORRECT)  # Without diacritics and with a missing letter
+        self.assertEqual(matcher.grade('dmo'), WRONG)
+
+    def test_english_answers(self):
+        matcher = AnswerMatcher(['bewildering'])
+        self.assertEqual(matcher.grade('Bewildering'), CORRECT)
+        self.assertEqual(matcher.grade('bewlidering'), ALMOST_CORRECT)
+        self.assertEqual(matcher.grade('bewildered'), WRONG)
+
+    def test_fold_diacritics(self):
+        self.assertEqual(fold_diacritics('zażółć gęślą jaźń'), 'zazolc gesla jazn')
+        self.assertEqual(fold_diacritics('ŁÓDŹ'), 'LODZ')
+
+    def test_is_within_distance(self):
+        self.assertTrue(is_within_distance('abcd', 'abcd', 0))
+        self.assertTrue(is_within_distance('abcd', 'abdc', 1))
+        self.assertTrue(is_within_distance('abcd', 'abc', 1))
+        self.assertTrue(is_within_distance('abcd', 'xabcd', 1))
+        self.assertFalse(is_within_distance('abcd', 'badc', 1))
+        self.assertTrue(is_within_distance('abcd', 'badc', 2))
+        self.assertFalse(is_within_distance('abcd', 'ab', 1))
+        self.assertTrue(is_within_distance('', 'ab', 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
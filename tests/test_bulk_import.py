@@ -0,0 +1,166 @@
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import unquote
+from unittest import mock
+import unittest
+import threading
+import tempfile
+import time
+import os
+
+import database
+import flashcard
+from database import Database
+from flashcard import create_flashcards_from_online_dictionary
+
+# Pages of the stand-in dictionary, other words aren't in it
+PAGES = {
+    'dog': '<html><body><span class="dtrans-se">pies, psina</span><div class="db">an animal that barks</div>'
+           '<div class="dexamp">The dog barks.</div><div class="dexamp">A big dog.</div></body></html>',
+    'cat': '<html><body><span class="dtrans-se">kot</span><div class="db">a small animal</div>'
+           '<div class="dexamp">The cat sleeps.</div></body></html>',
+    'owl': '<html><body><span class="dtrans-se">sowa</span><div class="db">a bird that hunts at night</div>'
+           '</body></html>',
+    'river': '<html><body><span class="dtrans-se">rzeka</span><div class="db">a large stream</div>'
+             '<div class="dexamp">The river flows.</div></body></html>',
+}
+# Time in seconds each page takes to send, so concurrent downloads overlap
+RESPONSE_TIME = 0.2
+
+
+class DictionaryHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests.append(unquote(self.path.rsplit('/', 1)[-1]))
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+        time.sleep(RESPONSE_TIME)
+        with server.lock:
+            server.active -= 1
+        page = PAGES.get(unquote(self.path.rsplit('/', 1)[-1]))
+        body = (page or '<html><body>Not found</body></html>').encode('utf8')
+        self.send_response(200 if page else 404)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class BulkImportTest(unittest.TestCase):
+    def setUp(self):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), DictionaryHandler)
+        server.lock = threading.Lock()
+        server.requests = []
+        server.active = server.max_active = 0
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.server = server
+        for patcher in (mock.patch.object(flashcard, 'DICTIONARY_URL', f'http://127.0.0.1:{server.server_port}/words/'),
+                        mock.patch.object(flashcard, 'dictionary_cache', None),
+                        mock.patch.object(database, 'SAVE_DELAY', 3600)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _open_database(self):
+        """
+        :return: (Database) database with a data file with the word river, closed at the end of the test
+        """
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        data_path = os.path.join(directory.name, 'data.csv')
+        with open(data_path, 'w', encoding='utf8', newline='') as file:
+            file.write('english_word;polish_words;example;definition;stage\n'
+                       'river;rzeka;The *** flows.;a large stream;3\n')
+        opened_database = Database(data_path)
+        self.addCleanup(opened_database.close)
+        return opened_database
+
+    def test_create_flashcards(self):
+        flashcards = create_flashcards_from_online_dictionary(['dog', 'cat', 'owl', 'unicorn'], max_workers=4)
+        self.assertEqual(list(flashcards), ['dog', 'cat', 'owl', 'unicorn'])
+        dog = flashcards['dog']
+        self.assertEqual((dog.english_word, dog.polish_words, dog.definition, dog.example),
+                         ('dog', ['pies', 'psina'], 'an animal that barks', 'The *** barks.'))
+        self.assertEqual(flashcards['cat'].example, 'The *** sleeps.')
+        self.assertEqual(flashcards['owl'].example, '---')  # The dictionary has no examples of the word
+        self.assertIsNone(flashcards['unicorn'])
+
+    def test_words_are_downloaded_concurrently(self):
+        words = ['dog', 'cat', 'owl', 'unicorn']
+        start = time.perf_counter()
+        create_flashcards_from_online_dictionary(words, max_workers=4)
+        self.assertGreater(self.server.max_active, 1)
+        self.assertLess(time.perf_counter() - start, RESPONSE_TIME * len(words))
+        self.assertCountEqual(self.server.requests, words)
+
+    def test_max_workers(self):
+        create_flashcards_from_online_dictionary(['dog', 'cat', 'owl'], max_workers=1)
+        self.assertEqual(self.server.max_active, 1)
+
+    def test_add_new_words(self):
+        opened_database = self._open_database()
+        with mock.patch.object(opened_database, '_append_to_journal',
+                               wraps=opened_database._append_to_journal) as append_to_journal:
+            results = opened_database.add_new_words(['dog', 'unicorn', 'river', 'cat', 'dog'], max_workers=4)
+        self.assertEqual(results, {'dog': 1, 'unicorn': -1, 'river': 0, 'cat': 1})
+        # Words that already exist aren't downloaded and a repeated word is downloaded once
+        self.assertCountEqual(self.server.requests, ['dog', 'unicorn', 'cat'])
+        self.assertGreater(self.server.max_active, 1)
+        # All the new flashcards are added with a single write to the journal
+        append_to_journal.assert_called_once()
+        self.assertEqual(opened_database.journal_length, 2)
+        self.assertEqual([flashcard.english_word for flashcard in opened_database.first_stage_flashcards],
+                         ['dog', 'cat'])
+        self.assertEqual(opened_database.get_flashcard('dog').card_id, 1)
+        self.assertEqual(opened_database.get_flashcard('cat').card_id, 2)
+        self.assertIsNone(opened_database.get_flashcard('unicorn'))
+
+    def _assert_lock_is_free(self, opened_database):
+        """
+        Checks that another thread can change the database
+        :param opened_database: (Database)
+        :return: None
+        """
+        thread = threading.Thread(target=opened_database.change_definition,
+                                  args=(opened_database.get_flashcard('river'), 'a big stream'))
+        thread.start()
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+
+    def test_lock_is_free_while_downloading(self):
+        opened_database = self._open_database()
+
+        def download(english_words, max_workers):
+            self._assert_lock_is_free(opened_database)
+            return create_flashcards_from_online_dictionary(english_words, max_workers)
+
+        with mock.patch.object(database, 'create_flashcards_from_online_dictionary', download):
+            self.assertEqual(opened_database.add_new_words(['dog']), {'dog': 1})
+
+    def test_lock_is_free_while_choosing_example(self):
+        opened_database = self._open_database()
+
+        def choose_example():
+            self._assert_lock_is_free(opened_database)
+            return '2'
+
+        with mock.patch('builtins.input', choose_example), mock.patch('builtins.print'):
+            self.assertEqual(opened_database.add_new_word('dog'), 1)
+        self.assertEqual(opened_database.get_flashcard('dog').example, 'A big ***.')
+        self.assertEqual(opened_database.get_flashcard('river').definition, 'a big stream')
+        self.assertEqual(opened_database.add_new_word('dog'), 0)
+        self.assertEqual(opened_database.add_new_word('unicorn'), -1)
+
+    def test_add_new_words_without_new_words(self):
+        opened_database = self._open_database()
+        self.assertEqual(opened_database.add_new_words(['river', 'unicorn']), {'river': 0, 'unicorn': -1})
+        self.assertEqual(opened_database.journal_length, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
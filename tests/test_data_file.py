@@ -0,0 +1,83 @@
+from contextlib import redirect_stdout
+from unittest import mock
+import unittest
+import tempfile
+import io
+import os
+
+import database
+from database import Database
+
+HEADER = 'english_word;polish_words;example;definition;stage;id\n'
+
+
+class DataFileTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.data_path = os.path.join(directory.name, 'data.csv')
+        patcher = mock.patch.object(database, 'SAVE_DELAY', 3600)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _load(self, data):
+        """
+        :param data: (str) content of the data file
+        :return: (Database) closed at the end of the test
+        """
+        with open(self.data_path, 'w', encoding='utf8', newline='') as file:
+            file.write(data)
+        loaded_database = Database(self.data_path)
+        self.addCleanup(loaded_database.close)
+        return loaded_database
+
+    def _load_incorrect(self, data):
+        """
+        :param data: (str) content of the data file with incorrect rows
+        :return: list of reported lines (str)
+        """
+        output = io.StringIO()
+        with redirect_stdout(output), self.assertRaises(SystemExit):
+            self._load(data)
+        return output.getvalue().splitlines()
+
+    def test_ids(self):
+        loaded_database = self._load(HEADER + 'apple;jabłko;An *** a day.;a round fruit;1;7\n'
+                                              'dog;pies;The *** barks.;an animal;2;3\n')
+        self.assertEqual(loaded_database.get_flashcard('apple').card_id, 7)
+        self.assertEqual(loaded_database.second_stage_flashcards.ids(), [3])
+        self.assertEqual(loaded_database.next_card_id, 8)
+
+    def test_consecutive_ids_without_id_column(self):
+        loaded_database = self._load('english_word;polish_words;example;definition;stage\n'
+                                     'apple;jabłko;An *** a day.;a round fruit;1\n'
+                                     '\n'
+                                     'dog;pies;The *** barks.;an animal;2\n')
+        self.assertEqual(loaded_database.get_flashcard('apple').card_id, 0)
+        self.assertEqual(loaded_database.get_flashcard('dog').card_id, 1)
+
+    def test_all_incorrect_rows_are_reported(self):
+        lines = self._load_incorrect(HEADER + 'apple;jabłko;An *** a day.;a round fruit;1;0\n'
+                                              'dog;pies;The *** barks.;an animal;1;0\n'
+                                              'cat;kot;The *** sleeps.;an animal;4;1\n'
+                                              'house;dom;My *** is small.;a building;2;\n'
+                                              'river;rzeka;The *** flows.;a stream;3;two\n'
+                                              'tree;drzewo;\n')
+        self.assertEqual(lines, ['Row 3: id 0 is used by another row!',
+                                 "Row 4: stage has to be 1, 2 or 3, not '4'!",
+                                 "Row 5: id has to be an integer, not ''!",
+                                 "Row 6: id has to be an integer, not 'two'!",
+                                 'Row 7: wrong number of columns!'])
+
+    def test_incorrect_schedules_are_reported(self):
+        lines = self._load_incorrect('english_word;polish_words;example;definition;stage;id;interval;ease;due\n'
+                                     'apple;jabłko;An *** a day.;a round fruit;3;0;6;2.36;1700000000.5\n'
+                                     'dog;pies;The *** barks.;an animal;3;1;1.5;2.5;0\n'
+                                     'cat;kot;The *** sleeps.;an animal;3;2;1;;0\n')
+        self.assertEqual(lines, ["Row 3: interval has to be an integer and ease and due numbers, not '1.5', '2.5' "
+                                 "and '0'!",
+                                 "Row 4: interval has to be an integer and ease and due numbers, not '1', '' and '0'!"])
+
+
+if __name__ == '__main__':
+    unittest.main()
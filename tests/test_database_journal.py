@@ -0,0 +1,190 @@
+from unittest import mock
+import unittest
+import tempfile
+import shutil
+import os
+
+import database
+from database import Database
+
+DATA = ('english_word;polish_words;example;definition;stage\n'
+        'apple;jabłko;An *** a day.;a round fruit;1\n'
+        'cat;kot/kotek;The *** sleeps.;a small animal;1\n'
+        'house;dom;My *** is small.;a building;2\n'
+        'river;rzeka;The *** flows.;a large stream;3\n')
+
+
+def get_state(database):
+    """
+    :param database: (Database)
+    :return: (dict) where a key is an english word and a value is a tuple of the stage, the id, the polish words,
+             the definition, the example and the review schedule of its flashcard
+    """
+    return {flashcard.english_word: (stage, flashcard.card_id, list(flashcard.polish_words), flashcard.definition,
+                                     flashcard.example, flashcard.interval, flashcard.ease, flashcard.due)
+            for stage, flashcards in enumerate(database.flashcards, start=1) for flashcard in flashcards}
+
+
+class JournalTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.data_path = self._write_data(self.directory)
+        # The journal is compacted only when the test closes the database
+        patcher = mock.patch.object(database, 'SAVE_DELAY', 3600)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _write_data(self, directory):
+        """
+        :param directory: (str)
+        :return: (str) path to a new data file in the directory
+        """
+        data_path = os.path.join(directory, 'data.csv')
+        with open(data_path, 'w', encoding='utf8', newline='') as file:
+            file.write(DATA)
+        return data_path
+
+    def _open(self, data_path):
+        """
+        :param data_path: (str)
+        :return: (Database) closed at the end of the test
+        """
+        opened_database = Database(data_path)
+        self.addCleanup(opened_database.close)
+        return opened_database
+
+    def _copy_without_closing(self, data_path):
+        """
+        Copies the data file and the journal like they are left when the app crashes before compacting the journal
+        :param data_path: (str) path to the data file of an open database
+        :return: (str) path to the copied data file
+        """
+        directory = tempfile.mkdtemp(dir=self.directory)
+        copied_path = os.path.join(directory, 'data.csv')
+        shutil.copyfile(data_path, copied_path)
+        shutil.copyfile(data_path + '.journal', copied_path + '.journal')
+        return copied_path
+
+    def _make_changes(self, changed_database):
+        """
+        :param changed_database: (Database)
+        :return: None
+        """
+        changed_database.add_flashcard('dog', 'pies', 'an animal that barks', 'The *** barks.')
+        changed_database.change_english_word(changed_database.get_flashcard('apple'), 'apples')
+        changed_database.move_to_higher_stage([changed_database.get_flashcard('apples').card_id], 1)
+        changed_database.change_definition(changed_database.get_flashcard('cat'), 'a pet')
+        changed_database.add_polish_translation(changed_database.get_flashcard('cat'), 'kocur')
+        changed_database.update_review_schedules({changed_database.get_flashcard('river').card_id: 5})
+        changed_database.move_to_first_stage_from_third_stage([changed_database.get_flashcard('river').card_id])
+        changed_database.delete_flashcard(changed_database.get_flashcard('house'))
+
+    def test_changes_are_replayed_from_journal(self):
+        changed_database = self._open(self.data_path)
+        self._make_changes(changed_database)
+        expected_state = get_state(changed_database)
+        self.assertEqual(changed_database.journal_length, 8)
+
+        replayed_database = self._open(self._copy_without_closing(self.data_path))
+        self.assertEqual(get_state(replayed_database), expected_state)
+        self.assertEqual(replayed_database.journal_length, 8)
+
+    def test_rename_followed_by_stage_move(self):
+        changed_database = self._open(self.data_path)
+        flashcard = changed_database.get_flashcard('apple')
+        changed_database.change_english_word(flashcard, 'apples')
+        changed_database.move_to_higher_stage([flashcard.card_id], 1)
+
+        replayed_database = self._open(self._copy_without_closing(self.data_path))
+        self.assertIsNone(replayed_database.get_flashcard('apple'))
+        flashcard = replayed_database.get_flashcard('apples')
+        self.assertIn(flashcard, replayed_database.second_stage_flashcards)
+        self.assertNotIn(flashcard, replayed_database.first_stage_flashcards)
+        self.assertEqual(get_state(replayed_database), get_state(changed_database))
+
+    def test_journal_replayed_twice(self):
+        changed_database = self._open(self.data_path)
+        self._make_changes(changed_database)
+        # A flashcard added and renamed afterwards is re-created by the addition unless it's found by its id
+        changed_database.add_flashcard('wolf', 'wilk', 'a wild animal', 'The *** howls.')
+        changed_database.change_english_word(changed_database.get_flashcard('wolf'), 'wolves')
+        changed_database.move_to_higher_stage([changed_database.get_flashcard('wolves').card_id], 1)
+        expected_state = get_state(changed_database)
+        copied_path = self._copy_without_closing(self.data_path)
+        with open(copied_path + '.journal', 'rb') as file:
+            journal = file.read()
+
+        # The app crashed after the data file was replaced, but before the saved records were removed from the journal
+        replayed_database = Database(copied_path)
+        replayed_database.close()
+        with open(copied_path + '.journal', 'wb') as file:
+            file.write(journal)
+        replayed_database = self._open(copied_path)
+        self.assertEqual(get_state(replayed_database), expected_state)
+        self.assertEqual(replayed_database.next_card_id, changed_database.next_card_id)
+
+        # Nothing is lost when the data file is saved again
+        replayed_database.save_data()
+        self.assertEqual(get_state(self._open(self._copy_without_closing(copied_path))), expected_state)
+
+    def test_journal_with_english_words(self):
+        # Journals written before records had ids identify flashcards by their english words
+        with open(self.data_path + '.journal', 'w', encoding='utf8') as file:
+            file.write('{"operation": "rename", "english_word": "apple", "new_word": "apples"}\n'
+                       '{"operation": "stage", "english_words": ["apples"], "stage": 2}\n'
+                       '{"operation": "schedule", "schedules": [["river", 6, 2.36, 1700000000.5]]}\n'
+                       '{"operation": "set", "english_word": "cat", "field": "definition", "value": "a pet"}\n'
+                       '{"operation": "delete", "english_word": "house"}\n')
+
+        replayed_database = self._open(self.data_path)
+        self.assertEqual(get_state(replayed_database), {
+            'apples': (2, 0, ['jabłko'], 'a round fruit', 'An *** a day.', 0, 2.5, 0.0),
+            'cat': (1, 1, ['kot', 'kotek'], 'a pet', 'The *** sleeps.', 0, 2.5, 0.0),
+            'river': (3, 3, ['rzeka'], 'a large stream', 'The *** flows.', 6, 2.36, 1700000000.5)})
+
+    def test_compaction(self):
+        changed_database = Database(self.data_path)
+        self._make_changes(changed_database)
+        expected_state = get_state(changed_database)
+        changed_database.close()
+        self.assertEqual(os.path.getsize(self.data_path + '.journal'), 0)
+
+        os.remove(self.data_path + '.snapshot')  # The data file itself has to contain the changes
+        compacted_database = self._open(self.data_path)
+        self.assertEqual(compacted_database.journal_length, 0)
+        self.assertEqual(get_state(compacted_database), expected_state)
+
+    def test_changes_made_while_saving_stay_in_journal(self):
+        changed_database = self._open(self.data_path)
+        changed_database.change_definition(changed_database.get_flashcard('cat'), 'a pet')
+        write_data_file = changed_database._write_data_file
+
+        def write_data_file_and_change(flashcards):
+            write_data_file(flashcards)
+            changed_database.change_example(changed_database.get_flashcard('cat'), 'A *** purrs.')
+
+        with mock.patch.object(changed_database, '_write_data_file', write_data_file_and_change):
+            changed_database.save_data()
+        self.assertEqual(changed_database.journal_length, 1)
+        expected_state = get_state(changed_database)
+
+        replayed_database = self._open(self._copy_without_closing(self.data_path))
+        self.assertEqual(get_state(replayed_database), expected_state)
+
+    def test_partially_written_record_is_skipped(self):
+        changed_database = self._open(self.data_path)
+        changed_database.change_definition(changed_database.get_flashcard('cat'), 'a pet')
+        expected_state = get_state(changed_database)
+        copied_path = self._copy_without_closing(self.data_path)
+        with open(copied_path + '.journal', 'a', encoding='utf8') as file:
+            file.write('{"operation": "delete", "engl')
+
+        replayed_database = self._open(copied_path)
+        self.assertEqual(get_state(replayed_database), expected_state)
+        self.assertEqual(replayed_database.journal_length, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
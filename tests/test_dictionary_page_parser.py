@@ -0,0 +1,57 @@
+import unittest
+
+from dictionary_page_parser import parse_dictionary_page
+
+try:
+    from bs4 import BeautifulSoup
+except ImportError:
+    BeautifulSoup = None
+
+PAGES = [
+    # Texts of nested tags, entities and more examples than are used
+    '<html><head><script>var config = {"a": 1};</script></head><body>'
+    '<span class="trans dtrans dtrans-se">pies, <b>psina</b></span><span class="dtrans-se">second</span>'
+    '<div class="def ddef_d db">an animal <a href="/x">that</a> barks &amp; bites</div>'
+    + ''.join(f'<div class="examp dexamp"> <span class="eg deg">Example {i}.</span></div>' for i in range(4))
+    + '</body></html>',
+    # Scripts and styles inside the collected elements
+    '<span class="dtrans-se">kot<style>span { color: red; }</style></span>'
+    '<div class="db">Def <script>var x = 1;</script>here</div>'
+    '<div class="dexamp">An <script>if (a < b) { s = "</div>"; }</script>example.</div>',
+    # Broken page with unclosed tags
+    '<span class="dtrans-se">rzeka<div class="db">a large <i>stream</div><div class="dexamp">The river flows.',
+    # Page of a word that isn't in the dictionary
+    '<html><body><p>Not found</p></body></html>',
+]
+
+
+def parse_with_beautiful_soup(source):
+    """
+    :param source: (str) html of a page
+    :return: (tuple) like the one returned by parse_dictionary_page
+    """
+    soup = BeautifulSoup(source, 'html.parser')
+    polish_words, definition = soup.find('span', class_='dtrans-se'), soup.find('div', class_='db')
+    return (polish_words.text.strip() if polish_words is not None else None,
+            definition.text.strip() if definition is not None else None,
+            [example.text.strip() for example in soup.find_all('div', class_='dexamp', limit=3)])
+
+
+class DictionaryPageParserTest(unittest.TestCase):
+    def test_fields(self):
+        self.assertEqual(parse_dictionary_page(PAGES[0]),
+                         ('pies, psina', 'an animal that barks & bites', ['Example 0.', 'Example 1.', 'Example 2.']))
+        self.assertEqual(parse_dictionary_page(PAGES[3]), (None, None, []))
+
+    def test_scripts_and_styles_are_ignored(self):
+        self.assertEqual(parse_dictionary_page(PAGES[1]), ('kot', 'Def here', ['An example.']))
+
+    @unittest.skipIf(BeautifulSoup is None, 'BeautifulSoup is not installed')
+    def test_same_as_beautiful_soup(self):
+        for page in PAGES:
+            with self.subTest(page=page):
+                self.assertEqual(parse_dictionary_page(page), parse_with_beautiful_soup(page))
+
+
+if __name__ == '__main__':
+    unittest.main()
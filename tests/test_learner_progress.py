@@ -0,0 +1,125 @@
+from unittest import mock
+import unittest
+import tempfile
+import random
+import os
+
+import database
+from database import Database
+from learner_progress import LearnerProgress, load_learner_progress, INITIAL_INTERVAL, INITIAL_EASE, INITIAL_DUE
+from learning_session import LearningSession, LEARNING_ENGLISH, LEARNING_POLISH, REVISING
+
+DATA = ('english_word;polish_words;example;definition;stage;id;interval;ease;due\n'
+        'apple;jabłko;An *** a day.;a round fruit;1;0;0;2.5;0.0\n'
+        'cat;kot;The *** sleeps.;a small animal;1;1;0;2.5;0.0\n'
+        'house;dom;My *** is small.;a building;2;2;0;2.5;0.0\n'
+        'river;rzeka;The *** flows.;a large stream;3;3;6;2.36;1700000000.5\n'
+        'tree;drzewo;The *** is tall.;a tall plant;3;4;1;2.5;1700086400.0\n')
+
+
+def get_stage_ids(progress):
+    """
+    :param progress: (LearnerProgress or Database)
+    :return: list of sorted lists of ids of the flashcards in the stages
+    """
+    return [sorted(stage.ids()) for stage in progress.flashcards]
+
+
+def learn(progress, mode, number_of_words=None):
+    """
+    Finishes a session in which all the words are translated correctly
+    :param progress: (LearnerProgress)
+    :param mode: (str) mode of the session
+    :param number_of_words: (int) number of words in the session, all the words of the stage by default
+    :return: (dict) summary of the session
+    """
+    session = LearningSession(progress, mode, number_of_words, random.Random(0))
+    while not session.is_finished:
+        session.answer(session.flashcard.english_word if mode == LEARNING_POLISH else session.flashcard.polish_words[0])
+    return session.summary
+
+
+class LearnerProgressTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        data_path = os.path.join(directory.name, 'data.csv')
+        with open(data_path, 'w', encoding='utf8', newline='') as file:
+            file.write(DATA)
+        patcher = mock.patch.object(database, 'SAVE_DELAY', 3600)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.database = Database(data_path)
+        self.addCleanup(self.database.close)
+
+    def test_new_learner_starts_in_first_stage(self):
+        progress = LearnerProgress(self.database)
+        self.assertEqual(get_stage_ids(progress), [[0, 1, 2, 3, 4], [], []])
+        self.assertEqual([len(stage) for stage in progress.flashcards], [5, 0, 0])
+        self.assertEqual(progress.get_stage(3), 1)
+        self.assertIsNone(progress.get_stage(9))
+        schedule = progress.get_schedule(3)
+        self.assertEqual((schedule.interval, schedule.ease, schedule.due),
+                         (INITIAL_INTERVAL, INITIAL_EASE, INITIAL_DUE))
+        self.assertEqual(progress.get_flashcards_to_revise(5), [])
+        self.assertIn(self.database.get_flashcard('river'), progress.first_stage_flashcards)
+        self.assertNotIn(self.database.get_flashcard('river'), progress.third_stage_flashcards)
+
+    def test_progress_is_separate_from_deck_and_other_learners(self):
+        first_learner, second_learner = LearnerProgress(self.database), LearnerProgress(self.database)
+        self.assertEqual(learn(first_learner, LEARNING_ENGLISH), {'learned': 5, 'total': 5})
+        self.assertEqual(learn(first_learner, LEARNING_POLISH, 2)['learned'], 2)
+
+        self.assertEqual([len(stage) for stage in first_learner.flashcards], [0, 3, 2])
+        self.assertEqual(get_stage_ids(second_learner), [[0, 1, 2, 3, 4], [], []])
+        self.assertEqual(get_stage_ids(self.database), [[0, 1], [2], [3, 4]])
+        self.assertEqual(len(second_learner), 0)
+
+    def test_revising(self):
+        progress = LearnerProgress(self.database)
+        learn(progress, LEARNING_ENGLISH)
+        learn(progress, LEARNING_POLISH)
+        self.assertEqual(sorted(progress.get_flashcards_to_revise(5)), [0, 1, 2, 3, 4])
+
+        session = LearningSession(progress, REVISING, 2, random.Random(0))
+        revised_ids = session.tracker.card_ids
+        while not session.is_finished:
+            session.answer(session.flashcard.polish_words[0])
+        for card_id in revised_ids:
+            self.assertGreater(progress.get_schedule(card_id).due, INITIAL_DUE)
+            self.assertNotIn(card_id, progress.get_flashcards_to_revise(3))
+        # The schedules in the deck belong to its owner
+        self.assertEqual(self.database.get_flashcard('river').interval, 6)
+
+        session = LearningSession(progress, REVISING, 1, random.Random(0))
+        while not session.is_finished:
+            session.answer('wrong' if session.round < 2 else session.flashcard.polish_words[0])
+        self.assertEqual(session.summary, {'forgotten': 1, 'total': 1})
+        self.assertEqual(len(progress.first_stage_flashcards), 1)
+
+    def test_save_and_load(self):
+        progress = LearnerProgress(self.database)
+        learn(progress, LEARNING_ENGLISH, 3)
+        learn(progress, LEARNING_POLISH, 1)
+        file_path = os.path.join(self.directory, 'learner.progress')
+        progress.save(file_path)
+
+        loaded_progress = load_learner_progress(self.database, file_path)
+        self.assertEqual(get_stage_ids(loaded_progress), get_stage_ids(progress))
+        self.assertEqual(len(loaded_progress), 3)
+        with open(file_path, 'wb') as file:
+            file.write(b'damaged')
+        self.assertEqual(get_stage_ids(load_learner_progress(self.database, file_path)), [[0, 1, 2, 3, 4], [], []])
+
+    def test_deleted_flashcard(self):
+        progress = LearnerProgress(self.database)
+        learn(progress, LEARNING_ENGLISH)
+        self.database.delete_flashcard(self.database.get_flashcard('apple'))
+        self.database.delete_flashcard(self.database.get_flashcard('tree'))
+        self.assertEqual(get_stage_ids(progress), [[], [1, 2, 3], []])
+        self.assertIsNone(progress.get_stage(0))
+
+
+if __name__ == '__main__':
+    unittest.main()
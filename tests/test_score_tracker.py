@@ -0,0 +1,116 @@
+from collections import Counter
+import unittest
+import random
+
+from score_tracker import ScoreTracker
+
+NUMBER_OF_ROUNDS = 2
+
+
+def old_session_results(card_ids, is_correct):
+    """
+    Results of start_learning and start_revising from before ScoreTracker: all the words are tested in 2 rounds, then
+    the words without any correct translation are tested again until they are translated. Words with score 2 are
+    learned and, after revising, words with score 0 after the rounds are forgotten.
+    :param card_ids: list of ids of flashcards
+    :param is_correct: function that takes an id of a flashcard and returns whether it's translated correctly now
+    :return: (tuple) set of learned ids and set of forgotten ids
+    """
+    scores = {card_id: 0 for card_id in card_ids}
+    for i in range(NUMBER_OF_ROUNDS):
+        for card_id in card_ids:
+            if is_correct(card_id):
+                scores[card_id] += 1
+    forgotten_words = {card_id for card_id, score in scores.items() if score < 1}
+    while True:
+        order = [card_id for card_id, score in scores.items() if score < 1]
+        if not order:
+            break
+        for card_id in order:
+            if is_correct(card_id):
+                scores[card_id] += 1
+    return {card_id for card_id, score in scores.items() if score == 2}, forgotten_words
+
+
+def get_answers(generator, probabilities):
+    """
+    :param generator: (random.Random)
+    :param probabilities: dictionary where a key is an id of a flashcard and a value is the probability that it's
+                          translated correctly
+    :return: dictionary where a key is an id of a flashcard and a value is a list of its answers (bool), long enough
+             for any session
+    """
+    return {card_id: [generator.random() < probability for _ in range(100)] + [True]
+            for card_id, probability in probabilities.items()}
+
+
+def replay(answers):
+    """
+    :param answers: dictionary returned by get_answers
+    :return: function that takes an id of a flashcard and returns its next answer
+    """
+    counters = Counter()
+
+    def is_correct(card_id):
+        counters[card_id] += 1
+        return answers[card_id][counters[card_id] - 1]
+    return is_correct
+
+
+class ScoreTrackerTest(unittest.TestCase):
+    def _run(self, tracker, is_correct):
+        """
+        :param tracker: (ScoreTracker)
+        :param is_correct: function that takes an id of a flashcard and returns whether it's translated correctly now
+        :return: list of ids of the words in the order they were tested
+        """
+        tested = []
+        while not tracker.is_finished:
+            tested.append(tracker.card_id)
+            tracker.record(is_correct(tracker.card_id))
+        return tested
+
+    def test_results_match_old_rules(self):
+        generator = random.Random(12)
+        for _ in range(200):
+            card_ids = generator.sample(range(1000), generator.randint(1, 30))
+            answers = get_answers(generator, {card_id: generator.choice((0.0, 0.3, 0.7, 1.0)) for card_id in card_ids})
+            learned, forgotten = old_session_results(card_ids, replay(answers))
+
+            tracker = ScoreTracker(card_ids, NUMBER_OF_ROUNDS, random.Random(generator.random()))
+            self._run(tracker, replay(answers))
+            self.assertEqual(set(tracker.learned), learned)
+            self.assertEqual(len(tracker.learned), len(learned))
+            self.assertEqual(set(tracker.forgotten), forgotten)
+            self.assertEqual(len(tracker.forgotten), len(forgotten))
+            self.assertEqual(dict(zip(tracker.card_ids, tracker.scores)),
+                             {card_id: sum(answers[card_id][:NUMBER_OF_ROUNDS]) for card_id in card_ids})
+
+    def test_every_word_is_tested_in_every_round(self):
+        card_ids = list(range(10, 30))
+        tracker = ScoreTracker(card_ids, NUMBER_OF_ROUNDS, random.Random(3))
+        # Words with odd ids are missed in the rounds and translated when they are tested again
+        answers = {card_id: [card_id % 2 == 0, card_id % 2 == 0, True] for card_id in card_ids}
+        tested = self._run(tracker, replay(answers))
+        for i in range(NUMBER_OF_ROUNDS):
+            self.assertCountEqual(tested[i * len(card_ids):(i + 1) * len(card_ids)], card_ids)
+        self.assertCountEqual(tested[NUMBER_OF_ROUNDS * len(card_ids):], card_ids[1::2])
+
+    def test_missed_words_are_tested_until_translated(self):
+        answers = {1: [False, False, False, True], 2: [True, False], 3: [False, True]}
+        tracker = ScoreTracker(list(answers), NUMBER_OF_ROUNDS, random.Random(5))
+        tested = self._run(tracker, replay(answers))
+        self.assertEqual(Counter(tested), {1: 4, 2: 2, 3: 2})
+        self.assertEqual(tracker.learned, [])
+        self.assertEqual(tracker.forgotten, [1])
+
+    def test_no_words(self):
+        tracker = ScoreTracker([], NUMBER_OF_ROUNDS)
+        self.assertTrue(tracker.is_finished)
+        self.assertIsNone(tracker.card_id)
+        self.assertEqual(tracker.learned, [])
+        self.assertEqual(tracker.forgotten, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
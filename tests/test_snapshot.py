@@ -0,0 +1,143 @@
+from unittest import mock
+import unittest
+import tempfile
+import os
+
+import database
+from database import Database
+from snapshot import read_snapshot, write_snapshot, copy_flashcards, read_lazy_texts
+
+DATA = ('english_word;polish_words;example;definition;stage;id;interval;ease;due\n'
+        'apple;jabłko;An *** a day.;a round fruit;1;4;0;2.5;0.0\n'
+        'cat;kot/kotek;The *** sleeps.;a small animal;1;7;0;2.5;0.0\n'
+        'house;dom;My *** is small.;;2;1;0;2.5;0.0\n'
+        'river;rzeka;;a large stream;3;2;6;2.36;1700000000.5\n'
+        'żółw;żółw;The *** is slow.;an animal with a shell;3;3;1;2.5;1700086400.0\n')
+
+
+def get_state(stages):
+    """
+    :param stages: list of 3 Stages
+    :return: (dict) where a key is an english word and a value is a tuple of the stage, the id, the polish words,
+             the definition, the example and the review schedule of its flashcard
+    """
+    return {flashcard.english_word: (stage, flashcard.card_id, list(flashcard.polish_words), flashcard.definition,
+                                     flashcard.example, flashcard.interval, flashcard.ease, flashcard.due)
+            for stage, flashcards in enumerate(stages, start=1) for flashcard in flashcards}
+
+
+class SnapshotTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.data_path = os.path.join(directory.name, 'data.csv')
+        self.snapshot_path = self.data_path + '.snapshot'
+        with open(self.data_path, 'w', encoding='utf8', newline='') as file:
+            file.write(DATA)
+        patcher = mock.patch.object(database, 'SAVE_DELAY', 3600)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _read_snapshot(self):
+        """
+        :return: (list) 3 Stages from the snapshot or None if it isn't valid
+        """
+        snapshot = read_snapshot(self.snapshot_path, self.data_path)
+        if snapshot is None:
+            return None
+        stages, texts = snapshot
+        self.addCleanup(texts.close)
+        return stages
+
+    def _load_data_file(self):
+        """
+        :return: (dict) state of the flashcards loaded from the data file without the snapshot
+        """
+        with mock.patch.object(database, 'read_snapshot', return_value=None), \
+                mock.patch.object(Database, '_write_snapshot', return_value=False):
+            loaded_database = Database(self.data_path)
+        state = get_state(loaded_database.flashcards)
+        loaded_database.close()
+        return state
+
+    def test_round_trip(self):
+        expected_state = self._load_data_file()
+        Database(self.data_path).close()
+        self.assertTrue(os.path.exists(self.snapshot_path))
+
+        stages = self._read_snapshot()
+        self.assertIsNotNone(stages)
+        self.assertEqual(get_state(stages), expected_state)
+
+    def test_database_loads_snapshot(self):
+        Database(self.data_path).close()
+        with mock.patch.object(Database, '_split_data_to_stages') as split_data_to_stages:
+            loaded_database = Database(self.data_path)
+            self.addCleanup(loaded_database.close)
+        split_data_to_stages.assert_not_called()
+        self.assertEqual(get_state(loaded_database.flashcards), self._load_data_file())
+        self.assertEqual(loaded_database.get_flashcard('cat').polish_words, ['kot', 'kotek'])
+        self.assertEqual(loaded_database.get_flashcards_with_polish_word('żółw'),
+                         [loaded_database.get_flashcard('żółw')])
+
+    def test_write_snapshot_of_copied_flashcards(self):
+        loaded_database = Database(self.data_path)
+        expected_state = get_state(loaded_database.flashcards)
+        flashcards = copy_flashcards(loaded_database.flashcards)
+        # The flashcards loaded from the snapshot read their texts from it only when needed
+        read_lazy_texts(flashcards, loaded_database.snapshot_texts)
+        loaded_database.close()
+        os.remove(self.snapshot_path)
+        write_snapshot(self.snapshot_path, self.data_path, flashcards).close()
+
+        self.assertEqual(get_state(self._read_snapshot()), expected_state)
+
+    def test_snapshot_is_invalid_after_data_file_changes(self):
+        Database(self.data_path).close()
+        with open(self.data_path, 'a', encoding='utf8', newline='') as file:
+            file.write('dog;pies;The *** barks.;an animal that barks;1;9;0;2.5;0.0\n')
+
+        self.assertIsNone(self._read_snapshot())
+        loaded_database = Database(self.data_path)
+        self.assertIn(loaded_database.get_flashcard('dog'), loaded_database.first_stage_flashcards)
+        loaded_database.close()
+        # A new snapshot of the changed data file is written when it's loaded
+        self.assertIn('dog', get_state(self._read_snapshot()))
+
+    def test_snapshot_is_rewritten_after_save(self):
+        changed_database = Database(self.data_path)
+        changed_database.change_example(changed_database.get_flashcard('river'), 'The *** flows.')
+        changed_database.close()
+
+        stages = self._read_snapshot()
+        self.assertIsNotNone(stages)
+        self.assertEqual(get_state(stages)['river'][4], 'The *** flows.')
+        self.assertEqual(get_state(stages), self._load_data_file())
+
+    def test_damaged_snapshot_is_ignored(self):
+        expected_state = self._load_data_file()
+        Database(self.data_path).close()
+        with open(self.snapshot_path, 'r+b') as file:
+            file.write(b'DAMAGED!')
+
+        self.assertIsNone(self._read_snapshot())
+        loaded_database = Database(self.data_path)
+        self.addCleanup(loaded_database.close)
+        self.assertEqual(get_state(loaded_database.flashcards), expected_state)
+
+    def test_close_unmaps_snapshot(self):
+        Database(self.data_path).close()
+        loaded_database = Database(self.data_path)
+        loaded_database.close()
+        self.assertTrue(loaded_database.snapshot_texts.data.closed)
+        # An unmapped snapshot can be deleted also on Windows
+        os.remove(self.snapshot_path)
+
+    def test_missing_data_file(self):
+        Database(self.data_path).close()
+        os.remove(self.data_path)
+        self.assertIsNone(self._read_snapshot())
+
+
+if __name__ == '__main__':
+    unittest.main()
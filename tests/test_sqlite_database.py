@@ -0,0 +1,53 @@
+from unittest import mock
+import unittest
+import tempfile
+import os
+
+import database
+import sqlite_database
+from sqlite_database import SqliteDatabase, migrate_from_csv
+
+DATA = ('english_word;polish_words;example;definition;stage;id;interval;ease;due\n'
+        'apple;jabłko;An *** a day.;a round fruit;1;0;0;2.5;0.0\n'
+        'house;dom/budynek;My *** is small.;a building;2;1;0;2.5;0.0\n'
+        'river;rzeka;The *** flows.;a large stream;3;2;6;2.36;1700000000.5\n')
+
+
+class MigrationTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.csv_path = os.path.join(directory.name, 'data.csv')
+        self.sqlite_path = os.path.join(directory.name, 'data.sqlite')
+        with open(self.csv_path, 'w', encoding='utf8', newline='') as file:
+            file.write(DATA)
+        patcher = mock.patch.object(database, 'SAVE_DELAY', 3600)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_migrate_from_csv(self):
+        database.Database(self.csv_path).close()  # Writes the snapshot, so the texts are read from it
+        opened_databases = []
+
+        def open_database(file_path):
+            opened_databases.append(database.Database(file_path))
+            return opened_databases[-1]
+
+        with mock.patch.object(sqlite_database, 'Database', open_database):
+            self.assertEqual(migrate_from_csv(self.csv_path, self.sqlite_path), 3)
+        # The loaded data file is closed, so its writer is stopped and its snapshot unmapped
+        loaded_database, = opened_databases
+        self.assertFalse(loaded_database._writer.is_alive())
+        self.assertTrue(loaded_database.snapshot_texts.data.closed)
+
+        migrated_database = SqliteDatabase(self.sqlite_path)
+        self.addCleanup(migrated_database.close)
+        self.assertEqual([len(stage) for stage in migrated_database.flashcards], [1, 1, 1])
+        house = migrated_database.get_flashcard('house')
+        self.assertEqual((house.polish_words, house.definition, house.example),
+                         (['dom', 'budynek'], 'a building', 'My *** is small.'))
+        self.assertEqual(migrated_database.get_flashcard('river').interval, 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+
+from flashcard import Flashcard
+from stage import Stage
+
+
+def create_stage(english_words, first_id=0):
+    """
+    :param english_words: list of english words (str)
+    :param first_id: (int) id of the first flashcard, the next ones get consecutive ids
+    :return: (Stage) stage with flashcards of the words
+    """
+    stage = Stage()
+    for card_id, english_word in enumerate(english_words, start=first_id):
+        flashcard = Flashcard(english_word, 'słowo', 'a definition', 'An example.')
+        flashcard.card_id = card_id
+        stage.add(flashcard)
+    return stage
+
+
+class StageTest(unittest.TestCase):
+    def test_move_to(self):
+        first_stage = create_stage(['apple', 'cat', 'house'])
+        second_stage = create_stage(['river'], first_id=3)
+        apple, house = first_stage[0], first_stage[2]
+
+        moved = first_stage.move_to([2, 0], second_stage)
+        self.assertEqual(moved, [house, apple])
+        self.assertEqual(first_stage.ids(), [1])
+        self.assertEqual(sorted(second_stage.ids()), [0, 2, 3])
+        self.assertIn(apple, second_stage)
+        self.assertNotIn(apple, first_stage)
+
+    def test_move_to_with_unknown_id_changes_nothing(self):
+        first_stage = create_stage(['apple', 'cat', 'house'])
+        second_stage = create_stage(['river'], first_id=3)
+
+        with self.assertRaises(KeyError):
+            first_stage.move_to([0, 1, 7], second_stage)
+        self.assertEqual(first_stage.ids(), [0, 1, 2])
+        self.assertEqual(second_stage.ids(), [3])
+
+    def test_move_to_with_repeated_ids(self):
+        first_stage = create_stage(['apple', 'cat'])
+        second_stage = Stage()
+
+        moved = first_stage.move_to([1, 1, 0, 1], second_stage)
+        self.assertEqual([flashcard.card_id for flashcard in moved], [1, 0])
+        self.assertEqual(len(first_stage), 0)
+        self.assertEqual(len(second_stage), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
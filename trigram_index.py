@@ -0,0 +1,113 @@
+from collections import Counter
+from itertools import islice
+import heapq
+
+# Candidates for the most similar words are words that contain at least 2 of the rarest trigrams of a searched word,
+# so only a small part of big indexes is compared with it. More trigrams are used when there are too few candidates.
+RAREST_TRIGRAMS = 5
+# Only words whose length differs from the length of a searched word at most by that many letters are found, like
+# words with a missing, an additional or a wrong letter
+MAX_LENGTH_DIFFERENCE = 1
+# Maximal number of words compared with a searched word that has only one trigram in the index
+MAX_CANDIDATES = 500
+
+
+def _get_trigrams(word):
+    """
+    :param word: (str)
+    :return: set of trigrams (str) of the word in lowercase, padded with spaces to include its beginning and end
+    """
+    padded_word = f'  {word.lower()} '
+    return {padded_word[i:i + 3] for i in range(len(padded_word) - 2)}
+
+
+def _find_candidates(postings, number):
+    """
+    :param postings: list of sets of words (str) containing trigrams of a searched word, from the smallest
+    :param number: (int) number of searched words
+    :return: set of words (str) that will be compared with the searched word
+    """
+    if len(postings) == 1:
+        return set(islice(postings[0], MAX_CANDIDATES))
+    candidates = set()
+    for i, words in enumerate(postings):
+        if i >= RAREST_TRIGRAMS and len(candidates) >= number:
+            break
+        for other_words in postings[:i]:
+            candidates |= words & other_words
+    return candidates
+
+
+class TrigramIndex:
+    """
+    Index of words by their trigrams and lengths used to find the words most similar to a misspelt one. Every word can
+    be added many times and stays in the index until it is removed as many times.
+    """
+    def __init__(self, words=()):
+        """
+        :param words: iterable of words (str) added to the index
+        """
+        self._words = {}  # Words and how many times they were added
+        self._trigrams = {}  # Lengths of words and dicts of trigrams and sets of words of that length that contain them
+        for word in words:
+            self.add(word)
+
+    def __len__(self):
+        return len(self._words)
+
+    def __contains__(self, word):
+        return word in self._words
+
+    def add(self, word):
+        """
+        :param word: (str)
+        :return: None
+        """
+        count = self._words.get(word, 0)
+        self._words[word] = count + 1
+        if count == 0:
+            trigrams = self._trigrams.setdefault(len(word), {})
+            for trigram in _get_trigrams(word):
+                trigrams.setdefault(trigram, set()).add(word)
+
+    def remove(self, word):
+        """
+        :param word: (str) word that was added to the index
+        :return: None
+        """
+        count = self._words.get(word)
+        if count is None:
+            return
+        if count > 1:
+            self._words[word] = count - 1
+            return
+        del self._words[word]
+        trigrams = self._trigrams[len(word)]
+        for trigram in _get_trigrams(word):
+            words = trigrams[trigram]
+            words.discard(word)
+            if not words:
+                del trigrams[trigram]
+
+    def find_similar(self, word, number=5):
+        """
+        :param word: (str)
+        :param number: (int) maximal number of returned words
+        :return: list of words (str) with the highest similarity of trigrams to the given word, from the most similar
+        """
+        trigrams = _get_trigrams(word)
+        similar_words = []
+        for length in range(len(word) - MAX_LENGTH_DIFFERENCE, len(word) + MAX_LENGTH_DIFFERENCE + 1):
+            trigrams_of_length = self._trigrams.get(length, {})
+            postings = sorted((trigrams_of_length[trigram] for trigram in trigrams if trigram in trigrams_of_length),
+                              key=len)
+            if not postings:
+                continue
+            shared_trigrams = Counter()
+            candidates = _find_candidates(postings, number)
+            for words in postings:
+                shared_trigrams.update(candidates.intersection(words))
+            # Jaccard similarity of sets of trigrams, a word has length + 1 trigrams if none of them repeats
+            similar_words += [(shared / (len(trigrams) + length + 1 - shared), candidate)
+                              for candidate, shared in shared_trigrams.most_common(number)]
+        return [similar_word for _, similar_word in heapq.nlargest(number, similar_words)]
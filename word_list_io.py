@@ -0,0 +1,205 @@
+from flashcard import create_flashcards_from_online_dictionary
+from enrichment_queue import is_missing_text
+from database import Database
+from itertools import islice
+import csv
+import sys
+import os
+
+# Number of rows of a word list that are added to the database with a single write to the journal or in a single
+# transaction
+CHUNK_SIZE = 1000
+# Columns of a word list, a list without a header has them in this order and may omit the last ones
+COLUMNS = ['english_word', 'polish_words', 'definition', 'example']
+EXPORT_COLUMNS = COLUMNS + ['stage']
+# Delimiters of columns by extensions of files, files with other extensions are plain lists with one english word in
+# each line
+DELIMITERS = {'.tsv': '\t', '.csv': ','}
+# Delimiters recognised in .csv files, the one that occurs most often in the first line is used. The data file of
+# the app is separated by semicolons.
+CSV_DELIMITERS = ',;\t'
+
+
+def _get_delimiter(file_path, file):
+    """
+    :param file_path: (str) path to a word list
+    :param file: opened word list
+    :return: (str) delimiter of the columns or None if the file is a plain list
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension != '.csv':
+        return DELIMITERS.get(extension)
+    first_line = file.readline()
+    file.seek(0)
+    return max(CSV_DELIMITERS, key=first_line.count)
+
+
+def _read_rows(file, delimiter):
+    """
+    Reads the word list lazily, skipping empty lines. If the first row is a header, like in exported lists, the columns
+    are taken by their names and other columns are ignored.
+    :param file: opened word list
+    :param delimiter: (str) delimiter of the columns or None if the file is a plain list
+    :return: generator of tuples of a row number (int) and a list of fields (str) in the order of COLUMNS or
+             None if the row has more columns than COLUMNS
+    """
+    if delimiter is None:
+        for row_number, line in enumerate(file, start=1):
+            if line.strip():
+                yield row_number, [line.strip()]
+        return
+    reader = csv.reader(file, delimiter=delimiter)
+    indexes = None  # Indexes of COLUMNS in the rows or None if there is no header
+    for row in reader:
+        if not any(field.strip() for field in row):
+            continue
+        if indexes is None and reader.line_num == 1 and row[0].strip() == COLUMNS[0]:
+            header = [name.strip() for name in row]
+            indexes = [header.index(name) if name in header else None for name in COLUMNS]
+            continue
+        if indexes is None:
+            yield reader.line_num, (row if len(row) <= len(COLUMNS) else None)
+        else:
+            yield reader.line_num, [row[i] if i is not None and i < len(row) else '' for i in indexes]
+
+
+def _check_row(fields):
+    """
+    :param fields: list of fields (str) of a row in the order of COLUMNS or None if the row has too many columns
+    :return: (tuple) the row with stripped fields and missing ones filled with empty strings and None or None and
+             the reason why the row is incorrect (str). A row with only an english word has empty polish words.
+    """
+    if fields is None:
+        return None, f'more than {len(COLUMNS)} columns'
+    fields = fields + [''] * (len(COLUMNS) - len(fields))
+    english_word, polish_words, definition, example = (field.strip() for field in fields)
+    if not english_word:
+        return None, 'missing english word'
+    if not polish_words:
+        if definition or example:
+            return None, 'missing polish words'
+        return (english_word, '', '', ''), None
+    polish_words = [polish_word.strip() for polish_word in polish_words.split('/')]
+    if not all(polish_words):
+        return None, 'empty polish word'
+    return (english_word, '/'.join(polish_words), definition, example), None
+
+
+def _read_chunks(rows, chunk_size):
+    """
+    :param rows: iterator of rows returned by _read_rows
+    :param chunk_size: (int) maximal number of rows in a chunk
+    :return: generator of lists of rows
+    """
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def import_word_list(database, file_path, chunk_size=CHUNK_SIZE, download=True, max_workers=8):
+    """
+    Adds flashcards of the words from a .tsv, .csv or plain list to the first stage. The list is read and checked
+    lazily and each chunk of its rows is added with a single write, so lists of any size can be imported. Words that
+    already are in the database or earlier in the list are skipped. Rows with only an english word, like all the rows of
+    a plain list, are downloaded from the online dictionary.
+    :param database: (Database or SqliteDatabase)
+    :param file_path: (str) path to the word list
+    :param chunk_size: (int) number of rows added at once
+    :param download: (bool) whether rows with only an english word are downloaded or reported as incorrect
+    :param max_workers: (int) maximal number of words downloaded at the same time
+    :return: (dict) numbers of 'added' and 'existing' words, lists of words that 'failed' to download and 'incomplete'
+             words that were added without a definition or an example, and a list of 'invalid' rows as tuples of a row
+             number (int) and the reason (str)
+    """
+    summary = {'added': 0, 'existing': 0, 'failed': [], 'incomplete': [], 'invalid': []}
+    with open(file_path, encoding='utf-8-sig', newline='') as file:
+        for chunk in _read_chunks(_read_rows(file, _get_delimiter(file_path, file)), chunk_size):
+            rows = []
+            words_to_download = {}
+            for row_number, fields in chunk:
+                row, reason = _check_row(fields)
+                if row is None:
+                    summary['invalid'].append((row_number, reason))
+                elif row[1]:
+                    rows.append(row)
+                elif not download:
+                    summary['invalid'].append((row_number, 'missing polish words'))
+                elif row[0] in words_to_download or database.get_flashcard(row[0]) is not None:
+                    summary['existing'] += 1
+                else:
+                    words_to_download[row[0]] = None
+            if words_to_download:
+                for english_word, flashcard in create_flashcards_from_online_dictionary(list(words_to_download),
+                                                                                        max_workers).items():
+                    if flashcard is None:
+                        summary['failed'].append(english_word)
+                    else:
+                        rows.append((english_word, '/'.join(flashcard.polish_words), flashcard.definition,
+                                     flashcard.example))
+            for row, result in zip(rows, database.add_flashcards(rows)):
+                if not result:
+                    summary['existing'] += 1
+                    continue
+                summary['added'] += 1
+                if is_missing_text(row[2]) or is_missing_text(row[3]):
+                    summary['incomplete'].append(row[0])
+    return summary
+
+
+def export_word_list(database, file_path):
+    """
+    Writes all the flashcards to a .tsv or .csv list with a header or their english words to a plain list. Flashcards
+    are written one by one, so the whole list is never kept in memory. The list can be imported with import_word_list,
+    the stage column is ignored then.
+    :param database: (Database or SqliteDatabase)
+    :param file_path: (str) path to the word list, its extension is the format
+    :return: (int) number of exported flashcards
+    """
+    delimiter = DELIMITERS.get(os.path.splitext(file_path)[1].lower())
+    number_of_flashcards = 0
+    with open(file_path, 'w', encoding='utf8', newline='') as file:
+        if delimiter is not None:
+            writer = csv.writer(file, delimiter=delimiter)
+            writer.writerow(EXPORT_COLUMNS)
+        for stage, flashcards in enumerate(database.flashcards, start=1):
+            for flashcard in flashcards:
+                if delimiter is None:
+                    file.write(flashcard.english_word + '\n')
+                else:
+                    writer.writerow([flashcard.english_word, '/'.join(flashcard.polish_words), flashcard.definition,
+                                     flashcard.example, stage])
+                number_of_flashcards += 1
+    return number_of_flashcards
+
+
+def main():
+    """
+    Imports a word list to the data file or exports the data file to a word list
+    :return: None
+    """
+    if len(sys.argv) != 4 or sys.argv[2] not in ('import', 'export'):
+        print('Usage: python word_list_io.py <data file or .db> <import|export> <word list (.tsv, .csv or .txt)>')
+        sys.exit(1)
+    if sys.argv[1].endswith('.db'):
+        from sqlite_database import SqliteDatabase
+        database = SqliteDatabase(sys.argv[1])
+    else:
+        database = Database(sys.argv[1])
+    try:
+        if sys.argv[2] == 'export':
+            print(f'Exported {export_word_list(database, sys.argv[3])} flashcards.')
+            return
+        summary = import_word_list(database, sys.argv[3])
+        print(f'Added {summary["added"]} flashcards, {summary["existing"]} already existed.')
+        if summary['failed']:
+            print(f'Cannot download {len(summary["failed"])} words: {", ".join(summary["failed"])}')
+        for row_number, reason in summary['invalid']:
+            print(f'Row {row_number}: {reason}!')
+    finally:
+        database.close()
+
+
+if __name__ == '__main__':
+    main()